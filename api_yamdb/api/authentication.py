@@ -0,0 +1,89 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from reviews.models import TOKEN_STATE_FIELDS, User
+
+TOKEN_VERSION_CLAIM = 'token_version'
+TOKEN_VERSION_KEY = 'jwt:token-version:{user_id}'
+TOKEN_REVOKED = 'Токен отозван: данные пользователя изменились.'
+USER_INACTIVE = 'Пользователь деактивирован.'
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def get_tokens_for_user(user):
+    """
+    Refresh-токен с данными пользователя в claims.
+    Access-токен копирует claims из refresh-токена.
+    """
+    refresh = RefreshToken.for_user(user)
+    for field in TOKEN_STATE_FIELDS:
+        refresh[field] = getattr(user, field)
+    refresh[TOKEN_VERSION_CLAIM] = user.token_version
+    return refresh
+
+
+def remember_token_version(user):
+    get_cache().set(
+        TOKEN_VERSION_KEY.format(user_id=user.pk), user.token_version,
+        settings.TOKEN_VERSION_CACHE_TIMEOUT
+    )
+
+
+def forget_token_version(user):
+    get_cache().delete(TOKEN_VERSION_KEY.format(user_id=user.pk))
+
+
+def get_token_version(user_id):
+    """Актуальная версия токенов пользователя: из кэша, иначе из БД."""
+    cache = get_cache()
+    key = TOKEN_VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        version = User.objects.filter(pk=user_id).values_list(
+            'token_version', flat=True).first()
+        cache.set(key, version, settings.TOKEN_VERSION_CACHE_TIMEOUT)
+    return version
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    Аутентификация по JWT без загрузки пользователя из БД.
+    Пользователь собирается из claims токена; токен отзывается,
+    если его версия не совпадает с token_version пользователя
+    (деактивация через save() тоже меняет версию). Токен неактивного
+    пользователя отклоняется, как в штатной аутентификации simplejwt.
+    Токены без claims обрабатываются штатно, с запросом к БД.
+    """
+
+    def get_user(self, validated_token):
+        claims = (*TOKEN_STATE_FIELDS, TOKEN_VERSION_CLAIM)
+        if any(claim not in validated_token for claim in claims):
+            return super().get_user(validated_token)
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        if validated_token[TOKEN_VERSION_CLAIM] != get_token_version(user_id):
+            raise AuthenticationFailed(TOKEN_REVOKED, code='token_revoked')
+        if not validated_token['is_active']:
+            raise AuthenticationFailed(USER_INACTIVE, code='user_inactive')
+        user = User(
+            pk=user_id,
+            token_version=validated_token[TOKEN_VERSION_CLAIM],
+            **{field: validated_token[field] for field in TOKEN_STATE_FIELDS}
+        )
+        user._state.adding = False
+        user._state.db = DEFAULT_DB_ALIAS
+        user.from_token = True
+        return user
+
+
+def get_full_user(user):
+    """Полная запись пользователя, если он собран из claims токена."""
+    if getattr(user, 'from_token', False):
+        return User.objects.get(pk=user.pk)
+    return user
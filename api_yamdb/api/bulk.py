@@ -0,0 +1,261 @@
+from api.cache import TITLES, invalidate
+from api.serializers import (REVIEW_EXIST, BulkCommentSerializer,
+                             BulkReviewSerializer)
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
+from reviews.changes import record_objects
+from reviews.management.bulk import insert_objects
+from reviews.models import Comment, Review, Title, User
+from reviews.ratings import apply_new_reviews
+from reviews.search import index_new_objects
+
+BULK_NOT_LIST = (
+    'Ожидается список объектов (JSON) или по объекту на строку (NDJSON).'
+)
+BULK_EMPTY = 'Нет объектов для загрузки.'
+BULK_TOO_MANY = 'Не больше {limit} объектов в запросе.'
+TITLE_NOT_FOUND = 'Произведение {pk} не найдено.'
+REVIEW_NOT_FOUND = 'Отзыв {pk} не найден.'
+REVIEW_IN_BATCH = 'Отзыв автора на произведение уже есть в объекте {index}.'
+BULK_CONFLICT = 'Объект конфликтует с данными, записанными параллельно.'
+AUTHOR_UNAVAILABLE = (
+    'Автор {name} недоступен: имя занято другим пользователем '
+    'или слишком длинное.'
+)
+# Пользователь автора партнера: <партнер>.<имя автора>.
+PARTNER_AUTHOR_USERNAME = '{partner}.{name}'
+PARTNER_AUTHOR_EMAIL = '{username}@partner-authors.invalid'
+
+
+def error_result(code, field, message):
+    return {'status': code, 'errors': {field: [message]}}
+
+
+class BulkIngest:
+    """
+    Пакетная загрузка отзывов или комментариев партнера: автор
+    объекта - пользователь партнера с именем из поля author или, без
+    него, сам партнер. Объекты проверяются сериализатором без запросов
+    к базе, авторы, родители и конфликты - одним запросом на пачку,
+    новые объекты вставляются bulk_create в одной транзакции.
+    Результат - по объекту на каждый входной: id созданного объекта
+    или ошибки; ошибка в одном объекте не мешает загрузке остальных.
+    """
+
+    serializer_class = None
+    # Поле с id родителя (произведения или отзыва) в объекте.
+    parent_field = None
+
+    def __init__(self, partner, items):
+        self.partner = partner
+        self.items = items
+        self.results = {}
+
+    def run(self):
+        self.check_items()
+        valid = self.validate()
+        try:
+            self.save(self.build(valid))
+        except IntegrityError:
+            # Пока пачка проверялась, параллельный запрос записал
+            # конфликтующий объект или удалил родителя: проверяем заново.
+            objects = self.build(valid)
+            try:
+                self.save(objects)
+            except IntegrityError:
+                # Конфликты продолжаются: объекты по одному, чтобы
+                # ответить 409 только на конфликтующие.
+                self.save_each(objects)
+        return [self.results[index] for index in range(len(self.items))]
+
+    def check_items(self):
+        if not isinstance(self.items, list):
+            raise ValidationError(BULK_NOT_LIST)
+        if not self.items:
+            raise ValidationError(BULK_EMPTY)
+        if len(self.items) > settings.BULK_MAX_ITEMS:
+            raise ValidationError(
+                BULK_TOO_MANY.format(limit=settings.BULK_MAX_ITEMS))
+
+    def validate(self):
+        """
+        Проверенные данные объектов по их номерам в запросе. Один
+        сериализатор проверяет все объекты: поля строятся один раз.
+        """
+        serializer = self.serializer_class()
+        valid = {}
+        for index, item in enumerate(self.items):
+            try:
+                valid[index] = serializer.run_validation(item)
+            except ValidationError as error:
+                self.results[index] = {
+                    'status': status.HTTP_400_BAD_REQUEST,
+                    'errors': error.detail,
+                }
+        return valid
+
+    def build(self, valid):
+        """Новые объекты по номерам; для остальных записывает ошибки."""
+        authors = self.get_authors(
+            {data.get('author') for data in valid.values()})
+        parents = self.get_parents(
+            {data[self.parent_field] for data in valid.values()}, authors)
+        objects = {}
+        for index, data in valid.items():
+            author = authors.get(data.get('author'))
+            if author is None:
+                error = error_result(
+                    status.HTTP_400_BAD_REQUEST, 'author',
+                    AUTHOR_UNAVAILABLE.format(name=data['author']))
+            else:
+                error = self.check(index, data, author, parents)
+            if error:
+                self.results[index] = error
+            else:
+                objects[index] = self.create_object(data, author, parents)
+        return objects
+
+    def get_authors(self, names):
+        """
+        Авторы по именам из объектов: None - сам партнер, иначе его
+        пользователь PARTNER_AUTHOR_USERNAME; недостающие создаются
+        одной вставкой. Имена, занятые чужими пользователями или
+        длиннее username, в ответ не попадают.
+        """
+        authors = {None: self.partner}
+        usernames = {}
+        for name in names - {None}:
+            username = PARTNER_AUTHOR_USERNAME.format(
+                partner=self.partner.username, name=name)
+            if len(username) <= settings.MAX_LENGTH_USERNAME:
+                usernames[username] = name
+        if not usernames:
+            return authors
+        User.objects.bulk_create((
+            User(
+                username=username,
+                email=PARTNER_AUTHOR_EMAIL.format(username=username),
+                partner=self.partner)
+            for username in usernames
+        ), ignore_conflicts=True)
+        for author in User.objects.filter(
+            username__in=usernames, partner=self.partner
+        ):
+            authors[usernames[author.username]] = author
+        return authors
+
+    def save(self, objects):
+        if not objects:
+            return
+        with transaction.atomic():
+            insert_objects(list(objects.values()), settings.BULK_BATCH_SIZE)
+            self.after_insert(list(objects.values()))
+        for index, instance in objects.items():
+            self.results[index] = {
+                'status': status.HTTP_201_CREATED, 'id': instance.pk}
+
+    def save_each(self, objects):
+        for index, instance in objects.items():
+            # id, выданный в откаченной транзакции, не годится.
+            instance.pk = None
+            instance._state.adding = True
+            try:
+                self.save({index: instance})
+            except IntegrityError:
+                self.results[index] = error_result(
+                    status.HTTP_409_CONFLICT,
+                    api_settings.NON_FIELD_ERRORS_KEY, BULK_CONFLICT)
+
+    def get_parents(self, ids, authors):
+        raise NotImplementedError
+
+    def check(self, index, data, author, parents):
+        raise NotImplementedError
+
+    def create_object(self, data, author, parents):
+        raise NotImplementedError
+
+    def after_insert(self, objects):
+        pass
+
+
+class ReviewIngest(BulkIngest):
+    """
+    Отзывы {title, author, text, score}: не больше одного отзыва автора
+    на произведение.
+    """
+
+    serializer_class = BulkReviewSerializer
+    parent_field = 'title'
+
+    def get_parents(self, ids, authors):
+        # Пары (автор, произведение), для которых отзыв уже есть в базе
+        # и в уже проверенных объектах запроса.
+        self.reviewed = set(Review.objects.filter(
+            author__in=authors.values(), title_id__in=ids
+        ).values_list('author_id', 'title_id'))
+        self.batch_titles = {}
+        return set(Title.objects.filter(
+            pk__in=ids).values_list('pk', flat=True))
+
+    def check(self, index, data, author, parents):
+        title_id = data['title']
+        key = (author.pk, title_id)
+        if title_id not in parents:
+            return error_result(
+                status.HTTP_404_NOT_FOUND, 'title',
+                TITLE_NOT_FOUND.format(pk=title_id))
+        if key in self.reviewed:
+            return error_result(
+                status.HTTP_400_BAD_REQUEST,
+                api_settings.NON_FIELD_ERRORS_KEY, REVIEW_EXIST)
+        if key in self.batch_titles:
+            return error_result(
+                status.HTTP_400_BAD_REQUEST,
+                api_settings.NON_FIELD_ERRORS_KEY,
+                REVIEW_IN_BATCH.format(index=self.batch_titles[key]))
+        self.batch_titles[key] = index
+        return None
+
+    def create_object(self, data, author, parents):
+        return Review(
+            author=author, title_id=data['title'],
+            text=data['text'], score=data['score'])
+
+    def after_insert(self, objects):
+        # bulk_create не отправляет post_save: рейтинг, поиск, журнал
+        # изменений и кэш списков обновляются для всей пачки сразу.
+        apply_new_reviews(objects)
+        index_new_objects(objects, settings.BULK_BATCH_SIZE)
+        record_objects(objects)
+        invalidate(TITLES)
+
+
+class CommentIngest(BulkIngest):
+    """Комментарии {review, author, text}."""
+
+    serializer_class = BulkCommentSerializer
+    parent_field = 'review'
+
+    def get_parents(self, ids, authors):
+        # title_id нужен поисковому документу комментария.
+        return Review.objects.only('pk', 'title_id').in_bulk(ids)
+
+    def check(self, index, data, author, parents):
+        if data['review'] not in parents:
+            return error_result(
+                status.HTTP_404_NOT_FOUND, 'review',
+                REVIEW_NOT_FOUND.format(pk=data['review']))
+        return None
+
+    def create_object(self, data, author, parents):
+        return Comment(
+            author=author, review=parents[data['review']],
+            text=data['text'])
+
+    def after_insert(self, objects):
+        index_new_objects(objects, settings.BULK_BATCH_SIZE)
+        record_objects(objects)
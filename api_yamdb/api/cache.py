@@ -0,0 +1,134 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import (patch_cache_control, patch_vary_headers,
+                                quote_etag)
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+CATEGORIES = 'categories'
+GENRES = 'genres'
+TITLES = 'titles'
+CACHEABLE_METHODS = ('GET', 'HEAD')
+CACHEABLE_STATUSES = (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED)
+VERSION_KEY = 'api-cache:version:{group}'
+RESPONSE_KEY = 'api-cache:{group}:{version}:{host}{path}?{query}'
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def get_version(group):
+    return get_cache().get_or_set(VERSION_KEY.format(group=group), 1, None)
+
+
+def bump_version(group):
+    cache = get_cache()
+    key = VERSION_KEY.format(group=group)
+    cache.add(key, 1, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Ключ успели вытеснить между add и incr.
+        cache.set(key, 2, None)
+
+
+def invalidate(*groups):
+    """
+    Делает устаревшими все закэшированные ответы групп.
+    Версия меняется сразу и еще раз после коммита: ответ, собранный
+    другим запросом до коммита по старым данным, не переживет запись.
+    """
+    for group in groups:
+        bump_version(group)
+        transaction.on_commit(lambda group=group: bump_version(group))
+
+
+def get_cache_key(group, request):
+    """Ключ ответа: путь и отсортированные параметры запроса."""
+    query = '&'.join(
+        f'{name}={value}'
+        for name in sorted(request.query_params)
+        for value in sorted(request.query_params.getlist(name))
+    )
+    return hashlib.md5(RESPONSE_KEY.format(
+        group=group, version=get_version(group), host=request.get_host(),
+        path=request.path, query=query
+    ).encode()).hexdigest()
+
+
+class CachedResponseMixin:
+    """
+    Кэширование ответов на GET.
+    В кэше хранятся данные ответа и их ETag; If-None-Match с тем же
+    ETag получает 304 без тела. Сброс - по версии группы cache_group
+    (api.signals).
+    """
+
+    cache_group = None
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        cache = get_cache()
+        key = get_cache_key(self.cache_group, request)
+        cached = cache.get(key)
+        if cached is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            content = JSONRenderer().render(response.data)
+            cached = (
+                quote_etag(hashlib.md5(content).hexdigest()),
+                json.loads(content)
+            )
+            cache.set(key, cached)
+        etag, data = cached
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        return Response(data, headers={'ETag': etag})
+
+
+class CachedListMixin(CachedResponseMixin):
+    """Кэширование списка объектов."""
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs)
+
+
+class CachedRetrieveMixin(CachedResponseMixin):
+    """Кэширование ответа по одному объекту."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs)
+
+
+class CacheControlMixin:
+    """
+    Заголовки для кэша обратного прокси и клиентов.
+    Успешный анонимный GET - public на API_PUBLIC_CACHE_MAX_AGE секунд,
+    запрос с Authorization - только private с проверкой по ETag.
+    Vary: Authorization не дает отдать закэшированный анонимный ответ
+    пользователю с токеном.
+    """
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs)
+        if request.method not in CACHEABLE_METHODS:
+            return response
+        patch_vary_headers(response, ('Authorization',))
+        if 'HTTP_AUTHORIZATION' in request.META:
+            patch_cache_control(response, private=True, max_age=0)
+        elif response.status_code in CACHEABLE_STATUSES:
+            patch_cache_control(
+                response, public=True,
+                max_age=settings.API_PUBLIC_CACHE_MAX_AGE)
+        return response
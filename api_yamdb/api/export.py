@@ -0,0 +1,97 @@
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+from reviews.models import Comment, Review
+
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+# Поля выгрузки в базе и ключи в строке NDJSON (как в ответах API).
+REVIEW_FIELDS = {
+    'id': 'id',
+    'title': 'title_id',
+    'author': 'author__username',
+    'text': 'text',
+    'score': 'score',
+    'pub_date': 'pub_date',
+}
+COMMENT_FIELDS = {
+    'id': 'id',
+    'review': 'review_id',
+    'author': 'author__username',
+    'text': 'text',
+    'pub_date': 'pub_date',
+}
+
+
+def to_line(data):
+    """Строка NDJSON; даты - в формате ответов API."""
+    return json.dumps(data, cls=JSONEncoder, ensure_ascii=False) + '\n'
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Ответы с ошибкой для клиента выгрузки: одна строка JSON."""
+
+    media_type = NDJSON_CONTENT_TYPE
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return b'' if data is None else to_line(data).encode(self.charset)
+
+
+def iter_chunks(queryset, fields, chunk_size):
+    """
+    Строки queryset (отзывы или комментарии) словарями, по возрастанию
+    (pub_date, id), порциями chunk_size. Каждая порция - отдельный запрос
+    по ключу последней строки (keyset), а не открытый серверный курсор:
+    пока клиент читает ответ, соединение не держит транзакцию, и выгрузка
+    работает через PgBouncer.
+    """
+    rows = queryset.order_by('pub_date', 'id').values_list(*fields.values())
+    chunk = [dict(zip(fields, row)) for row in rows[:chunk_size]]
+    while chunk:
+        yield chunk
+        if len(chunk) < chunk_size:
+            return
+        pub_date, pk = chunk[-1]['pub_date'], chunk[-1]['id']
+        # pub_date >= - граница сканирования индекса (title, pub_date, id),
+        # условие на id отсекает только строки с той же датой.
+        chunk = [
+            dict(zip(fields, row)) for row in rows.filter(
+                Q(pub_date__gt=pub_date) | Q(id__gt=pk),
+                pub_date__gte=pub_date
+            )[:chunk_size]
+        ]
+
+
+def add_comments(reviews, chunk_size):
+    """
+    Комментарии порции отзывов запросами по chunk_size строк: число
+    комментариев на отзыв не ограничено.
+    """
+    by_review = {review['id']: review for review in reviews}
+    for review in reviews:
+        review['comments'] = []
+    comments = Comment.objects.filter(review_id__in=by_review)
+    for chunk in iter_chunks(comments, COMMENT_FIELDS, chunk_size):
+        for comment in chunk:
+            by_review[comment['review']]['comments'].append(comment)
+
+
+def iter_review_lines(title_id, since=None, comments=False, chunk_size=None):
+    """
+    Отзывы произведения строками NDJSON, порция за порцией.
+    Следующая порция читается из базы, только когда сервер отправил
+    предыдущую клиенту: медленный клиент замедляет чтение базы,
+    а память не зависит от числа отзывов.
+    """
+    reviews = Review.objects.filter(title_id=title_id)
+    if since is not None:
+        reviews = reviews.filter(pub_date__gte=since)
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    for chunk in iter_chunks(reviews, REVIEW_FIELDS, chunk_size):
+        if comments:
+            add_comments(chunk, chunk_size)
+        yield ''.join(map(to_line, chunk))
@@ -0,0 +1,250 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+from api.throttling import get_rejected_counts
+from api.workers import get_worker_stats
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+# Границы корзин гистограмм (le) по умолчанию: секунды и число запросов.
+SECONDS_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+QUERIES_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 200)
+HELP_LINE = '# HELP {name} {help}'
+TYPE_LINE = '# TYPE {name} {type}'
+SAMPLE_LINE = '{name}{labels} {value}'
+
+local = threading.local()
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(name, format_value(value).replace(
+            '\\', '\\\\').replace('"', '\\"'))
+        for name, value in labels
+    )
+    return f'{{{pairs}}}'
+
+
+def format_value(value):
+    if isinstance(value, str):
+        return value
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Гистограмма в формате Prometheus с набором меток."""
+
+    type = 'histogram'
+
+    def __init__(self, name, help, labels, buckets=SECONDS_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self.lock = threading.Lock()
+        # метки -> [счетчики корзин..., сумма, количество]
+        self.values = {}
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            values = self.values.setdefault(
+                key, [0] * (len(self.buckets) + 1) + [0])
+            for bucket in range(index, len(self.buckets)):
+                values[bucket] += 1
+            values[-2] += value
+            values[-1] += 1
+
+    def collect(self):
+        with self.lock:
+            items = sorted((key, list(values))
+                           for key, values in self.values.items())
+        for key, values in items:
+            labels = list(zip(self.labels, key))
+            for bound, count in zip(self.buckets, values):
+                yield f'{self.name}_bucket', labels + [('le', bound)], count
+            yield (
+                f'{self.name}_bucket', labels + [('le', float('inf'))],
+                values[-1]
+            )
+            yield f'{self.name}_sum', labels, values[-2]
+            yield f'{self.name}_count', labels, values[-1]
+
+
+class Counter:
+    """Счетчик Prometheus; значения берутся из функции collector."""
+
+    type = 'counter'
+
+    def __init__(self, name, help, label, collector):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.collector = collector
+
+    def collect(self):
+        for value, count in sorted(self.collector().items()):
+            yield self.name, [(self.label, value)], count
+
+
+class Gauge(Counter):
+    """Текущее значение Prometheus; значения берутся из функции collector."""
+
+    type = 'gauge'
+
+
+def worker_stat(key):
+    """Функция collector: показатель этого воркера с меткой pid."""
+
+    def collect():
+        stats = get_worker_stats()
+        if stats[key] is None:
+            return {}
+        return {stats['pid']: stats[key]}
+
+    return collect
+
+
+def render_metrics(metrics):
+    """Текстовый формат экспозиции Prometheus 0.0.4."""
+    lines = []
+    for metric in metrics:
+        lines.append(HELP_LINE.format(name=metric.name, help=metric.help))
+        lines.append(TYPE_LINE.format(name=metric.name, type=metric.type))
+        lines.extend(
+            SAMPLE_LINE.format(
+                name=name, labels=format_labels(labels),
+                value=format_value(value))
+            for name, labels, value in metric.collect()
+        )
+    return '\n'.join(lines) + '\n'
+
+
+class RequestStats:
+    """Замеры одного запроса: SQL и время сериализации."""
+
+    def __init__(self, keep_sql):
+        self.keep_sql = keep_sql
+        self.queries = 0
+        self.db_time = 0
+        self.serializer_time = 0
+        self.serializer_depth = 0
+        self.sql = []
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обертка выполнения SQL (connection.execute_wrapper)."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.queries += 1
+            self.db_time += duration
+            if self.keep_sql:
+                self.sql.append((duration, sql))
+
+
+def get_request_stats():
+    return getattr(local, 'stats', None)
+
+
+@contextmanager
+def collect_request_stats(keep_sql):
+    local.stats = RequestStats(keep_sql)
+    try:
+        yield local.stats
+    finally:
+        local.stats = None
+
+
+@contextmanager
+def serializer_timer():
+    """Время сериализации; вложенные сериализаторы не суммируются."""
+    stats = get_request_stats()
+    if stats is None:
+        yield
+        return
+    stats.serializer_depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.serializer_depth -= 1
+        if not stats.serializer_depth:
+            stats.serializer_time += time.perf_counter() - started
+
+
+class TimedSerializerMixin:
+    """Учет времени to_representation в метриках запроса."""
+
+    def to_representation(self, instance):
+        with serializer_timer():
+            return super().to_representation(instance)
+
+
+REQUEST_DURATION = Histogram(
+    'yamdb_request_duration_seconds', 'Время обработки запроса',
+    ('route', 'method', 'status'))
+REQUEST_QUERIES = Histogram(
+    'yamdb_request_db_queries', 'Количество SQL-запросов на запрос',
+    ('route', 'method'), QUERIES_BUCKETS)
+REQUEST_DB_TIME = Histogram(
+    'yamdb_request_db_seconds', 'Время SQL-запросов на запрос',
+    ('route', 'method'))
+REQUEST_SERIALIZER_TIME = Histogram(
+    'yamdb_request_serializer_seconds', 'Время сериализации ответа',
+    ('route', 'method'))
+THROTTLED_REQUESTS = Counter(
+    'yamdb_throttled_requests_total', 'Запросы, отклоненные лимитами',
+    'scope', get_rejected_counts)
+# Метрики отдает воркер, принявший запрос; воркеры различаются по pid.
+WORKER_REQUESTS = Counter(
+    'yamdb_worker_requests_total', 'Запросы, обработанные воркером',
+    'pid', worker_stat('requests'))
+WORKER_MEMORY = Gauge(
+    'yamdb_worker_resident_memory_bytes', 'Текущий RSS воркера',
+    'pid', worker_stat('rss'))
+WORKER_MAX_MEMORY = Gauge(
+    'yamdb_worker_max_resident_memory_bytes', 'Максимальный RSS воркера',
+    'pid', worker_stat('max_rss'))
+WORKER_START_TIME = Gauge(
+    'yamdb_worker_start_time_seconds', 'Время запуска воркера (unix)',
+    'pid', worker_stat('started'))
+WORKER_BOOT_TIME = Gauge(
+    'yamdb_worker_boot_seconds', 'Время от запуска воркера до готовности',
+    'pid', worker_stat('boot_seconds'))
+METRICS = (
+    REQUEST_DURATION, REQUEST_QUERIES, REQUEST_DB_TIME,
+    REQUEST_SERIALIZER_TIME, THROTTLED_REQUESTS, WORKER_REQUESTS,
+    WORKER_MEMORY, WORKER_MAX_MEMORY, WORKER_START_TIME, WORKER_BOOT_TIME
+)
+
+
+def observe_request(route, method, status, duration, stats):
+    REQUEST_DURATION.observe(
+        duration, route=route, method=method, status=status)
+    REQUEST_QUERIES.observe(stats.queries, route=route, method=method)
+    REQUEST_DB_TIME.observe(stats.db_time, route=route, method=method)
+    REQUEST_SERIALIZER_TIME.observe(
+        stats.serializer_time, route=route, method=method)
+
+
+class PrometheusRenderer(BaseRenderer):
+    """Текстовый формат Prometheus; ошибки доступа - в JSON."""
+
+    media_type = 'text/plain'
+    format = 'txt'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, str):
+            return data.encode(self.charset)
+        return JSONRenderer().render(data)
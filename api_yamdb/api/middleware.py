@@ -0,0 +1,63 @@
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from api.metrics import collect_request_stats, observe_request
+from api.workers import count_request
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+UNMATCHED_ROUTE = 'unmatched'
+SLOW_REQUEST_MESSAGE = (
+    'Медленный запрос {method} {path} ({route}): {duration:.3f} с, '
+    'SQL: {queries} за {db_time:.3f} с, сериализация: '
+    '{serializer_time:.3f} с.\n{sql}'
+)
+SQL_LINE = '{duration:.4f} с: {sql}'
+
+
+class MetricsMiddleware:
+    """
+    Метрики запросов по маршрутам (titles-list, reviews-detail, ...):
+    время ответа, число и время SQL-запросов, время сериализации.
+    Замеряется доля запросов METRICS_SAMPLE_RATE; запросы дольше
+    METRICS_SLOW_REQUEST_SECONDS пишутся в лог с самыми долгими SQL.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        count_request()
+        if random.random() >= settings.METRICS_SAMPLE_RATE:
+            return self.get_response(request)
+        keep_sql = settings.METRICS_SLOW_REQUEST_SECONDS is not None
+        with collect_request_stats(keep_sql) as stats, ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            started = time.perf_counter()
+            response = self.get_response(request)
+            duration = time.perf_counter() - started
+        match = request.resolver_match
+        route = match.url_name if match and match.url_name else (
+            UNMATCHED_ROUTE)
+        observe_request(
+            route, request.method, response.status_code, duration, stats)
+        if keep_sql and duration >= settings.METRICS_SLOW_REQUEST_SECONDS:
+            self.log_slow_request(request, route, duration, stats)
+        return response
+
+    def log_slow_request(self, request, route, duration, stats):
+        slowest = sorted(stats.sql, reverse=True)[
+            :settings.METRICS_SLOW_REQUEST_SQL]
+        logger.warning(SLOW_REQUEST_MESSAGE.format(
+            method=request.method, path=request.get_full_path(),
+            route=route, duration=duration, queries=stats.queries,
+            db_time=stats.db_time, serializer_time=stats.serializer_time,
+            sql='\n'.join(
+                SQL_LINE.format(duration=sql_duration, sql=sql)
+                for sql_duration, sql in slowest)
+        ))
@@ -0,0 +1,73 @@
+from django.conf import settings
+from rest_framework.pagination import (BasePagination, CursorPagination,
+                                       PageNumberPagination)
+
+CURSOR_MODE = 'cursor'
+
+
+class PageNumberOrCursorPagination(BasePagination):
+    """
+    Постраничная пагинация с включаемым курсорным режимом.
+    Курсорный режим не выполняет COUNT(*) и OFFSET: страница выбирается
+    по значению ключа сортировки (keyset), поэтому глубокие страницы
+    стоят столько же, сколько первая.
+    Режим включается параметром ?pagination=cursor, наличием параметра
+    cursor в запросе или для всех запросов флагом CURSOR_PAGINATION.
+    """
+
+    # Ключ курсора, последнее поле делает сортировку однозначной.
+    cursor_ordering = None
+    # Имя набора в settings.CURSOR_PAGINATION_MAX_PAGE_SIZE.
+    max_page_size_key = None
+
+    def get_paginator(self, request):
+        if self.is_cursor_mode(request):
+            return self.get_cursor_paginator()
+        return PageNumberPagination()
+
+    def is_cursor_mode(self, request):
+        return (
+            settings.CURSOR_PAGINATION
+            or request.query_params.get(
+                settings.PAGINATION_MODE_PARAM) == CURSOR_MODE
+            or CursorPagination.cursor_query_param in request.query_params
+        )
+
+    def get_cursor_paginator(self):
+        paginator = CursorPagination()
+        paginator.ordering = self.cursor_ordering
+        paginator.page_size_query_param = 'page_size'
+        paginator.max_page_size = settings.CURSOR_PAGINATION_MAX_PAGE_SIZE[
+            self.max_page_size_key]
+        return paginator
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.paginator = self.get_paginator(request)
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return PageNumberPagination().get_paginated_response_schema(schema)
+
+
+class TitlePagination(PageNumberOrCursorPagination):
+    """Пагинация произведений, курсор по (name, id)."""
+
+    cursor_ordering = ('name', 'id')
+    max_page_size_key = 'titles'
+
+
+class ReviewPagination(PageNumberOrCursorPagination):
+    """Пагинация отзывов, курсор по (pub_date, id)."""
+
+    cursor_ordering = ('-pub_date', '-id')
+    max_page_size_key = 'reviews'
+
+
+class CommentPagination(PageNumberOrCursorPagination):
+    """Пагинация комментариев, курсор по (pub_date, id)."""
+
+    cursor_ordering = ('-pub_date', '-id')
+    max_page_size_key = 'comments'
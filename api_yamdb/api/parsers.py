@@ -0,0 +1,35 @@
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+NDJSON_ERROR = 'Строка {line}: некорректный JSON ({error}).'
+
+
+class NDJSONParser(BaseParser):
+    """
+    Поток JSON-объектов, по одному на строку (NDJSON).
+    Тело читается построчно, пустые строки пропускаются. Чтение
+    прекращается на объекте сверх BULK_MAX_ITEMS: такую пачку все равно
+    отклонит проверка размера, а остаток тела не нужен.
+    """
+
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        max_items = settings.BULK_MAX_ITEMS + 1
+        items = []
+        for number, line in enumerate(stream, 1):
+            line = line.decode(encoding).strip()
+            if not line:
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError as error:
+                raise ParseError(NDJSON_ERROR.format(line=number, error=error))
+            if len(items) == max_items:
+                break
+        return items
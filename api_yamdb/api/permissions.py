@@ -19,7 +19,15 @@ class AdminOrModeratorOrAuthorOrReadOnly(BasePermission):
             request.method in SAFE_METHODS
             or request.user.is_admin
             or request.user.is_moderator
-            or obj.author == request.user)
+            or obj.author_id == request.user.id)
+
+
+class AdminOrPartner(BasePermission):
+    def has_permission(self, request, view):
+        return (
+            request.user.is_authenticated
+            and (request.user.is_admin or request.user.is_partner)
+        )
 
 
 class AdminOnly(BasePermission):
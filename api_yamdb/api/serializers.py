@@ -1,12 +1,20 @@
 import datetime as dt
 
+from api.metrics import TimedSerializerMixin
 from django.conf import settings
-from django.shortcuts import get_object_or_404
-from rest_framework.serializers import (CharField, EmailField, IntegerField,
-                                        ModelSerializer, RegexField,
-                                        Serializer, SlugRelatedField,
-                                        ValidationError)
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from django.db import IntegrityError
+from rest_framework.serializers import (BooleanField, CharField, ChoiceField,
+                                        DateTimeField, EmailField, FloatField,
+                                        IntegerField, ModelSerializer,
+                                        RegexField, Serializer,
+                                        SerializerMethodField,
+                                        SlugRelatedField, ValidationError)
+from rest_framework.settings import api_settings
+from reviews.changes import CURSOR_REGEX, FIRST_CURSOR
+from reviews.models import (SCORE_COUNT_FIELDS, SEARCH_KINDS, Category,
+                            Comment, Genre, Review, SearchDocument, Title,
+                            User)
+from reviews.ratings import histogram_median, title_histogram
 
 REVIEW_EXIST = 'Можно оставить только один отзыв на произведение!'
 TITLE_EXIST = 'Указанное произведение уже существует в базе данных!'
@@ -23,9 +31,14 @@ MIN_SCORE_ERROR = (
 MAX_SCORE_ERROR = (
     'Оценка не может быть больше {max_score}! Ваша оценка: {score}.'
 )
+BAD_CURSOR = 'Курсор журнала изменений - значение cursor из его ответа.'
+# Имя автора на сайте партнера в пакетной загрузке (api.bulk).
+PARTNER_AUTHOR_REGEX = r'^[\w.@+-]+\Z'
+# Поля произведения, которые выводятся только по запросу ?fields=.
+TITLE_OPTIONAL_FIELDS = ('stats',)
 
 
-class CategoryGenreCummonSerializer(ModelSerializer):
+class CategoryGenreCummonSerializer(TimedSerializerMixin, ModelSerializer):
     """Сериализатор для моделей Category и Genre."""
 
     ...
@@ -48,7 +61,31 @@ class GenreSerializer(CategoryGenreCummonSerializer):
         exclude = ('id',)
 
 
-class TitleBaseSerializer(ModelSerializer):
+class TitleStatsSerializer(Serializer):
+    """
+    Статистика оценок произведения по денормализованным счетчикам
+    (reviews.ratings): без запросов к отзывам.
+    """
+
+    review_count = IntegerField()
+    rating = IntegerField()
+    average = SerializerMethodField()
+    median = SerializerMethodField()
+    histogram = SerializerMethodField()
+
+    def get_average(self, title):
+        if not title.review_count:
+            return None
+        return round(title.score_sum / title.review_count, 2)
+
+    def get_median(self, title):
+        return histogram_median(title_histogram(title))
+
+    def get_histogram(self, title):
+        return title_histogram(title)
+
+
+class TitleBaseSerializer(TimedSerializerMixin, ModelSerializer):
     """Базовый сериализатор для модели Title."""
 
     category = SlugRelatedField(
@@ -58,7 +95,7 @@ class TitleBaseSerializer(ModelSerializer):
 
     class Meta:
         model = Title
-        fields = '__all__'
+        exclude = ('review_count', 'score_sum') + SCORE_COUNT_FIELDS
 
 
 class TitleReadSerializer(TitleBaseSerializer):
@@ -68,7 +105,21 @@ class TitleReadSerializer(TitleBaseSerializer):
     """
     category = CategorySerializer(read_only=True)
     genre = GenreSerializer(many=True, required=False, read_only=True)
-    rating = IntegerField()
+    rating = IntegerField(read_only=True)
+    stats = TitleStatsSerializer(source='*', read_only=True)
+
+    def get_fields(self):
+        """Необязательные поля - только перечисленные в ?fields=."""
+        fields = super().get_fields()
+        request = self.context.get('request')
+        requested = set(
+            request.query_params.get('fields', '').split(',')
+            if request else ()
+        )
+        for name in TITLE_OPTIONAL_FIELDS:
+            if name not in requested:
+                del fields[name]
+        return fields
 
 
 class TitleWriteSerializer(TitleBaseSerializer):
@@ -99,7 +150,7 @@ class TitleWriteSerializer(TitleBaseSerializer):
         return data
 
 
-class ReviewSerializer(ModelSerializer):
+class ReviewSerializer(TimedSerializerMixin, ModelSerializer):
     """Сериализатор для модели Review."""
 
     author = SlugRelatedField(read_only=True, slug_field='username')
@@ -109,21 +160,40 @@ class ReviewSerializer(ModelSerializer):
         fields = '__all__'
         read_only_fields = ('title',)
 
-    def validate(self, data):
-        request = self.context.get('request')
-        title = get_object_or_404(
-            Title, pk=self.context.get('view').kwargs.get('title_id')
-        )
-        if (
-            request.method == 'POST'
-            and Review.objects.filter(
-                title=title.id, author=request.user).exists()
-        ):
-            raise ValidationError(REVIEW_EXIST)
-        return data
+    def create(self, validated_data):
+        # Второй отзыв автора на произведение отклоняет ограничение
+        # unique_review, без отдельного запроса перед вставкой.
+        try:
+            return super().create(validated_data)
+        except IntegrityError:
+            if not Review.objects.filter(
+                title=validated_data['title'],
+                author=validated_data['author']
+            ).exists():
+                raise
+        raise ValidationError({
+            api_settings.NON_FIELD_ERRORS_KEY: [REVIEW_EXIST]
+        })
+
+
+class BulkReviewSerializer(ModelSerializer):
+    """
+    Отзыв в пакетной загрузке. Произведение задается id, его наличие
+    проверяется сразу для всей пачки (api.bulk); author - имя автора
+    на сайте партнера, без него автор - сам партнер.
+    """
+
+    title = IntegerField(min_value=1)
+    author = RegexField(
+        PARTNER_AUTHOR_REGEX, required=False,
+        max_length=settings.MAX_LENGTH_USERNAME)
+
+    class Meta:
+        model = Review
+        fields = ('title', 'author', 'text', 'score')
 
 
-class CommentSerializer(ModelSerializer):
+class CommentSerializer(TimedSerializerMixin, ModelSerializer):
     """Сериализатор для модели Comment."""
 
     author = SlugRelatedField(read_only=True, slug_field='username')
@@ -133,7 +203,23 @@ class CommentSerializer(ModelSerializer):
         fields = '__all__'
 
 
-class UserSerializer(ModelSerializer):
+class BulkCommentSerializer(ModelSerializer):
+    """
+    Комментарий в пакетной загрузке: отзыв задается id, author - как
+    у отзыва.
+    """
+
+    review = IntegerField(min_value=1)
+    author = RegexField(
+        PARTNER_AUTHOR_REGEX, required=False,
+        max_length=settings.MAX_LENGTH_USERNAME)
+
+    class Meta:
+        model = Comment
+        fields = ('review', 'author', 'text')
+
+
+class UserSerializer(TimedSerializerMixin, ModelSerializer):
     """Сериализатор для модели User."""
 
     class Meta:
@@ -143,7 +229,7 @@ class UserSerializer(ModelSerializer):
         )
 
 
-class UserwithlockSerializer(ModelSerializer):
+class UserwithlockSerializer(TimedSerializerMixin, ModelSerializer):
     """Сериализатор для модели User. Запрещено изменение роли."""
 
     class Meta:
@@ -178,3 +264,46 @@ class GettokenSerializer(Serializer):
     confirmation_code = CharField(
         required=True, max_length=settings.CONFIRMATION_CODE_LENGTH
     )
+
+
+class SearchQuerySerializer(Serializer):
+    """Сериализатор параметров поиска."""
+
+    q = CharField(required=True, max_length=settings.MAX_LENGTH_SEARCH_QUERY)
+    type = ChoiceField(choices=SEARCH_KINDS, required=False)
+
+
+class ExportQuerySerializer(Serializer):
+    """Сериализатор параметров выгрузки отзывов."""
+
+    since = DateTimeField(required=False)
+    comments = BooleanField(default=False)
+
+
+class ChangesQuerySerializer(Serializer):
+    """Сериализатор параметров журнала изменений."""
+
+    cursor = RegexField(
+        CURSOR_REGEX, default=FIRST_CURSOR,
+        error_messages={'invalid': BAD_CURSOR})
+    limit = IntegerField(
+        min_value=1, max_value=settings.CHANGES_MAX_BATCH_SIZE,
+        required=False)
+
+
+class SearchResultSerializer(TimedSerializerMixin, ModelSerializer):
+    """Сериализатор найденного поискового документа."""
+
+    type = CharField(source='kind')
+    id = IntegerField(source='object_id')
+    title_id = IntegerField()
+    review_id = IntegerField()
+    rank = FloatField()
+    headline = CharField()
+
+    class Meta:
+        model = SearchDocument
+        fields = (
+            'type', 'id', 'title_id', 'review_id', 'heading', 'headline',
+            'rank'
+        )
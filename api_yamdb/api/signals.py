@@ -0,0 +1,51 @@
+from api.authentication import forget_token_version, remember_token_version
+from api.cache import CATEGORIES, GENRES, TITLES, invalidate
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from reviews.models import Category, Genre, GenreTitle, Review, Title, User
+from reviews.signals import bulk_data_changed
+
+# Какие закэшированные списки устаревают при изменении модели:
+# в произведении выводятся категория, жанры и рейтинг по отзывам.
+CACHE_GROUPS = {
+    Category: (CATEGORIES, TITLES),
+    Genre: (GENRES, TITLES),
+    Title: (TITLES,),
+    GenreTitle: (TITLES,),
+    Review: (TITLES,),
+}
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Title)
+@receiver(post_save, sender=GenreTitle)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=GenreTitle)
+@receiver(post_delete, sender=Review)
+def invalidate_on_write(sender, **kwargs):
+    invalidate(*CACHE_GROUPS[sender])
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_on_genres_change(sender, action, **kwargs):
+    if action.startswith('post_'):
+        invalidate(TITLES)
+
+
+@receiver(bulk_data_changed)
+def invalidate_on_bulk_change(sender, **kwargs):
+    invalidate(CATEGORIES, GENRES, TITLES)
+
+
+@receiver(post_save, sender=User)
+def update_token_version(sender, instance, **kwargs):
+    remember_token_version(instance)
+
+
+@receiver(post_delete, sender=User)
+def revoke_tokens_on_delete(sender, instance, **kwargs):
+    forget_token_version(instance)
@@ -0,0 +1,148 @@
+import hashlib
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+NO_RATE_ERROR = 'Не задан лимит запросов для {scope}.'
+# Отклоненные запросы по scope - в кэше лимитов, общем для воркеров.
+REJECTED_KEY = 'throttle:rejected:{scope}'
+# Блокировка корзины: сколько секунд живет ключ и как часто
+# повторяется попытка ее взять.
+LOCK_TIMEOUT = 1
+LOCK_RETRY_SECONDS = 0.001
+
+
+def get_cache():
+    return caches[settings.THROTTLE_CACHE_ALIAS]
+
+
+def increment(cache, key, timeout):
+    """
+    Атомарное увеличение счетчика: add создает ключ, только если его
+    нет, incr в redis - одна команда, в LocMemCache - под блокировкой.
+    """
+    if cache.add(key, 1, timeout):
+        return 1
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Ключ истек между add и incr.
+        cache.add(key, 1, timeout)
+        return 1
+
+
+def get_rejected_counts():
+    """Отклоненные запросы по scope со всех воркеров."""
+    keys = {
+        REJECTED_KEY.format(scope=scope): scope
+        for scope in api_settings.DEFAULT_THROTTLE_RATES
+    }
+    return {
+        keys[key]: count for key, count in get_cache().get_many(keys).items()
+    }
+
+
+@contextmanager
+def cache_lock(cache, key):
+    """
+    Блокировка на ключе кэша, общая для всех воркеров: add атомарен
+    в redis (SET NX) и в LocMemCache. Ключ истекает сам, если
+    процесс, взявший блокировку, завершился, не освободив ее.
+    """
+    lock = f'{key}:lock'
+    while not cache.add(lock, 1, LOCK_TIMEOUT):
+        time.sleep(LOCK_RETRY_SECONDS)
+    try:
+        yield
+    finally:
+        cache.delete(lock)
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Ограничение запросов по алгоритму token bucket.
+    Лимит 'N/период': в корзине до N токенов, токены возвращаются
+    равномерно за период, каждый запрос забирает один токен.
+    Состояние корзины - (токены, время) в кэше THROTTLE_CACHE_ALIAS;
+    чтение и запись выполняются под cache_lock, поэтому при общем кэше
+    корзина одна на все воркеры. Отказ происходит до аутентификации
+    и запросов к базе.
+    """
+
+    cache_format = 'throttle:{scope}:{ident}'
+
+    @property
+    def cache(self):
+        return get_cache()
+
+    def get_rate(self):
+        # Лимиты читаются при каждом запросе, а не при импорте модуля.
+        try:
+            return api_settings.DEFAULT_THROTTLE_RATES[self.scope]
+        except KeyError:
+            raise ImproperlyConfigured(NO_RATE_ERROR.format(scope=self.scope))
+
+    def get_ident_value(self, request):
+        return self.get_ident(request)
+
+    def get_cache_key(self, request, view):
+        ident = self.get_ident_value(request)
+        if not ident:
+            return None
+        return self.cache_format.format(scope=self.scope, ident=ident)
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        refill = self.num_requests / self.duration
+        with cache_lock(self.cache, self.key):
+            now = self.timer()
+            tokens, updated = self.cache.get(
+                self.key, (self.num_requests, now))
+            tokens = min(self.num_requests, tokens + (now - updated) * refill)
+            if tokens >= 1:
+                # За период корзина наполняется: дольше хранить незачем.
+                self.cache.set(self.key, (tokens - 1, now), self.duration)
+                return True
+        increment(self.cache, REJECTED_KEY.format(scope=self.scope), None)
+        self.wait_time = (1 - tokens) / refill
+        return False
+
+    def wait(self):
+        return self.wait_time
+
+
+class UsernameTokenBucketThrottle(TokenBucketThrottle):
+    """Корзина на username из тела запроса, независимо от адреса."""
+
+    def get_ident_value(self, request):
+        data = request.data
+        username = data.get('username') if hasattr(data, 'get') else None
+        if not isinstance(username, str) or not username:
+            return None
+        # Ключ кэша без пробелов и спецсимволов из пользовательского ввода.
+        return hashlib.md5(username.lower().encode()).hexdigest()
+
+
+class SignupIPThrottle(TokenBucketThrottle):
+    scope = 'signup_ip'
+
+
+class SignupUsernameThrottle(UsernameTokenBucketThrottle):
+    scope = 'signup_username'
+
+
+class TokenIPThrottle(TokenBucketThrottle):
+    scope = 'token_ip'
+
+
+class TokenUsernameThrottle(UsernameTokenBucketThrottle):
+    scope = 'token_username'
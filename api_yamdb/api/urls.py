@@ -1,6 +1,7 @@
 from api.views import (CategoryViewSet, CommentViewSet, GenreViewSet,
-                       ReviewViewSet, TitleViewSet, UserViewSet, get_token,
-                       signup)
+                       ReviewViewSet, SearchViewSet, TitleViewSet, UserViewSet,
+                       bulk_comments, bulk_reviews, changes, get_token,
+                       metrics, signup)
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
@@ -16,11 +17,16 @@ router_v1.register(
     r'titles/(?P<title_id>\d+)/reviews/(?P<review_id>\d+)/comments',
     CommentViewSet, basename='comments'
 )
+router_v1.register('search', SearchViewSet, basename='search')
 router_v1.register('users', UserViewSet, basename='users')
 
 
 urlpatterns = [
     path('v1/auth/signup/', signup, name='signup'),
     path('v1/auth/token/', get_token, name='get_token'),
+    path('v1/metrics/', metrics, name='metrics'),
+    path('v1/bulk/reviews/', bulk_reviews, name='bulk_reviews'),
+    path('v1/bulk/comments/', bulk_comments, name='bulk_comments'),
+    path('v1/changes/', changes, name='changes'),
     path('v1/', include(router_v1.urls))
 ]
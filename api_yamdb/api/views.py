@@ -1,30 +1,52 @@
 import random
-from smtplib import SMTPResponseException
 from string import ascii_lowercase, ascii_uppercase, digits
 
+from api.authentication import get_full_user, get_tokens_for_user
+from api.bulk import CommentIngest, ReviewIngest
+from api.cache import (CATEGORIES, GENRES, TITLES, CacheControlMixin,
+                       CachedListMixin, CachedRetrieveMixin)
+from api.export import NDJSON_CONTENT_TYPE, NDJSONRenderer, iter_review_lines
 from api.filters import TitleFilter
+from api.metrics import METRICS, PrometheusRenderer, render_metrics
+from api.pagination import CommentPagination, ReviewPagination, TitlePagination
+from api.parsers import NDJSONParser
 from api.permissions import (AdminOnly, AdminOrModeratorOrAuthorOrReadOnly,
-                             AdminOrReadOnly)
-from api.serializers import (CategorySerializer, CommentSerializer,
+                             AdminOrPartner, AdminOrReadOnly)
+from api.serializers import (CategorySerializer, ChangesQuerySerializer,
+                             CommentSerializer, ExportQuerySerializer,
                              GenreSerializer, GettokenSerializer,
-                             ReviewSerializer, SignupSerializer,
-                             TitleReadSerializer, TitleWriteSerializer,
-                             UserSerializer, UserwithlockSerializer)
+                             ReviewSerializer, SearchQuerySerializer,
+                             SearchResultSerializer, SignupSerializer,
+                             TitleReadSerializer, TitleStatsSerializer,
+                             TitleWriteSerializer, UserSerializer,
+                             UserwithlockSerializer)
+from api.throttling import (SignupIPThrottle, SignupUsernameThrottle,
+                            TokenIPThrottle, TokenUsernameThrottle)
 from django.conf import settings
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.functional import cached_property
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status
-from rest_framework.decorators import action, api_view
+from rest_framework.decorators import (action, api_view,
+                                       authentication_classes, parser_classes,
+                                       permission_classes, renderer_classes,
+                                       throttle_classes)
 from rest_framework.filters import SearchFilter
 from rest_framework.mixins import (CreateModelMixin, DestroyModelMixin,
                                    ListModelMixin)
+from rest_framework.parsers import JSONParser
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet, ModelViewSet
-from rest_framework_simplejwt.tokens import RefreshToken
-from reviews.models import Category, Genre, Review, Title, User
+from reviews.changes import get_changes
+from reviews.models import (SCORE_COUNT_FIELDS, Category, Comment, Genre,
+                            Review, Title, User)
+from reviews.outbox import enqueue_email
+from reviews.search import search
 
 EMAIL_SUBJECT = 'Сервис YaMDB ждет подтверждания email'
 EMAIL_BODY = (
@@ -33,55 +55,21 @@ EMAIL_BODY = (
 SEND_EMAIL = 'Код подтверждения отправлен на почту {email}.'
 USERNAME_USED = 'Пользователь {username} уже существует!'
 EMAIL_USED = 'Почта {email} используется другим пользователем!'
-SEND_EMAIL_ERROR = (
-    'Не удалось отправь электронное письмо на {email}. '
-    'Код ошибки: {code}. Ошибка: {error}.'
-)
-SEND_EMAIL_ERROR_JSON = (
-    'Не удалось отправить электронное письмо на {email}! '
-    'Пользователь {username} не создан!'
-)
 BAD_CONFIRMATION_CODE = 'Не корректный confirmation code: {code}!'
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+# Действия, которым нужен сам родительский объект, а не только его id.
+PARENT_ACTIONS = ('list', 'create')
 
 
-def send_email_with_confirmation_code(
-    email, confirmation_code, add_user_flag, username
-):
+def send_email_with_confirmation_code(email, confirmation_code):
     """
-    Сервис YaMDB отправляет письмо с кодом подтверждения
-    (confirmation_code) на указанный адрес email.
+    Сервис YaMDB ставит в очередь письмо с кодом подтверждения
+    (confirmation_code) на указанный адрес email. Письмо отправляет
+    команда send_emails.
     """
-    try:
-        send_mail(
-            EMAIL_SUBJECT,
-            EMAIL_BODY.format(code=confirmation_code),
-            settings.EMAIL_HOST_USER,
-            [email, ],
-            fail_silently=False,
-        )
-        if add_user_flag:
-            User.objects.create(
-                username=username, email=email,
-                confirmation_code=confirmation_code
-            )
-        return Response(
-            {'email': email, 'username': username},
-            status=status.HTTP_200_OK
-        )
-    except SMTPResponseException as error:
-        print(
-            SEND_EMAIL_ERROR.format(
-                email=email, code=error.smtp_code, error=error.smtp_error
-            )
-        )
-        return Response(
-            {
-                'status': SEND_EMAIL_ERROR_JSON.format(
-                    email=email, username=username
-                )
-            },
-            status=status.HTTP_400_BAD_REQUEST
-        )
+    enqueue_email(
+        EMAIL_SUBJECT, EMAIL_BODY.format(code=confirmation_code), email
+    )
 
 
 def generate_confirmation_code():
@@ -95,13 +83,15 @@ def generate_confirmation_code():
 
 
 class CategoryViewSet(
-    CreateModelMixin, ListModelMixin, DestroyModelMixin, GenericViewSet
+    CacheControlMixin, CachedListMixin, CreateModelMixin, ListModelMixin,
+    DestroyModelMixin, GenericViewSet
 ):
     """Работа с категориями."""
 
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = (AdminOrReadOnly,)
+    cache_group = CATEGORIES
     filter_backends = (SearchFilter, )
     search_fields = ('name', )
     lookup_field = 'slug'
@@ -109,24 +99,31 @@ class CategoryViewSet(
 
 
 class GenreViewSet(
-    CreateModelMixin, ListModelMixin, DestroyModelMixin, GenericViewSet
+    CacheControlMixin, CachedListMixin, CreateModelMixin, ListModelMixin,
+    DestroyModelMixin, GenericViewSet
 ):
     """Работа с жанрами."""
 
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     permission_classes = (AdminOrReadOnly,)
+    cache_group = GENRES
     filter_backends = (SearchFilter,)
     search_fields = ('name', )
     lookup_field = 'slug'
     lookup_value_regex = r'[-a-zA-Z0-9_]+'
 
 
-class TitleViewSet(ModelViewSet):
+class TitleViewSet(
+    CacheControlMixin, CachedListMixin, CachedRetrieveMixin, ModelViewSet
+):
     """Работа с произведениями."""
 
-    queryset = Title.objects.annotate(rating=Avg('reviews__score')).all()
+    queryset = Title.objects.select_related(
+        'category').prefetch_related('genre')
     permission_classes = (AdminOrReadOnly,)
+    pagination_class = TitlePagination
+    cache_group = TITLES
     filter_backends = (DjangoFilterBackend, )
     filterset_class = TitleFilter
 
@@ -135,21 +132,69 @@ class TitleViewSet(ModelViewSet):
             return TitleReadSerializer
         return TitleWriteSerializer
 
+    @action(detail=True)
+    def stats(self, request, pk=None):
+        """
+        Гистограмма оценок, число отзывов, средняя и медиана:
+        /api/v1/titles/{id}/stats/. Кэшируется вместе с произведениями.
+        """
+        return self.get_cached_response(self.get_stats, request, pk)
 
-class ReviewViewSet(ModelViewSet):
+    def get_stats(self, request, pk):
+        title = get_object_or_404(Title.objects.only(
+            'rating', 'review_count', 'score_sum', *SCORE_COUNT_FIELDS
+        ), pk=pk)
+        return Response(TitleStatsSerializer(title).data)
+
+
+class ReviewViewSet(CacheControlMixin, ModelViewSet):
     """Работа с отзывами."""
 
     serializer_class = ReviewSerializer
     permission_classes = (AdminOrModeratorOrAuthorOrReadOnly,)
+    pagination_class = ReviewPagination
+
+    @cached_property
+    def title(self):
+        """Произведение из адреса: один запрос на весь запрос к API."""
+        return get_object_or_404(Title, pk=self.kwargs.get('title_id'))
 
-    def get_title(self):
-        return Title.objects.get(pk=self.kwargs.get('title_id'))
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.action in PARENT_ACTIONS:
+            # Для несуществующего произведения - 404 до проверки данных.
+            self.title
 
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        # Отзыв ищется одним запросом по паре (pk, title_id).
+        return Review.objects.filter(
+            title_id=self.kwargs.get('title_id')
+        ).select_related('author')
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, title=self.get_title())
+        serializer.save(author=self.request.user, title=self.title)
+
+    @action(
+        detail=False,
+        permission_classes=(AdminOrPartner,),
+        renderer_classes=(JSONRenderer, NDJSONRenderer)
+    )
+    def export(self, request, title_id=None):
+        """
+        Потоковая выгрузка всех отзывов произведения в NDJSON
+        (/api/v1/titles/{title_id}/reviews/export/): ?since= - отзывы
+        с этой даты публикации, ?comments=true - с комментариями.
+        """
+        serializer = ExportQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        response = StreamingHttpResponse(
+            iter_review_lines(self.title.pk, **serializer.validated_data),
+            content_type=NDJSON_CONTENT_TYPE
+        )
+        # nginx отдает поток без буферизации: клиент, который читает
+        # медленно, замедляет выгрузку.
+        response['X-Accel-Buffering'] = 'no'
+        return response
 
 
 class CommentViewSet(ModelViewSet):
@@ -157,16 +202,52 @@ class CommentViewSet(ModelViewSet):
 
     serializer_class = CommentSerializer
     permission_classes = (AdminOrModeratorOrAuthorOrReadOnly,)
+    pagination_class = CommentPagination
+
+    @cached_property
+    def review(self):
+        """
+        Отзыв из адреса одним запросом по паре (review_id, title_id):
+        для отзыва другого произведения - 404.
+        """
+        return get_object_or_404(
+            Review, pk=self.kwargs.get('review_id'),
+            title_id=self.kwargs.get('title_id')
+        )
 
-    def get_review(self):
-        get_object_or_404(Title, pk=self.kwargs.get('title_id'))
-        return get_object_or_404(Review, pk=self.kwargs.get('review_id'))
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.action in PARENT_ACTIONS:
+            self.review
 
     def get_queryset(self):
-        return self.get_review().comments.all()
+        # Комментарий ищется одним запросом с join отзыва; отзыв нужен
+        # и поисковому документу комментария (title_id).
+        return Comment.objects.filter(
+            review_id=self.kwargs.get('review_id'),
+            review__title_id=self.kwargs.get('title_id')
+        ).select_related('author', 'review')
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, review=self.get_review())
+        serializer.save(author=self.request.user, review=self.review)
+
+
+class SearchViewSet(ListModelMixin, GenericViewSet):
+    """
+    Полнотекстовый поиск по произведениям, отзывам и комментариям.
+    /api/v1/search/?q=<текст>&type=<title|review|comment>
+    """
+
+    serializer_class = SearchResultSerializer
+    filter_backends = ()
+
+    def get_queryset(self):
+        serializer = SearchQuerySerializer(data=self.request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return search(
+            serializer.validated_data['q'],
+            serializer.validated_data.get('type')
+        )
 
 
 class UserViewSet(ModelViewSet):
@@ -190,11 +271,12 @@ class UserViewSet(ModelViewSet):
     )
     def get_user_info(self, request):
         """Обработка роута /api/v1/users/me/."""
+        user = get_full_user(request.user)
         if request.method == 'GET':
-            serializer = UserwithlockSerializer(request.user)
+            serializer = UserwithlockSerializer(user)
         if request.method == 'PATCH':
             serializer = UserwithlockSerializer(
-                request.user, data=request.data, partial=True
+                user, data=request.data, partial=True
             )
             if not serializer.is_valid():
                 return Response(
@@ -203,59 +285,79 @@ class UserViewSet(ModelViewSet):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+def match_signup_user(users, username, email):
+    """
+    Среди пользователей с тем же username или email ищет пользователя
+    с той же парой username и email. Иначе возвращает текст конфликта.
+    """
+    for user in users:
+        if user.username == username and user.email == email:
+            return user, None
+    if any(user.username == username for user in users):
+        return None, USERNAME_USED.format(username=username)
+    return None, EMAIL_USED.format(email=email)
+
+
+def get_or_create_signup_user(username, email):
+    """
+    Пользователь для регистрации: один запрос по username или email,
+    если никого нет - создание. Одновременную регистрацию с тем же
+    username или email ловят уникальные ограничения таблицы.
+    """
+    users = User.objects.filter(Q(username=username) | Q(email=email))
+    found = list(users[:2])
+    if found:
+        return match_signup_user(found, username, email)
+    try:
+        with transaction.atomic():
+            return User.objects.create(
+                username=username, email=email,
+                confirmation_code=generate_confirmation_code()
+            ), None
+    except IntegrityError as error:
+        # Параллельный запрос успел создать пользователя первым.
+        found = list(users[:2])
+        if found:
+            return match_signup_user(found, username, email)
+        if 'username' in str(error):
+            return None, USERNAME_USED.format(username=username)
+        return None, EMAIL_USED.format(email=email)
+
+
 @api_view(['POST'])
+@authentication_classes(())
+@throttle_classes((SignupIPThrottle, SignupUsernameThrottle))
 def signup(request):
     """
     Пользователь отправляет POST-запрос на добавление нового пользователя
-    с параметрами email и username. Функция отправляет письмо с кодом
-    подтверждения (confirmation_code) на адрес email.
+    с параметрами email и username. Функция ставит в очередь письмо
+    с кодом подтверждения (confirmation_code) на адрес email.
     """
     serializer = SignupSerializer(data=request.data)
-    if serializer.is_valid():
-        username = serializer.validated_data['username']
-        email = serializer.validated_data['email']
-        user_exist_flag = User.objects.filter(
-            username=username, email=email).exists()
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    username = serializer.validated_data['username']
+    email = serializer.validated_data['email']
+    with transaction.atomic():
+        user, error = get_or_create_signup_user(username, email)
+        if error:
+            return Response(
+                {'status': error}, status=status.HTTP_400_BAD_REQUEST)
         # confirmation_code не задан -> пользователь создан посредством API
         # (роут /api/v1/users/) или панели администрирования
-        if (
-            user_exist_flag
-            and not User.objects.get(username=username).confirmation_code
-        ):
-            confirmation_code = generate_confirmation_code()
-            user = User.objects.get(username=username)
-            user.confirmation_code = confirmation_code
-            user.save()
-            return send_email_with_confirmation_code(
-                email, confirmation_code, False, username)
-        # confirmation_code задан -> пользователь создан посредством API
-        # ранее (роут /api/v1/auth/signup/) или панели администрирования
-        elif user_exist_flag:
-            confirmation_code = User.objects.get(
-                username=username).confirmation_code
-            return send_email_with_confirmation_code(
-                email, confirmation_code, False, username)
-        # confirmation_code не задан -> пользователь создается посредством API
-        # впервые (роут /api/v1/auth/signup/)
-        else:
-            if User.objects.filter(username=username).exists():
-                return Response(
-                    {'status': USERNAME_USED.format(username=username)},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            if User.objects.filter(email=email).exists():
-                return Response(
-                    {'status': EMAIL_USED.format(email=email)},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            confirmation_code = generate_confirmation_code()
-            return send_email_with_confirmation_code(
-                email, confirmation_code, True, username
-            )
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        if not user.confirmation_code:
+            user.confirmation_code = generate_confirmation_code()
+            user.save(update_fields=['confirmation_code'])
+        send_email_with_confirmation_code(email, user.confirmation_code)
+    return Response(
+        {'email': email, 'username': username},
+        status=status.HTTP_200_OK
+    )
 
 
 @api_view(['POST'])
+@authentication_classes(())
+@throttle_classes((TokenIPThrottle, TokenUsernameThrottle))
 def get_token(request):
     """
     Пользователь отправляет POST-запрос с параметрами
@@ -278,8 +380,66 @@ def get_token(request):
             )
         return Response(
             {
-                'access': str(RefreshToken.for_user(user).access_token)
+                'access': str(get_tokens_for_user(user).access_token)
             },
             status=status.HTTP_200_OK
         )
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['GET'])
+@permission_classes((AdminOnly,))
+@renderer_classes((PrometheusRenderer,))
+def metrics(request):
+    """Метрики запросов в текстовом формате Prometheus (MetricsMiddleware)."""
+    return Response(
+        render_metrics(METRICS), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+def bulk_response(results):
+    """201, если созданы все объекты, иначе 207 с ошибками по объектам."""
+    created = sum(
+        result['status'] == status.HTTP_201_CREATED for result in results)
+    return Response(
+        {
+            'created': created,
+            'failed': len(results) - created,
+            'results': results,
+        },
+        status=(
+            status.HTTP_201_CREATED if created == len(results)
+            else status.HTTP_207_MULTI_STATUS
+        )
+    )
+
+
+@api_view(['POST'])
+@parser_classes((JSONParser, NDJSONParser))
+@permission_classes((AdminOrPartner,))
+def bulk_reviews(request):
+    """
+    Пакетная загрузка отзывов партнера или администратора: JSON-список
+    или NDJSON объектов {title, author, text, score}, результат -
+    по каждому объекту.
+    """
+    return bulk_response(ReviewIngest(request.user, request.data).run())
+
+
+@api_view(['POST'])
+@parser_classes((JSONParser, NDJSONParser))
+@permission_classes((AdminOrPartner,))
+def bulk_comments(request):
+    """Пакетная загрузка комментариев: объекты {review, author, text}."""
+    return bulk_response(CommentIngest(request.user, request.data).run())
+
+
+@api_view(['GET'])
+def changes(request):
+    """
+    Журнал изменений каталога: /api/v1/changes/?cursor=<id>&limit=<n>.
+    Ответ - id изменившихся и удаленных объектов по типам и курсор
+    следующего запроса; объекты клиент читает обычными эндпоинтами.
+    """
+    serializer = ChangesQuerySerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    return Response(get_changes(**serializer.validated_data))
@@ -0,0 +1,64 @@
+import os
+import resource
+import threading
+import time
+
+# Модуль без зависимостей от Django: его импортируют хуки gunicorn.conf.py.
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+# ru_maxrss в Linux - в килобайтах.
+MAX_RSS_UNIT = 1024
+MB = 1024 * 1024
+# Сообщения хуков gunicorn.conf.py; по первому benchmark_workers
+# определяет готовность воркеров.
+WORKER_READY_MESSAGE = (
+    'Воркер {pid} готов за {seconds:.2f} с, RSS {rss:.1f} МБ.'
+)
+WORKER_EXIT_MESSAGE = (
+    'Воркер {pid} завершен: запросов {requests}, RSS {rss:.1f} МБ, '
+    'максимум {max_rss:.1f} МБ.'
+)
+
+lock = threading.Lock()
+state = {'started': time.time(), 'boot_seconds': None, 'requests': 0}
+
+
+def mark_worker_started():
+    """Начало жизни воркера (post_fork): счетчики не наследуются от мастера."""
+    with lock:
+        state.update(started=time.time(), boot_seconds=None, requests=0)
+
+
+def mark_worker_ready():
+    """Воркер загрузил приложение и готов принимать запросы."""
+    with lock:
+        state['boot_seconds'] = time.time() - state['started']
+    return state['boot_seconds']
+
+
+def count_request():
+    with lock:
+        state['requests'] += 1
+
+
+def get_memory():
+    """Текущий и максимальный RSS процесса в байтах."""
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * MAX_RSS_UNIT
+    try:
+        with open('/proc/self/statm') as statm:
+            rss = int(statm.read().split()[1]) * PAGE_SIZE
+    except OSError:
+        rss = max_rss
+    return rss, max_rss
+
+
+def get_worker_stats():
+    rss, max_rss = get_memory()
+    with lock:
+        return {
+            'pid': os.getpid(),
+            'started': state['started'],
+            'boot_seconds': state['boot_seconds'],
+            'requests': state['requests'],
+            'rss': rss,
+            'max_rss': max_rss,
+        }
@@ -3,14 +3,79 @@ ASGI config for YaMDb project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
-For more information on this file, see
-https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
+Django 2.2 has no native ASGI handler, so the WSGI application is wrapped
+with asgiref: the server reads requests and writes responses in the event
+loop, views run in a thread pool of ASGI_WORKER_THREADS threads per worker
+(ASGI_THREADS of asgiref 3.4 fails at import, hence a separate variable).
+
+    gunicorn api_yamdb.asgi:application -k uvicorn.workers.UvicornWorker
 """
 
 import os
+from concurrent.futures import ThreadPoolExecutor
 
-from django.core.asgi import get_asgi_application
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
 
-application = get_asgi_application()
+# Потоки воркера ограничивают и число соединений с базой (по одному
+# на поток при CONN_MAX_AGE > 0).
+executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('ASGI_WORKER_THREADS', default=8)))
+
+
+def run_and_close(self, body):
+    """
+    run_wsgi_app asgiref с вызовом close() у ответа Django: asgiref 3.4.1
+    его не вызывает, и без него не отправляется request_finished
+    (соединения с базой, закрытие потоковых ответов). close()
+    вызывается в том же потоке, что и представление.
+    """
+    application = self.wsgi_application
+    responses = []
+
+    def remember_response(environ, start_response):
+        responses.append(application(environ, start_response))
+        return responses[-1]
+
+    self.wsgi_application = remember_response
+    try:
+        # Исходная синхронная функция - через __dict__, без привязки.
+        vars(WsgiToAsgiInstance)['run_wsgi_app'].func(self, body)
+    finally:
+        for response in responses:
+            if hasattr(response, 'close'):
+                response.close()
+
+
+class ThreadPoolWsgiToAsgiInstance(WsgiToAsgiInstance):
+    # Запросы выполняются параллельно в пуле потоков, а не по очереди
+    # в одном потоке (thread_sensitive по умолчанию в новых asgiref).
+    run_wsgi_app = sync_to_async(
+        run_and_close, thread_sensitive=False, executor=executor)
+
+
+class DjangoWsgiToAsgi(WsgiToAsgi):
+    """WSGI-приложение Django как ASGI-приложение с поддержкой lifespan."""
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        await ThreadPoolWsgiToAsgiInstance(self.wsgi_application)(
+            scope, receive, send)
+
+    @staticmethod
+    async def lifespan(receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+application = DjangoWsgiToAsgi(get_wsgi_application())
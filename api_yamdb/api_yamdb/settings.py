@@ -37,6 +37,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -77,9 +78,68 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER', default='postgres'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='postgres'),
         'HOST': os.getenv('DB_HOST', default='db'),
-        'PORT': os.getenv('DB_PORT', default=5432)
+        'PORT': os.getenv('DB_PORT', default=5432),
+        # Постоянные соединения: секунды жизни соединения, 0 - соединение
+        # на каждый запрос, пустое значение - без ограничения. Соединение
+        # держит каждый поток воркера: число воркеров gunicorn по умолчанию
+        # ограничено бюджетом DB_MAX_CONNECTIONS (gunicorn.conf.py).
+        'CONN_MAX_AGE': (
+            int(os.getenv('DB_CONN_MAX_AGE', default=60))
+            if os.getenv('DB_CONN_MAX_AGE', default='60') else None
+        ),
     }
 }
+# Пул соединений: DB_POOL=pgbouncer - подключение через PgBouncer
+# (pool_mode = transaction; DB_HOST/DB_PORT указывают на PgBouncer).
+# Серверные курсоры iterator() в таком режиме не работают.
+DB_POOL = os.getenv('DB_POOL', default='')
+if DB_POOL == 'pgbouncer':
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    DATABASES['default']['OPTIONS'] = {
+        'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', default=5)),
+    }
+# Проверка простаивавшего постоянного соединения перед запросом
+# (reviews.connections), с; пустое значение - без проверки.
+DB_HEALTH_CHECK_INTERVAL = (
+    int(os.getenv('DB_HEALTH_CHECK_INTERVAL', default=30))
+    if os.getenv('DB_HEALTH_CHECK_INTERVAL', default='30') else None
+)
+
+
+# Cache
+# Кэш ответов API (api.cache) и корзины лимитов запросов (api.throttling).
+# LocMemCache живет внутри процесса: сброс кэша при записи не дойдет
+# до других воркеров. При нескольких воркерах нужен общий backend,
+# в infra/docker-compose.yaml - redis:
+# API_CACHE_BACKEND=django_redis.cache.RedisCache
+# API_CACHE_LOCATION=redis://redis:6379/1
+# (и так же THROTTLE_CACHE_BACKEND / THROTTLE_CACHE_LOCATION)
+
+API_CACHE_ALIAS = 'api'
+THROTTLE_CACHE_ALIAS = 'throttle'
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    API_CACHE_ALIAS: {
+        'BACKEND': os.getenv(
+            'API_CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('API_CACHE_LOCATION', default='api'),
+        'TIMEOUT': int(os.getenv('API_CACHE_TIMEOUT', default=60)),
+    },
+    THROTTLE_CACHE_ALIAS: {
+        'BACKEND': os.getenv(
+            'THROTTLE_CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('THROTTLE_CACHE_LOCATION', default='throttle'),
+    },
+}
+# Сколько секунд прокси (микрокэш nginx) и клиенты могут хранить ответ
+# на анонимный GET списков (api.cache.CacheControlMixin).
+API_PUBLIC_CACHE_MAX_AGE = int(
+    os.getenv('API_PUBLIC_CACHE_MAX_AGE', default=5))
 
 
 # Password validation
@@ -153,6 +213,13 @@ EMAIL_PORT = os.getenv('EMAIL_PORT')
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
 EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS')
+# Очередь исходящих писем (reviews.outbox, команда send_emails)
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_POLL_INTERVAL = 2
+OUTBOX_MAX_ATTEMPTS = 8
+# Задержка повтора удваивается с каждой попыткой, с
+OUTBOX_RETRY_DELAY = 30
+OUTBOX_MAX_RETRY_DELAY = 3600
 CONFIRMATION_CODE_LENGTH = 64
 
 # Работа с токенами
@@ -161,7 +228,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication',
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -169,8 +236,54 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS':
         'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 5,
+    # Сколько прокси перед приложением (nginx в docker-compose - 1):
+    # адрес клиента для лимитов берется из X-Forwarded-For.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', default=0)),
+    # Token bucket (api.throttling): 'N/период' - емкость корзины N,
+    # токены возвращаются равномерно, пустая корзина наполняется
+    # полностью за период.
+    'DEFAULT_THROTTLE_RATES': {
+        'signup_ip': '10/min',
+        'signup_username': '3/min',
+        'token_ip': '30/min',
+        'token_username': '5/min',
+    },
+}
+# Курсорная пагинация (api.pagination): включается для запроса параметром
+# ?pagination=cursor или для всех запросов переменной CURSOR_PAGINATION.
+CURSOR_PAGINATION = os.getenv('CURSOR_PAGINATION', default='') == 'True'
+PAGINATION_MODE_PARAM = 'pagination'
+# Максимальный размер страницы (?page_size=) в курсорном режиме
+CURSOR_PAGINATION_MAX_PAGE_SIZE = {
+    'titles': 100,
+    'reviews': 100,
+    'comments': 100,
 }
+# Конфигурация полнотекстового поиска PostgreSQL (/api/v1/search/)
+SEARCH_CONFIG = 'russian'
+MAX_LENGTH_SEARCH_QUERY = 200
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=14),
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
+# Метрики запросов (api.middleware.MetricsMiddleware, /api/v1/metrics/):
+# доля замеряемых запросов и порог медленного запроса, с (пусто - без лога).
+METRICS_SAMPLE_RATE = float(os.getenv('METRICS_SAMPLE_RATE', default=1))
+METRICS_SLOW_REQUEST_SECONDS = float(
+    os.getenv('METRICS_SLOW_REQUEST_SECONDS', default=1) or 0) or None
+# Сколько самых долгих SQL-запросов писать в лог медленного запроса
+METRICS_SLOW_REQUEST_SQL = 10
+# Время хранения в кэше API версии токенов пользователя
+# (api.authentication): задержка отзыва токенов в других процессах,
+# если кэш не общий.
+TOKEN_VERSION_CACHE_TIMEOUT = 60
+# Пакетная загрузка отзывов и комментариев (/api/v1/bulk/...):
+# объектов в одном запросе и строк в одном INSERT.
+BULK_MAX_ITEMS = int(os.getenv('BULK_MAX_ITEMS', default=1000))
+BULK_BATCH_SIZE = 500
+# Отзывов в одной порции потоковой выгрузки (api.export)
+EXPORT_CHUNK_SIZE = 500
+# Журнал изменений (/api/v1/changes/): записей в пачке по умолчанию
+# и максимум ?limit=.
+CHANGES_BATCH_SIZE = 1000
+CHANGES_MAX_BATCH_SIZE = 10000
@@ -0,0 +1,39 @@
+"""
+Профиль настроек воркеров, которые обслуживают только /api/:
+без админки, сессий, сообщений, CSRF и шаблонов browsable API.
+Админка и /redoc/ обслуживаются процессом с api_yamdb.settings.
+
+    DJANGO_SETTINGS_MODULE=api_yamdb.settings_api gunicorn ...
+"""
+from api_yamdb.settings import *  # noqa: F401,F403
+from api_yamdb.settings import INSTALLED_APPS, MIDDLEWARE, REST_FRAMEWORK
+
+API_ONLY_EXCLUDED_APPS = (
+    'django.contrib.admin',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+)
+# AuthenticationMiddleware требует сессий; пользователя запроса
+# определяет аутентификация DRF по JWT.
+API_ONLY_EXCLUDED_MIDDLEWARE = (
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+)
+
+INSTALLED_APPS = [
+    app for app in INSTALLED_APPS if app not in API_ONLY_EXCLUDED_APPS
+]
+MIDDLEWARE = [
+    middleware for middleware in MIDDLEWARE
+    if middleware not in API_ONLY_EXCLUDED_MIDDLEWARE
+]
+ROOT_URLCONF = 'api_yamdb.urls_api'
+# Шаблоны нужны только browsable API, движок шаблонов не загружается.
+TEMPLATES = []
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_RENDERER_CLASSES': ['rest_framework.renderers.JSONRenderer'],
+}
@@ -0,0 +1,6 @@
+from django.urls import include, path
+
+# Маршруты профиля api_yamdb.settings_api: только API.
+urlpatterns = [
+    path('api/', include('api.urls')),
+]
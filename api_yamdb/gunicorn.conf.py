@@ -0,0 +1,109 @@
+"""
+Настройки gunicorn, загружаются из рабочей директории автоматически:
+    gunicorn api_yamdb.wsgi:application
+    SERVER_MODE=asgi gunicorn api_yamdb.asgi:application
+Значения по умолчанию считаются от числа ядер и переопределяются
+переменными окружения GUNICORN_*.
+"""
+import os
+import time
+
+STARTED = time.time()
+READY_MESSAGE = (
+    'Мастер готов за {seconds:.2f} с: {workers} воркеров {worker_class}, '
+    'потоков {threads}, preload {preload}.'
+)
+DB_BUDGET_WARNING = (
+    'Воркеров {workers} x потоков {threads} = {connections} соединений '
+    'с базой, больше DB_MAX_CONNECTIONS={budget}.'
+)
+
+
+def get_cpu_count():
+    # Ядра, доступные процессу (ограничение контейнера через cpuset).
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+SERVER_MODE = os.getenv('SERVER_MODE', default='wsgi')
+CPU_COUNT = get_cpu_count()
+
+# Воркеры только для /api/ (api_yamdb.settings_api); manage.py в том же
+# контейнере работает с полными настройками.
+if os.getenv('API_ONLY', default='') == 'True':
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings_api')
+
+bind = os.getenv('GUNICORN_BIND', default='0:8000')
+threads = int(os.getenv('GUNICORN_THREADS', default=4))
+# Каждый поток воркера держит свое постоянное соединение с базой
+# (CONN_MAX_AGE), всего до workers x threads соединений. DB_MAX_CONNECTIONS -
+# сколько из max_connections PostgreSQL (100, из них 3 - резерв
+# суперпользователя) отдано этому сервису: 2 x 8 ядер + 1 = 17 воркеров
+# по 8 потоков - 136 соединений, больше всего max_connections.
+DB_MAX_CONNECTIONS = int(os.getenv('DB_MAX_CONNECTIONS', default=80))
+# Пока один воркер ждет базу, другой занимает ядро; по умолчанию -
+# не больше, чем помещается в бюджет соединений.
+workers = int(os.getenv('GUNICORN_WORKERS', default=max(
+    1, min(2 * CPU_COUNT + 1, DB_MAX_CONNECTIONS // threads))))
+if SERVER_MODE == 'asgi':
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    # Пул потоков представлений воркера ASGI (api_yamdb/asgi.py).
+    os.environ.setdefault('ASGI_WORKER_THREADS', str(threads))
+else:
+    worker_class = 'gthread' if threads > 1 else 'sync'
+
+# Приложение загружается в мастере до fork: воркеры делят память
+# с мастером (copy-on-write) и запускаются быстрее.
+preload_app = os.getenv('GUNICORN_PRELOAD', default='True') == 'True'
+# Перезапуск воркера после max_requests (+ случайно до jitter) запросов
+# ограничивает рост памяти; jitter разносит перезапуски воркеров.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', default=1000))
+max_requests_jitter = int(os.getenv(
+    'GUNICORN_MAX_REQUESTS_JITTER', default=max_requests // 10))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', default=30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', default=5))
+# Файлы heartbeat воркеров - в памяти, а не на диске контейнера.
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+
+def when_ready(server):
+    server.log.info(READY_MESSAGE.format(
+        seconds=time.time() - STARTED, workers=server.num_workers,
+        worker_class=worker_class, threads=threads, preload=preload_app))
+    # GUNICORN_WORKERS, заданный явно, может не уместиться в бюджет.
+    if workers * threads > DB_MAX_CONNECTIONS:
+        server.log.warning(DB_BUDGET_WARNING.format(
+            workers=workers, threads=threads,
+            connections=workers * threads, budget=DB_MAX_CONNECTIONS))
+
+
+def pre_fork(server, worker):
+    if preload_app:
+        # Соединения с базой, открытые мастером, не наследуются воркерами.
+        from django.db import connections
+        connections.close_all()
+
+
+def post_fork(server, worker):
+    from api.workers import mark_worker_started
+    mark_worker_started()
+
+
+def post_worker_init(worker):
+    from api.workers import (MB, WORKER_READY_MESSAGE, get_worker_stats,
+                             mark_worker_ready)
+    seconds = mark_worker_ready()
+    stats = get_worker_stats()
+    worker.log.info(WORKER_READY_MESSAGE.format(
+        pid=stats['pid'], seconds=seconds, rss=stats['rss'] / MB))
+
+
+def worker_exit(server, worker):
+    from api.workers import MB, WORKER_EXIT_MESSAGE, get_worker_stats
+    stats = get_worker_stats()
+    worker.log.info(WORKER_EXIT_MESSAGE.format(
+        pid=stats['pid'], requests=stats['requests'],
+        rss=stats['rss'] / MB, max_rss=stats['max_rss'] / MB))
@@ -1,6 +1,6 @@
 from django.contrib import admin
-from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
-                            Title, User)
+from reviews.models import (Category, Comment, Genre, GenreTitle,
+                            OutgoingEmail, Review, Title, User)
 
 
 class CategoryGenreAdmin(admin.ModelAdmin):
@@ -31,7 +31,8 @@ class TitleAdmin(admin.ModelAdmin):
         'name',
         'year',
         'description',
-        'category'
+        'category',
+        'rating'
     )
     list_editable = ('name', 'year', 'description', 'category')
     search_fields = ('name',)
@@ -75,4 +76,19 @@ class CommentAdmin(admin.ModelAdmin):
     search_fields = ('text', 'author__username')
 
 
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'to',
+        'subject',
+        'created',
+        'attempts',
+        'next_attempt_at',
+        'sent_at'
+    )
+    list_filter = ('sent_at',)
+    search_fields = ('to',)
+
+
 admin.site.register(User)
@@ -1,7 +1,18 @@
 from django.apps import AppConfig
+from django.core.signals import request_finished, request_started
+from django.db.models.signals import post_migrate
 
 
 class ReviewsConfig(AppConfig):
     # default_auto_field = 'django.db.models.BigAutoField'
     name = 'reviews'
     verbose_name = 'Управление отзывами'
+
+    def ready(self):
+        import reviews.signals  # noqa: F401
+        from reviews.indexes import create_indexes_after_migrate
+        post_migrate.connect(create_indexes_after_migrate, sender=self)
+        from reviews.connections import (check_connections,
+                                         mark_connections_used)
+        request_started.connect(check_connections)
+        request_finished.connect(mark_connections_used)
@@ -0,0 +1,154 @@
+from itertools import chain
+
+from django.conf import settings
+from django.db import connection, models
+from django.db.models import Q
+from reviews.management.bulk import batched
+from reviews.models import (CHANGE_CATEGORY, CHANGE_GENRE, SEARCH_COMMENT,
+                            SEARCH_REVIEW, SEARCH_TITLE, Category, Change,
+                            Comment, Genre, GenreTitle, Review, Title)
+
+CHANGE_KIND_BY_MODEL = {
+    Title: SEARCH_TITLE,
+    Review: SEARCH_REVIEW,
+    Comment: SEARCH_COMMENT,
+    Category: CHANGE_CATEGORY,
+    Genre: CHANGE_GENRE,
+}
+# Модели, изменение которых меняет произведение: рейтинг и жанры.
+TITLE_PART_MODELS = (Review, GenreTitle)
+CURSOR_SEPARATOR = '-'
+FIRST_CURSOR = f'0{CURSOR_SEPARATOR}0'
+CURSOR_REGEX = rf'^\d+{CURSOR_SEPARATOR}\d+$'
+
+
+class TransactionId(models.Func):
+    """Номер текущей транзакции PostgreSQL; выдается при первой записи."""
+
+    function = 'txid_current'
+    output_field = models.BigIntegerField()
+
+
+class SnapshotXmin(models.Func):
+    """
+    Наименьший номер транзакции, которая для снимка запроса еще не
+    завершена: все транзакции с меньшим номером закоммичены или откачены.
+    """
+
+    template = 'txid_snapshot_xmin(txid_current_snapshot())'
+    output_field = models.BigIntegerField()
+
+
+def is_postgresql():
+    return connection.vendor == 'postgresql'
+
+
+def new_change(kind, object_id, deleted=False):
+    """
+    Запись журнала. На PostgreSQL запоминает номер транзакции:
+    id выдаются при вставке, а видны после коммита, поэтому порядок
+    id не совпадает с порядком, в котором записи становятся видны.
+    """
+    return Change(
+        kind=kind, object_id=object_id, deleted=deleted,
+        xid=TransactionId() if is_postgresql() else None)
+
+
+def title_changes(title_ids):
+    return [new_change(SEARCH_TITLE, pk) for pk in title_ids]
+
+
+def object_changes(instance, deleted=False):
+    """Записи журнала для объекта и, если он часть произведения, для него."""
+    model = type(instance)
+    changes = []
+    # pk пуст после bulk_create без явных id вне PostgreSQL.
+    if model in CHANGE_KIND_BY_MODEL and instance.pk is not None:
+        changes.append(new_change(
+            CHANGE_KIND_BY_MODEL[model], instance.pk, deleted))
+    if model in TITLE_PART_MODELS:
+        changes += title_changes([instance.title_id])
+    return changes
+
+
+def record_changes(changes):
+    """
+    Добавляет записи в журнал одной вставкой. Повторы одного объекта
+    сливаются в последнюю запись.
+    """
+    unique = {(change.kind, change.object_id): change for change in changes}
+    Change.objects.bulk_create(
+        unique.values(), batch_size=settings.BULK_BATCH_SIZE)
+
+
+def record_objects(objects, deleted=False):
+    """Журнал для объектов, вставленных или удаленных без сигналов."""
+    record_changes(chain.from_iterable(
+        object_changes(instance, deleted) for instance in objects))
+
+
+def record_tables(models, batch_size, deleted=False):
+    """
+    Изменение или удаление всех строк моделей (пересчет рейтингов,
+    TRUNCATE), пачками по batch_size.
+    """
+    for model in models:
+        kind = CHANGE_KIND_BY_MODEL[model]
+        ids = model.objects.values_list('pk', flat=True).iterator()
+        for batch in batched(ids, batch_size):
+            Change.objects.bulk_create(
+                new_change(kind, pk, deleted) for pk in batch)
+
+
+def format_cursor(xid, pk):
+    return f'{xid}{CURSOR_SEPARATOR}{pk}'
+
+
+def parse_cursor(cursor):
+    """Курсор 'xid-id' (проверен CURSOR_REGEX) в пару чисел."""
+    xid, pk = cursor.split(CURSOR_SEPARATOR)
+    return int(xid), int(pk)
+
+
+def committed_after(xid, pk):
+    """
+    Записи после курсора в порядке видимости. На PostgreSQL - по (xid, id)
+    и только транзакций младше xmin снимка: транзакция, начавшая писать
+    позже, получит номер не меньше xmin, поэтому выданные записи уже
+    не обгонит. Долгая транзакция задерживает журнал, но записи
+    не теряются. SQLite выполняет пишущие транзакции по одной, и порядок
+    id совпадает с порядком коммитов.
+    """
+    if not is_postgresql():
+        return Change.objects.filter(id__gt=pk).order_by('id')
+    return Change.objects.filter(
+        Q(xid__gt=xid) | Q(xid=xid, id__gt=pk),
+        xid__gte=xid, xid__lt=SnapshotXmin(),
+    ).order_by('xid', 'id')
+
+
+def get_changes(cursor=FIRST_CURSOR, limit=None):
+    """
+    Пачка журнала после курсора одним запросом: id изменившихся
+    и удаленных объектов по типам (по последней записи объекта
+    в пачке), курсор следующей пачки и признак, что она уже есть.
+    """
+    limit = limit or settings.CHANGES_BATCH_SIZE
+    rows = list(committed_after(*parse_cursor(cursor)).values_list(
+        'xid', 'id', 'kind', 'object_id', 'deleted')[:limit])
+    latest = {}
+    for _, _, kind, object_id, deleted in rows:
+        latest[kind, object_id] = deleted
+    changed, deleted = {}, {}
+    for (kind, object_id), is_deleted in latest.items():
+        (deleted if is_deleted else changed).setdefault(kind, []).append(
+            object_id)
+    if rows:
+        xid, pk = rows[-1][:2]
+        cursor = format_cursor(xid or 0, pk)
+    return {
+        'cursor': cursor,
+        'more': len(rows) == limit,
+        'changed': changed,
+        'deleted': deleted,
+    }
@@ -0,0 +1,31 @@
+import time
+
+from django.conf import settings
+from django.db import connections
+
+
+def mark_connections_used(**kwargs):
+    """После запроса запоминает, когда соединения использовались."""
+    now = time.monotonic()
+    for connection in connections.all():
+        if connection.connection is not None:
+            connection.last_used_at = now
+
+
+def check_connections(**kwargs):
+    """
+    Проверка постоянных соединений (CONN_MAX_AGE) перед запросом.
+    Соединение, простоявшее дольше DB_HEALTH_CHECK_INTERVAL, проверяется
+    запросом к базе и закрывается, если сервер (PostgreSQL или PgBouncer)
+    его уже разорвал: запрос откроет новое вместо ошибки.
+    """
+    interval = settings.DB_HEALTH_CHECK_INTERVAL
+    if interval is None:
+        return
+    now = time.monotonic()
+    for connection in connections.all():
+        if connection.connection is None or connection.in_atomic_block:
+            continue
+        last_used_at = getattr(connection, 'last_used_at', now)
+        if now - last_used_at >= interval and not connection.is_usable():
+            connection.close()
@@ -0,0 +1,88 @@
+import logging
+
+from django.apps import apps
+from django.db import DatabaseError, connections, transaction
+from reviews.models import SearchDocument, Title
+from reviews.search import get_backend
+
+logger = logging.getLogger(__name__)
+
+TRIGRAM_INDEX_NAME = 'title_name_trgm_idx'
+# TitleFilter.name (icontains) в PostgreSQL превращается в
+# UPPER("name"::text) LIKE UPPER(%s), поэтому индекс строится
+# по тому же выражению. Index в Meta модели выражения не поддерживает.
+CREATE_TRIGRAM_INDEX_SQL = (
+    'CREATE INDEX IF NOT EXISTS {index} ON {table} '
+    'USING gin (UPPER({column}::text) gin_trgm_ops)'
+)
+DROP_INDEX_SQL = 'DROP INDEX IF EXISTS {index}'
+CREATE_TRIGRAM_EXTENSION_SQL = 'CREATE EXTENSION IF NOT EXISTS pg_trgm'
+TRIGRAM_INDEX_ERROR = (
+    'Не удалось создать триграммный индекс {index}: {error}. '
+    'Поиск по названию будет работать без индекса.'
+)
+
+
+def supports_trigram_index(connection):
+    return connection.vendor == 'postgresql'
+
+
+def create_trigram_index(using='default'):
+    """
+    Создает GIN-индекс pg_trgm для поиска произведений по подстроке.
+    Без прав на CREATE EXTENSION индекс пропускается с предупреждением.
+    """
+    connection = connections[using]
+    if not supports_trigram_index(connection):
+        return False
+    quote_name = connection.ops.quote_name
+    try:
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            cursor.execute(CREATE_TRIGRAM_EXTENSION_SQL)
+            cursor.execute(CREATE_TRIGRAM_INDEX_SQL.format(
+                index=quote_name(TRIGRAM_INDEX_NAME),
+                table=quote_name(Title._meta.db_table),
+                column=quote_name(Title._meta.get_field('name').column)
+            ))
+    except DatabaseError as error:
+        logger.warning(TRIGRAM_INDEX_ERROR.format(
+            index=TRIGRAM_INDEX_NAME, error=error))
+        return False
+    return True
+
+
+def drop_index(name, using='default'):
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            DROP_INDEX_SQL.format(index=connection.ops.quote_name(name)))
+
+
+def get_index_names(using='default'):
+    """Имена индексов, которые проект добавляет к таблицам reviews."""
+    names = [
+        index.name
+        for model in apps.get_app_config('reviews').get_models()
+        for index in model._meta.indexes
+    ]
+    if supports_trigram_index(connections[using]):
+        names.append(TRIGRAM_INDEX_NAME)
+    return names
+
+
+def create_search_index(using='default'):
+    """Полнотекстовый индекс поисковых документов (см. reviews.search)."""
+    get_backend(using).create_index(using)
+
+
+def create_indexes_after_migrate(sender, using='default', **kwargs):
+    """
+    Обработчик post_migrate приложения reviews.
+    Индексы создаются только для уже существующих таблиц
+    (например, после migrate reviews zero их нет).
+    """
+    tables = connections[using].introspection.table_names()
+    if Title._meta.db_table in tables:
+        create_trigram_index(using)
+    if SearchDocument._meta.db_table in tables:
+        create_search_index(using)
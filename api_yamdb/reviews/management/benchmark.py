@@ -0,0 +1,336 @@
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import time
+from http.client import HTTPConnection, HTTPException
+from itertools import count, cycle, islice
+
+from api.authentication import get_tokens_for_user
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.db.models import F, Max, Min
+from reviews.management.bulk import next_id
+from reviews.management.commands.seed_db import WORDS
+from reviews.models import PARTNER, Category, Genre, Review, Title, User
+
+# Доля ухудшения p95 или запросов/с, которая считается регрессией
+REGRESSION_THRESHOLD = 0.1
+PERCENTILES = (50, 95, 99)
+START_ERROR = 'Сервер {app} не запустился за {timeout} с.'
+# gunicorn 20.0 не запускается через python -m gunicorn.
+GUNICORN = 'from gunicorn.app.wsgiapp import run; run()'
+HOST = '127.0.0.1'
+START_TIMEOUT = 30
+
+
+def sample_ids(queryset, count, rnd):
+    """
+    Случайные id без ORDER BY random(): первый id не меньше
+    случайного числа из диапазона id таблицы.
+    """
+    bounds = queryset.aggregate(low=Min('pk'), high=Max('pk'))
+    if bounds['low'] is None:
+        return []
+    ids = {
+        queryset.filter(
+            pk__gte=rnd.randint(bounds['low'], bounds['high'])
+        ).order_by('pk').values_list('pk', flat=True).first()
+        for _ in range(count)
+    }
+    return sorted(ids - {None})
+
+
+def percentile(values, percent):
+    """Перцентиль по ближайшему рангу; values отсортированы."""
+    if not values:
+        return None
+    return values[max(math.ceil(len(values) * percent / 100) - 1, 0)]
+
+
+def summarize(latencies, errors, seconds):
+    latencies = sorted(latencies)
+    result = {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': len(latencies) / seconds if seconds else None,
+        'mean': sum(latencies) / len(latencies) if latencies else None,
+    }
+    for percent in PERCENTILES:
+        result[f'p{percent}'] = percentile(latencies, percent)
+    return result
+
+
+def compare(result, baseline, threshold=REGRESSION_THRESHOLD):
+    """
+    Сравнение сценария с базовым запуском.
+    Возвращает изменения p50/p95/p99/rps в долях и признак регрессии.
+    """
+    changes = {}
+    for key in ('p50', 'p95', 'p99', 'rps'):
+        if result.get(key) and baseline.get(key):
+            changes[key] = result[key] / baseline[key] - 1
+    regression = (
+        changes.get('p95', 0) > threshold
+        or changes.get('rps', 0) < -threshold
+    )
+    return changes, regression
+
+
+def get_free_port():
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def http_get(port, path, timeout):
+    """Статус ответа сервера или None при ошибке соединения."""
+    connection = HTTPConnection(HOST, port, timeout=timeout)
+    try:
+        connection.request('GET', path)
+        return connection.getresponse().status
+    except (OSError, HTTPException):
+        return None
+    finally:
+        connection.close()
+
+
+def start_gunicorn(app, port, path, env, *args):
+    """
+    Запуск gunicorn с настройками gunicorn.conf.py и окружением env.
+    Возвращает процесс и время до первого ответа 200 на path.
+    """
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, '-c', GUNICORN, app,
+         '--bind', f'{HOST}:{port}', *args],
+        cwd=settings.BASE_DIR, env={**os.environ, **env},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    while http_get(port, path, 1) != 200:
+        if (server.poll() is not None
+                or time.perf_counter() - started > START_TIMEOUT):
+            server.kill()
+            raise CommandError(
+                START_ERROR.format(app=app, timeout=START_TIMEOUT))
+        time.sleep(0.05)
+    return server, time.perf_counter() - started
+
+
+class Scenario:
+    """
+    Сценарий нагрузки. prepare выполняется в потоке перед замером
+    (внутри транзакции потока, которая откатывается), next_request
+    возвращает метод, адрес, данные и заголовки очередного запроса.
+    Транзакции потоков открыты весь замер, поэтому пишущие сценарии
+    берут только произведения своего потока (own_titles): иначе
+    потоки ждали бы блокировок строк друг друга.
+    """
+
+    name = None
+    expected = (200,)
+    samples = 200
+    # Объектов в одном запросе: объектов/с = запросов/с * objects.
+    objects = 1
+
+    def __init__(self, rnd, worker, workers=1):
+        self.rnd = rnd
+        self.worker = worker
+        self.workers = workers
+        self.prefix = f'bench{next_id(User)}w{worker}x'
+
+    def own_titles(self):
+        """Произведения потока: id по модулю числа потоков."""
+        return Title.objects.annotate(
+            part=F('pk') % self.workers).filter(part=self.worker)
+
+    def prepare(self):
+        pass
+
+    def next_request(self):
+        raise NotImplementedError
+
+
+class TitlesBrowse(Scenario):
+    """Список произведений: страницы и фильтры."""
+
+    name = 'titles-browse'
+
+    def prepare(self):
+        self.title_ids = sample_ids(
+            Title.objects.all(), self.samples, self.rnd)
+        self.years = list(Title.objects.filter(
+            pk__in=self.title_ids).values_list('year', flat=True))
+        self.categories = list(Category.objects.filter(pk__in=sample_ids(
+            Category.objects.all(), self.samples, self.rnd
+        )).values_list('slug', flat=True))
+        self.genres = list(Genre.objects.filter(pk__in=sample_ids(
+            Genre.objects.all(), self.samples, self.rnd
+        )).values_list('slug', flat=True))
+
+    def next_request(self):
+        rnd = self.rnd
+        params = rnd.choice((
+            {'page': rnd.randint(1, 10)},
+            {'year': rnd.choice(self.years)},
+            {'category': rnd.choice(self.categories)},
+            {'genre': rnd.choice(self.genres)},
+            {'name': rnd.choice(WORDS)},
+        ))
+        return 'get', '/api/v1/titles/', params, {}
+
+
+class ReviewsPaging(Scenario):
+    """Страницы отзывов произведений с отзывами."""
+
+    name = 'reviews-paging'
+
+    def prepare(self):
+        titles = Title.objects.filter(review_count__gt=0)
+        self.titles = list(titles.filter(
+            pk__in=sample_ids(titles, self.samples, self.rnd)
+        ).values_list('pk', 'review_count'))
+
+    def next_request(self):
+        title_id, review_count = self.rnd.choice(self.titles)
+        pages = math.ceil(
+            review_count / settings.REST_FRAMEWORK['PAGE_SIZE'])
+        return (
+            'get', f'/api/v1/titles/{title_id}/reviews/',
+            {'page': self.rnd.randint(1, pages)}, {}
+        )
+
+
+class ReviewPost(Scenario):
+    """Новые отзывы случайных пользователей."""
+
+    name = 'review-post'
+    expected = (201,)
+
+    def get_users(self):
+        return list(User.objects.filter(
+            pk__in=sample_ids(User.objects.all(), self.samples, self.rnd)))
+
+    def prepare(self):
+        users = self.get_users()
+        self.tokens = [
+            {'HTTP_AUTHORIZATION':
+                f'Bearer {get_tokens_for_user(user).access_token}'}
+            for user in users
+        ]
+        self.title_ids = sample_ids(
+            self.own_titles(), self.samples, self.rnd)
+        # Произведения, на которые у пользователей еще нет отзыва.
+        reviewed = set(Review.objects.filter(
+            author__in=users, title_id__in=self.title_ids
+        ).values_list('author_id', 'title_id'))
+        self.unreviewed = [
+            (headers, [
+                title_id for title_id in self.rnd.sample(
+                    self.title_ids, len(self.title_ids))
+                if (user.pk, title_id) not in reviewed
+            ])
+            for user, headers in zip(users, self.tokens)
+        ]
+        self.pairs = cycle([
+            (headers, title_id)
+            for headers, title_ids in self.unreviewed
+            for title_id in title_ids
+        ])
+
+    def get_review(self):
+        return {
+            'text': ' '.join(self.rnd.sample(WORDS, 10)),
+            'score': self.rnd.randint(settings.MIN_SCORE, settings.MAX_SCORE)
+        }
+
+    def next_request(self):
+        headers, title_id = next(self.pairs)
+        return (
+            'post', f'/api/v1/titles/{title_id}/reviews/',
+            self.get_review(), headers
+        )
+
+
+class ReviewBulk(ReviewPost):
+    """
+    Те же отзывы пакетами по objects в запросе (/api/v1/bulk/reviews/)
+    от одного партнера: с review-post сравнивается число объектов/с.
+    Авторы партнера новые, когда произведения заканчиваются, поэтому
+    отзывы не повторяются при любом числе запросов.
+    """
+
+    name = 'review-bulk'
+    objects = 50
+
+    def prepare(self):
+        partner = User.objects.create(
+            username=f'{self.prefix}partner',
+            email=f'{self.prefix}partner@example.com', role=PARTNER)
+        self.headers = {
+            'HTTP_AUTHORIZATION':
+                f'Bearer {get_tokens_for_user(partner).access_token}',
+            'content_type': 'application/json',
+        }
+        title_ids = sample_ids(self.own_titles(), self.samples, self.rnd)
+        self.items = (
+            {'title': title_id, 'author': f'author{number}'}
+            for number in count()
+            for title_id in self.rnd.sample(title_ids, len(title_ids))
+        )
+
+    def next_request(self):
+        return 'post', '/api/v1/bulk/reviews/', json.dumps([
+            {**item, **self.get_review()}
+            for item in islice(self.items, self.objects)
+        ]), self.headers
+
+
+class Signup(Scenario):
+    """Регистрация новых пользователей."""
+
+    name = 'signup'
+
+    def prepare(self):
+        self.counter = 0
+
+    def next_request(self):
+        self.counter += 1
+        username = f'{self.prefix}{self.counter}'
+        return 'post', '/api/v1/auth/signup/', {
+            'username': username, 'email': f'{username}@example.com'
+        }, {}
+
+
+class Token(Scenario):
+    """Получение токена по коду подтверждения."""
+
+    name = 'token'
+
+    def prepare(self):
+        users = User.objects.bulk_create(
+            User(
+                username=f'{self.prefix}{number}',
+                email=f'{self.prefix}{number}@example.com',
+                confirmation_code=f'code{number}'
+            )
+            for number in range(self.samples)
+        )
+        self.users = cycle(users)
+
+    def next_request(self):
+        user = next(self.users)
+        return 'post', '/api/v1/auth/token/', {
+            'username': user.username,
+            'confirmation_code': user.confirmation_code
+        }, {}
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in (
+        TitlesBrowse, ReviewsPaging, ReviewPost, ReviewBulk, Signup, Token
+    )
+}
@@ -0,0 +1,61 @@
+from itertools import islice
+
+from django.core.management.color import no_style
+from django.db import connections
+
+
+def batched(iterable, size):
+    """Разбивает поток объектов на списки длиной не больше size."""
+    iterator = iter(iterable)
+    batch = list(islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, size))
+
+
+def insert_objects(objects, batch_size=None, using='default'):
+    """
+    Вставка новых объектов одной модели с заполнением их id.
+    bulk_create в Django 2.2 возвращает id только в PostgreSQL,
+    в остальных базах строки вставляются по одной, как это делает
+    loaddata (raw: без сигналов моделей).
+    """
+    if not objects:
+        return objects
+    if connections[using].features.can_return_ids_from_bulk_insert:
+        return type(objects[0]).objects.using(using).bulk_create(
+            objects, batch_size)
+    for instance in objects:
+        instance.save_base(raw=True, using=using)
+    return objects
+
+
+def reset_sequences(models, using='default'):
+    """
+    Синхронизирует последовательности первичных ключей после вставки
+    строк с явно заданными id (как это делает loaddata).
+    """
+    connection = connections[using]
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    if not statements:
+        return
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def analyze_tables(models, using='default'):
+    """Обновляет статистику планировщика PostgreSQL после массовой вставки."""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    quote_name = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        for model in models:
+            cursor.execute(f'ANALYZE {quote_name(model._meta.db_table)}')
+
+
+def next_id(model):
+    """Следующий свободный первичный ключ модели."""
+    last = model.objects.order_by('-pk').values_list('pk', flat=True).first()
+    return (last or 0) + 1
@@ -0,0 +1,206 @@
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from reviews.management.benchmark import SCENARIOS, compare, summarize
+from reviews.models import Comment, Review, Title, User
+
+HELP_MESSAGE = (
+    'Замер задержек (p50/p95/p99) и запросов/с на сценариях API. '
+    'Запускать на базе, заполненной seed_db; изменения откатываются.'
+)
+EMPTY_DB_ERROR = 'В базе нет произведений с отзывами, запустите seed_db.'
+REGRESSION_ERROR = 'Регрессия производительности: {names}.'
+SQLITE_WORKERS_MESSAGE = (
+    'SQLite не поддерживает параллельную запись, замер в один поток.'
+)
+RESULT_MESSAGE = (
+    '{name:<15} {requests:>6} запр. {rps:>8.1f} запр./с  '
+    '{objects_rps:>9.1f} объектов/с  '
+    'p50 {p50:>7.1f} мс  p95 {p95:>7.1f} мс  p99 {p99:>7.1f} мс  '
+    'ошибок {errors}'
+)
+COMPARE_MESSAGE = (
+    '{name:<15} к базовому: p50 {p50:+.0%}  p95 {p95:+.0%}  '
+    'p99 {p99:+.0%}  запр./с {rps:+.0%}{mark}'
+)
+REGRESSION_MARK = '  РЕГРЕССИЯ'
+BASELINE_MISMATCH_MESSAGE = (
+    'Базовый запуск сделан в других условиях, {key}: {baseline} '
+    '(сейчас {current}).'
+)
+SAVED_MESSAGE = 'Результаты сохранены в {path}.'
+MS = 1000
+
+
+class Command(BaseCommand):
+    """
+    Класс для работы managment комманды.
+    python api_yamdb/manage.py seed_db --scale 100000
+    python api_yamdb/manage.py benchmark --output bench.json
+    python api_yamdb/manage.py benchmark --baseline bench.json
+    """
+
+    help = HELP_MESSAGE
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenario', action='append', choices=SCENARIOS,
+            help='Сценарий (можно несколько), по умолчанию все')
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Запросов на сценарий в каждом потоке')
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument('--workers', type=int, default=1)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Файл для результатов (JSON)')
+        parser.add_argument(
+            '--baseline', help='Результаты прошлого запуска для сравнения')
+        parser.add_argument(
+            '--threshold', type=float, default=0.1,
+            help='Допустимое ухудшение p95 и запросов/с (доля)')
+        parser.add_argument(
+            '--fail-on-regression', action='store_true',
+            help='Завершиться с ошибкой при регрессии')
+
+    def handle(self, *args, **options):
+        if not Title.objects.filter(review_count__gt=0).exists():
+            raise CommandError(EMPTY_DB_ERROR)
+        self.options = options
+        self.workers = options['workers']
+        if self.workers > 1 and connection.vendor == 'sqlite':
+            self.stdout.write(SQLITE_WORKERS_MESSAGE)
+            self.workers = 1
+        # Замеряется API, а не лимиты запросов.
+        with override_settings(REST_FRAMEWORK={
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': dict.fromkeys(
+                settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'])
+        }):
+            scenarios = {
+                name: self.run_scenario(SCENARIOS[name])
+                for name in options['scenario'] or SCENARIOS
+            }
+        result = self.get_result(scenarios)
+        for name, stats in scenarios.items():
+            self.stdout.write(RESULT_MESSAGE.format(
+                name=name, **self.to_ms(stats)))
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(result, file, ensure_ascii=False, indent=2)
+            self.stdout.write(SAVED_MESSAGE.format(path=options['output']))
+        if options['baseline']:
+            self.compare_with_baseline(scenarios)
+
+    def get_result(self, scenarios):
+        return {
+            'created': timezone.now().isoformat(),
+            'vendor': connection.vendor,
+            'dataset': {
+                model.__name__: model.objects.count()
+                for model in (User, Title, Review, Comment)
+            },
+            'options': {
+                key: self.options[key]
+                for key in ('requests', 'warmup', 'seed')
+            },
+            'workers': self.workers,
+            'scenarios': scenarios,
+        }
+
+    def run_scenario(self, scenario_class):
+        for cache in caches.all():
+            cache.clear()
+        if self.workers == 1:
+            # Тот же поток - то же соединение (SQLite в памяти).
+            results = [self.run_worker(scenario_class, 0)]
+        else:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                results = list(executor.map(
+                    lambda worker: self.run_worker(scenario_class, worker),
+                    range(self.workers)
+                ))
+        # Запросы/с - по времени замера, без подготовки сценария.
+        seconds = (
+            max(finished for *_, finished in results)
+            - min(started for _, _, started, _ in results)
+        )
+        stats = summarize(
+            [latency for latencies, *_ in results for latency in latencies],
+            sum(errors for _, errors, *_ in results), seconds
+        )
+        stats['objects_rps'] = (
+            stats['rps'] and stats['rps'] * scenario_class.objects)
+        return stats
+
+    def run_worker(self, scenario_class, worker):
+        """Запросы одного потока; все изменения в базе откатываются."""
+        rnd = random.Random(self.options['seed'] + worker)
+        try:
+            with transaction.atomic():
+                scenario = scenario_class(rnd, worker, self.workers)
+                scenario.prepare()
+                client = APIClient()
+                for _ in range(self.options['warmup']):
+                    self.send(client, scenario)
+                latencies = []
+                errors = 0
+                started_at = time.perf_counter()
+                for _ in range(self.options['requests']):
+                    started = time.perf_counter()
+                    status = self.send(client, scenario)
+                    latencies.append(time.perf_counter() - started)
+                    errors += status not in scenario.expected
+                finished_at = time.perf_counter()
+                transaction.set_rollback(True)
+            return latencies, errors, started_at, finished_at
+        finally:
+            if self.workers > 1:
+                connection.close()
+
+    def send(self, client, scenario):
+        method, url, data, headers = scenario.next_request()
+        return getattr(client, method)(url, data, **headers).status_code
+
+    def compare_with_baseline(self, scenarios):
+        with open(self.options['baseline'], encoding='utf-8') as file:
+            baseline = json.load(file)
+        current = self.get_result({})
+        for key in ('vendor', 'workers', 'dataset'):
+            if baseline.get(key) != current[key]:
+                self.stdout.write(BASELINE_MISMATCH_MESSAGE.format(
+                    key=key, baseline=baseline.get(key), current=current[key]))
+        baseline = baseline['scenarios']
+        regressions = []
+        for name, stats in scenarios.items():
+            if name not in baseline:
+                continue
+            changes, regression = compare(
+                stats, baseline[name], self.options['threshold'])
+            if regression:
+                regressions.append(name)
+            self.stdout.write(COMPARE_MESSAGE.format(
+                name=name, mark=REGRESSION_MARK if regression else '',
+                **{key: changes.get(key, 0)
+                   for key in ('p50', 'p95', 'p99', 'rps')}
+            ))
+        if regressions and self.options['fail_on_regression']:
+            raise CommandError(
+                REGRESSION_ERROR.format(names=', '.join(regressions)))
+
+    @staticmethod
+    def to_ms(stats):
+        return {
+            **stats,
+            **{key: (stats[key] or 0) * MS for key in ('p50', 'p95', 'p99')},
+            'rps': stats['rps'] or 0,
+            'objects_rps': stats['objects_rps'] or 0,
+        }
@@ -0,0 +1,85 @@
+from time import perf_counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from django.test import override_settings
+from rest_framework.test import APIClient
+from reviews.connections import check_connections, mark_connections_used
+from reviews.management.benchmark import summarize
+
+HELP_MESSAGE = (
+    'Цена соединения с базой на запрос: новое соединение на каждый '
+    'запрос (CONN_MAX_AGE=0), постоянное соединение и постоянное '
+    'с проверкой перед каждым запросом'
+)
+RESULT_MESSAGE = (
+    '{mode:<32} p50 {p50:>6.2f} мс  p95 {p95:>6.2f} мс  '
+    'среднее {mean:>6.2f} мс'
+)
+SAVING_MESSAGE = (
+    'Постоянное соединение экономит {saving:.2f} мс на запрос '
+    '({percent:.0%}).'
+)
+URL = '/api/v1/categories/'
+NEW_CONNECTION = 'новое соединение на запрос'
+PERSISTENT = 'постоянное соединение'
+HEALTH_CHECKED = 'постоянное + проверка на запрос'
+MS = 1000
+
+
+class Command(BaseCommand):
+    """
+    Класс для работы managment комманды.
+    python api_yamdb/manage.py benchmark_connections --requests 1000
+    Запросы проходят тот же цикл, что под gunicorn: сигналы начала
+    и конца запроса закрывают или проверяют соединения.
+    """
+
+    help = HELP_MESSAGE
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+
+    def handle(self, *args, **options):
+        results = {
+            NEW_CONNECTION: self.measure(options['requests'], 0, None),
+            PERSISTENT: self.measure(options['requests'], 600, None),
+            HEALTH_CHECKED: self.measure(options['requests'], 600, 0),
+        }
+        for mode, stats in results.items():
+            self.stdout.write(RESULT_MESSAGE.format(mode=mode, **{
+                key: stats[key] * MS for key in ('p50', 'p95', 'mean')}))
+        saving = results[NEW_CONNECTION]['mean'] - results[PERSISTENT]['mean']
+        self.stdout.write(SAVING_MESSAGE.format(
+            saving=saving * MS,
+            percent=saving / results[NEW_CONNECTION]['mean']))
+
+    def measure(self, requests, conn_max_age, health_check_interval):
+        conn_max_age_before = connection.settings_dict['CONN_MAX_AGE']
+        connection.close()
+        connection.settings_dict['CONN_MAX_AGE'] = conn_max_age
+        client = APIClient()
+        latencies = []
+        try:
+            with override_settings(
+                    DB_HEALTH_CHECK_INTERVAL=health_check_interval):
+                for _ in range(requests + 1):
+                    latencies.append(self.send(client))
+        finally:
+            connection.close()
+            connection.settings_dict['CONN_MAX_AGE'] = conn_max_age_before
+        # Первый запрос открывает соединение во всех режимах.
+        return summarize(latencies[1:], 0, sum(latencies[1:]))
+
+    def send(self, client):
+        # Кэш ответов сбрасывается: замеряется запрос к базе.
+        caches[settings.API_CACHE_ALIAS].clear()
+        started = perf_counter()
+        close_old_connections()
+        check_connections()
+        client.get(URL)
+        mark_connections_used()
+        close_old_connections()
+        return perf_counter() - started
@@ -0,0 +1,173 @@
+import json
+import random
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from reviews.management.benchmark import (HOST, get_free_port, http_get,
+                                          sample_ids, start_gunicorn,
+                                          summarize)
+from reviews.models import Review, Title
+
+HELP_MESSAGE = (
+    'Сравнение режимов сервера: gunicorn с воркерами WSGI (sync/gthread) '
+    'и с воркерами uvicorn (ASGI) на списках категорий, жанров, '
+    'произведений, отзывов и комментариев при медленных клиентах.'
+)
+EMPTY_DB_ERROR = 'В базе нет отзывов с комментариями, запустите seed_db.'
+RESULT_MESSAGE = (
+    '{mode:<5} {requests:>6} запр. {rps:>8.1f} запр./с  '
+    'p50 {p50:>8.1f} мс  p95 {p95:>8.1f} мс  p99 {p99:>8.1f} мс  '
+    'ошибок {errors}'
+)
+SAVED_MESSAGE = 'Результаты сохранены в {path}.'
+# Класс воркера выбирает gunicorn.conf.py по SERVER_MODE.
+MODES = ('wsgi', 'asgi')
+MS = 1000
+
+
+def slow_client(port, path, delay, stop):
+    """
+    Клиент медленной сети: заголовки запроса приходят частями
+    с паузой delay секунд.
+    """
+    while not stop.is_set():
+        try:
+            with socket.create_connection((HOST, port), timeout=60) as sock:
+                sock.sendall(
+                    f'GET {path} HTTP/1.1\r\nHost: {HOST}\r\n'.encode())
+                stop.wait(delay)
+                sock.sendall(b'Connection: close\r\n\r\n')
+                while sock.recv(65536):
+                    pass
+        except OSError:
+            stop.wait(delay)
+
+
+class Command(BaseCommand):
+    """
+    Класс для работы managment комманды.
+    python api_yamdb/manage.py benchmark_server --clients 20 --slow-clients 4
+    Сервер запускается отдельным процессом с настройками gunicorn.conf.py
+    и окружения, база должна быть доступна ему (PostgreSQL или файл
+    SQLite).
+    """
+
+    help = HELP_MESSAGE
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--mode', action='append', choices=MODES,
+            help='Режим сервера (можно несколько), по умолчанию оба')
+        parser.add_argument('--workers', type=int, default=1)
+        parser.add_argument(
+            '--threads', type=int, default=8,
+            help='Потоков представлений в воркере (GUNICORN_THREADS)')
+        parser.add_argument('--clients', type=int, default=10)
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='Запросов на каждого клиента')
+        parser.add_argument('--slow-clients', type=int, default=2)
+        parser.add_argument(
+            '--slow-delay', type=float, default=1,
+            help='Пауза медленного клиента посреди запроса, с')
+        parser.add_argument(
+            '--timeout', type=float, default=30,
+            help='Таймаут запроса клиента, с')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Файл для результатов (JSON)')
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.paths = self.get_paths(random.Random(options['seed']))
+        results = {
+            mode: self.run_mode(mode)
+            for mode in options['mode'] or MODES
+        }
+        for mode, stats in results.items():
+            self.stdout.write(RESULT_MESSAGE.format(mode=mode, **{
+                **stats,
+                **{key: (stats[key] or 0) * MS
+                   for key in ('p50', 'p95', 'p99')},
+                'rps': stats['rps'] or 0,
+            }))
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump({
+                    'options': {
+                        key: options[key] for key in (
+                            'workers', 'threads', 'clients', 'requests',
+                            'slow_clients', 'slow_delay', 'seed')
+                    },
+                    'modes': results,
+                }, file, ensure_ascii=False, indent=2)
+            self.stdout.write(SAVED_MESSAGE.format(path=options['output']))
+
+    @staticmethod
+    def get_paths(rnd):
+        reviews = Review.objects.filter(comments__isnull=False).distinct()
+        review_ids = sample_ids(reviews, 20, rnd)
+        if not review_ids:
+            raise CommandError(EMPTY_DB_ERROR)
+        paths = ['/api/v1/categories/', '/api/v1/genres/']
+        paths.extend(
+            f'/api/v1/titles/?page={page}' for page in range(1, 6))
+        paths.extend(
+            f'/api/v1/titles/{title_id}/reviews/'
+            for title_id in sample_ids(
+                Title.objects.filter(review_count__gt=0), 20, rnd)
+        )
+        paths.extend(
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+            for review_id, title_id in Review.objects.filter(
+                pk__in=review_ids).values_list('pk', 'title_id')
+        )
+        return paths
+
+    def run_mode(self, mode):
+        port = get_free_port()
+        server, _ = start_gunicorn(
+            f'api_yamdb.{mode}:application', port, self.paths[0], {
+                'SERVER_MODE': mode,
+                'GUNICORN_THREADS': str(self.options['threads']),
+            }, '--workers', str(self.options['workers']))
+        stop = threading.Event()
+        slow_clients = [
+            threading.Thread(target=slow_client, args=(
+                port, self.paths[0], self.options['slow_delay'], stop))
+            for _ in range(self.options['slow_clients'])
+        ]
+        try:
+            for thread in slow_clients:
+                thread.start()
+            started = time.perf_counter()
+            with ThreadPoolExecutor(self.options['clients']) as executor:
+                results = list(executor.map(
+                    lambda client: self.run_client(port, client),
+                    range(self.options['clients'])
+                ))
+            seconds = time.perf_counter() - started
+        finally:
+            stop.set()
+            for thread in slow_clients:
+                thread.join()
+            server.terminate()
+            server.wait()
+        return summarize(
+            [latency for latencies, _ in results for latency in latencies],
+            sum(errors for _, errors in results), seconds
+        )
+
+    def run_client(self, port, client):
+        rnd = random.Random(self.options['seed'] + client)
+        latencies = []
+        errors = 0
+        for _ in range(self.options['requests']):
+            started = time.perf_counter()
+            status = http_get(
+                port, rnd.choice(self.paths), self.options['timeout'])
+            latencies.append(time.perf_counter() - started)
+            errors += status != 200
+        return latencies, errors
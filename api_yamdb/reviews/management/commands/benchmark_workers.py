@@ -0,0 +1,139 @@
+import json
+import re
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from reviews.management.benchmark import (get_free_port, http_get,
+                                          start_gunicorn)
+
+HELP_MESSAGE = (
+    'Время запуска gunicorn и память на воркер с загрузкой приложения '
+    'в мастере (preload) и без нее. Только Linux (/proc).'
+)
+PROC_ERROR = 'Нет /proc/self/smaps_rollup, замер памяти только в Linux.'
+RESULT_MESSAGE = (
+    '{mode:<10} запуск {startup:>5.2f} с (воркер {boot:>5.2f} с)  '
+    'на воркер: RSS {rss:>6.1f} МБ  PSS {pss:>6.1f} МБ  '
+    'своя {private:>6.1f} МБ  всего PSS {total:>6.1f} МБ'
+)
+SAVED_MESSAGE = 'Результаты сохранены в {path}.'
+URL = '/api/v1/categories/'
+MODES = {'preload': 'True', 'no-preload': 'False'}
+SMAPS_FIELDS = {
+    'Rss': 'rss', 'Pss': 'pss',
+    'Private_Clean': 'private', 'Private_Dirty': 'private',
+}
+# Строка лога хука post_worker_init (api.workers.WORKER_READY_MESSAGE).
+WORKER_READY = re.compile(r'Воркер (\d+) готов за ([\d.]+) с')
+WORKERS_TIMEOUT = 30
+SECONDS = ('startup', 'boot')
+KB = 1024
+MB = 1024 * 1024
+
+
+def get_children(pid):
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as children:
+            return [int(child) for child in children.read().split()]
+    except OSError:
+        return []
+
+
+def get_memory(pid):
+    """
+    RSS, PSS (общие страницы делятся между процессами) и собственная
+    память процесса в байтах.
+    """
+    memory = {'rss': 0, 'pss': 0, 'private': 0}
+    with open(f'/proc/{pid}/smaps_rollup') as smaps:
+        for line in smaps:
+            name, _, value = line.partition(':')
+            if name in SMAPS_FIELDS:
+                memory[SMAPS_FIELDS[name]] += int(value.split()[0]) * KB
+    return memory
+
+
+class Command(BaseCommand):
+    """
+    Класс для работы managment комманды.
+    python api_yamdb/manage.py benchmark_workers --workers 4
+    Запуск - до готовности всех воркеров и первого ответа, память
+    замеряется после --requests запросов к серверу.
+    """
+
+    help = HELP_MESSAGE
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--requests', type=int, default=100)
+        parser.add_argument('--output', help='Файл для результатов (JSON)')
+
+    def handle(self, *args, **options):
+        try:
+            get_memory('self')
+        except OSError:
+            raise CommandError(PROC_ERROR)
+        self.options = options
+        results = {
+            mode: self.measure(preload) for mode, preload in MODES.items()
+        }
+        for mode, stats in results.items():
+            self.stdout.write(RESULT_MESSAGE.format(mode=mode, **{
+                key: value if key in SECONDS else value / MB
+                for key, value in stats.items()
+            }))
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump({
+                    'workers': options['workers'], 'modes': results
+                }, file, ensure_ascii=False, indent=2)
+            self.stdout.write(SAVED_MESSAGE.format(path=options['output']))
+
+    def measure(self, preload):
+        port = get_free_port()
+        with tempfile.NamedTemporaryFile('r', encoding='utf-8') as log:
+            server, startup = start_gunicorn(
+                'api_yamdb.wsgi:application', port, URL, {
+                    'SERVER_MODE': 'wsgi',
+                    'GUNICORN_PRELOAD': preload,
+                    'GUNICORN_MAX_REQUESTS': '0',
+                }, '--workers', str(self.options['workers']),
+                '--log-file', log.name)
+            try:
+                result = self.measure_server(server, port, log, startup)
+            finally:
+                server.terminate()
+                server.wait()
+        return result
+
+    def measure_server(self, server, port, log, startup):
+        startup, boot = self.wait_for_workers(log, startup)
+        for _ in range(self.options['requests']):
+            http_get(port, URL, 10)
+        workers = [get_memory(pid) for pid in get_children(server.pid)]
+        master = get_memory(server.pid)
+        result = {'startup': startup, 'boot': boot}
+        for key in ('rss', 'pss', 'private'):
+            result[key] = sum(memory[key] for memory in workers) / len(
+                workers)
+        result['total'] = master['pss'] + sum(
+            memory['pss'] for memory in workers)
+        return result
+
+    def wait_for_workers(self, log, startup):
+        """
+        Время до готовности всех воркеров (не только первого ответа)
+        и среднее время загрузки воркера по логу gunicorn.
+        """
+        started = time.perf_counter() - startup
+        text = ''
+        boot = {}
+        while len(boot) < self.options['workers']:
+            if time.perf_counter() - started > WORKERS_TIMEOUT:
+                break
+            text += log.read()
+            boot = dict(WORKER_READY.findall(text))
+            time.sleep(0.05)
+        startup = max(startup, time.perf_counter() - started)
+        return startup, sum(map(float, boot.values())) / max(len(boot), 1)
@@ -0,0 +1,80 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from reviews.indexes import drop_index, get_index_names
+from reviews.models import Comment, GenreTitle, Review, Title
+
+HELP_MESSAGE = (
+    'Планы выполнения основных запросов API. С --compare планы строятся '
+    'дважды: без индексов проекта (удаляются в откатываемой транзакции) '
+    'и с ними. Запускать на копии базы, заполненной seed_db.'
+)
+EMPTY_DB_ERROR = 'В базе нет отзывов с комментариями, запустите seed_db.'
+HEADER = '=== {title} ==='
+QUERY_HEADER = '--- {name} ---'
+WITHOUT_INDEXES = 'Без индексов'
+WITH_INDEXES = 'С индексами'
+
+
+class Command(BaseCommand):
+    """
+    Класс для работы managment комманды.
+    python api_yamdb/manage.py explain_queries --compare --analyze
+    """
+
+    help = HELP_MESSAGE
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--compare', action='store_true',
+            help='Показать также планы без индексов')
+        parser.add_argument(
+            '--analyze', action='store_true',
+            help='EXPLAIN ANALYZE (только PostgreSQL)')
+
+    def handle(self, *args, **options):
+        self.analyze = (
+            options['analyze'] and connection.vendor == 'postgresql')
+        queries = self.get_queries()
+        if options['compare']:
+            with transaction.atomic():
+                for name in get_index_names():
+                    drop_index(name)
+                self.explain(WITHOUT_INDEXES, queries)
+                transaction.set_rollback(True)
+        self.explain(WITH_INDEXES, queries)
+
+    def get_queries(self):
+        """Запросы, которые выполняют списки API на реальных данных."""
+        comment = Comment.objects.select_related(
+            'review__title__category').order_by('?').first()
+        if comment is None:
+            raise CommandError(EMPTY_DB_ERROR)
+        title = comment.review.title
+        genre_title = GenreTitle.objects.filter(title=title).first()
+        page = settings.REST_FRAMEWORK['PAGE_SIZE']
+        titles = Title.objects.select_related('category').order_by('name')
+        return {
+            'titles-list year': titles.filter(year=title.year)[:page],
+            'titles-list category': titles.filter(
+                category__slug=title.category.slug)[:page],
+            'titles-list genre': titles.filter(
+                genre__slug=genre_title.genre.slug)[:page],
+            'titles-list name': titles.filter(
+                name__icontains=title.name[1:-1])[:page],
+            'reviews-list': Review.objects.filter(
+                title=title).order_by('-pub_date', '-id')[:page],
+            'comments-list': Comment.objects.filter(
+                review=comment.review).order_by('-pub_date', '-id')[:page],
+            'genre-title lookup': GenreTitle.objects.filter(
+                title=title, genre=genre_title.genre),
+        }
+
+    def explain(self, title, queries):
+        self.stdout.write(HEADER.format(title=title))
+        for name, queryset in queries.items():
+            self.stdout.write(QUERY_HEADER.format(name=name))
+            if self.analyze:
+                self.stdout.write(queryset.explain(analyze=True))
+            else:
+                self.stdout.write(queryset.explain())
@@ -0,0 +1,160 @@
+import csv
+import gzip
+import json
+import os
+import time
+from collections import namedtuple
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from reviews.management.commands.import_into_db import (CATEGORY_FILE,
+                                                        COMMENT_FILE,
+                                                        GENRE_FILE,
+                                                        GENRE_TITLE_FILE,
+                                                        REVIEW_FILE,
+                                                        TITLE_FILE, USER_FILE)
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, User)
+
+HELP_MESSAGE = (
+    'Потоковая выгрузка базы в csv/jsonl файлы в формате import_into_db'
+)
+START_MESSAGE = 'Начинаем выгрузку в {path}...'
+STOP_MESSAGE = 'Выгрузка закончена...'
+EXPORT_MESSAGE = (
+    'Набор данных {data}: {rows} строк за {seconds:.1f} с '
+    '({rate:.0f} строк/с) -> {file}'
+)
+CSV = 'csv'
+JSONL = 'jsonl'
+CHUNK_SIZE = 2000
+
+# header - заголовки столбцов, как их читает import_into_db;
+# fields - соответствующие поля модели.
+Export = namedtuple('Export', ('name', 'file', 'model', 'header', 'fields'))
+
+EXPORTS = (
+    Export(
+        'users', USER_FILE, User,
+        ('id', 'username', 'email', 'role', 'bio', 'first_name',
+         'last_name'),
+        ('id', 'username', 'email', 'role', 'bio', 'first_name',
+         'last_name')),
+    Export(
+        'categories', CATEGORY_FILE, Category,
+        ('id', 'name', 'slug'), ('id', 'name', 'slug')),
+    Export(
+        'genres', GENRE_FILE, Genre,
+        ('id', 'name', 'slug'), ('id', 'name', 'slug')),
+    Export(
+        'titles', TITLE_FILE, Title,
+        ('id', 'name', 'year', 'category'),
+        ('id', 'name', 'year', 'category_id')),
+    Export(
+        'genre_title', GENRE_TITLE_FILE, GenreTitle,
+        ('id', 'title_id', 'genre_id'), ('id', 'title_id', 'genre_id')),
+    Export(
+        'reviews', REVIEW_FILE, Review,
+        ('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+        ('id', 'title_id', 'text', 'author_id', 'score', 'pub_date')),
+    Export(
+        'comments', COMMENT_FILE, Comment,
+        ('id', 'review_id', 'text', 'author', 'pub_date'),
+        ('id', 'review_id', 'text', 'author_id', 'pub_date')),
+)
+
+
+def to_text(value):
+    """Значение поля в том виде, в котором его ожидает импорт."""
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def open_output(path, gzipped):
+    if gzipped:
+        return gzip.open(path, 'wt', encoding='utf-8', newline='')
+    return open(path, 'w', encoding='utf-8', newline='')
+
+
+def write_csv(file, header, rows):
+    writer = csv.writer(file)
+    writer.writerow(header)
+    for row in rows:
+        writer.writerow([to_text(value) for value in row])
+        yield
+
+
+def write_jsonl(file, header, rows):
+    for row in rows:
+        file.write(json.dumps(
+            dict(zip(header, map(to_text, row))), ensure_ascii=False))
+        file.write('\n')
+        yield
+
+
+WRITERS = {CSV: write_csv, JSONL: write_jsonl}
+
+
+class Command(BaseCommand):
+    """
+    Класс для работы managment комманды.
+    python api_yamdb/manage.py export_from_db --path export/
+    [--format jsonl] [--gzip]
+    """
+
+    help = HELP_MESSAGE
+
+    def add_arguments(self, parser):
+        # Без значения по умолчанию: выгрузка не должна затирать
+        # исходные csv файлы import_into_db.
+        parser.add_argument(
+            '--path', required=True,
+            help='Каталог для файлов выгрузки')
+        parser.add_argument(
+            '--format', choices=tuple(WRITERS), default=CSV)
+        parser.add_argument(
+            '--gzip', action='store_true', help='Сжимать файлы gzip')
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE,
+            help='Строк, читаемых из курсора за раз')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        os.makedirs(path, exist_ok=True)
+        self.stdout.write(START_MESSAGE.format(path=path))
+        # Все таблицы читаются из одного снимка базы.
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        'SET TRANSACTION ISOLATION LEVEL REPEATABLE READ '
+                        'READ ONLY'
+                    )
+            for export in EXPORTS:
+                self.export(export, path, options)
+        self.stdout.write(STOP_MESSAGE)
+
+    def export(self, export, path, options):
+        """
+        Выгрузка одной таблицы. iterator() читает строки
+        серверным курсором порциями chunk_size, не загружая таблицу.
+        """
+        name, _ = os.path.splitext(export.file)
+        file_name = os.path.join(path, f'{name}.{options["format"]}')
+        if options['gzip']:
+            file_name += '.gz'
+        rows = export.model.objects.order_by('pk').values_list(
+            *export.fields).iterator(chunk_size=options['chunk_size'])
+        started = time.monotonic()
+        count = 0
+        with open_output(file_name, options['gzip']) as file:
+            for _ in WRITERS[options['format']](file, export.header, rows):
+                count += 1
+        seconds = time.monotonic() - started
+        self.stdout.write(EXPORT_MESSAGE.format(
+            data=export.name, rows=count, seconds=seconds,
+            rate=count / seconds if seconds else count, file=file_name
+        ))
@@ -1,109 +1,235 @@
 import csv
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
 
 from django.core.management.base import BaseCommand
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from reviews.changes import CHANGE_KIND_BY_MODEL, record_objects, record_tables
+from reviews.management.bulk import (analyze_tables, batched, next_id,
+                                     reset_sequences)
 from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
-                            Title, User)
+                            SearchDocument, Title, User)
+from reviews.ratings import rebuild_ratings
+from reviews.search import rebuild_search_index
+from reviews.signals import bulk_data_changed
 
 HELP_MESSAGE = 'Импорт данных из static/data/*.csv'
 START_MESSAGE = 'Начинаем импорт...'
 STOP_MESSAGE = 'Импорт закончен...'
 IMPORT_ERROR = 'Что-то пошло не так: {error}.'
-IMPORT_MESSAGE = 'Обрабатывается набор данных: {data}'
+IMPORT_MESSAGE = (
+    'Набор данных {data}: {rows} строк за {seconds:.1f} с '
+    '({rate:.0f} строк/с), пропущено {skipped}.'
+)
+PROGRESS_MESSAGE = '\r{data}: {percent:3.0f}% {rows} строк, {rate:.0f} строк/с'
+TRUNCATE_MESSAGE = 'Таблицы очищены.'
+FINISH_MESSAGE = 'Рейтинги, поисковый индекс и статистика обновлены.'
+STAGE_MESSAGE = 'Этап {stage}: {seconds:.1f} с.'
+TOTAL_MESSAGE = 'Всего: {seconds:.1f} с, потоков: {workers}.'
+SQLITE_WORKERS_MESSAGE = (
+    'SQLite не поддерживает параллельную запись, импорт в один поток.'
+)
 PATH_TO_CSV_FILES = 'api_yamdb/static/data/'
-CATEGORY_FILE = f'{PATH_TO_CSV_FILES}category.csv'
-COMMENT_FILE = f'{PATH_TO_CSV_FILES}comments.csv'
-GENRE_TITLE_FILE = f'{PATH_TO_CSV_FILES}genre_title.csv'
-GENRE_FILE = f'{PATH_TO_CSV_FILES}genre.csv'
-REVIEW_FILE = f'{PATH_TO_CSV_FILES}review.csv'
-TITLE_FILE = f'{PATH_TO_CSV_FILES}titles.csv'
-USER_FILE = f'{PATH_TO_CSV_FILES}users.csv'
+CATEGORY_FILE = 'category.csv'
+COMMENT_FILE = 'comments.csv'
+GENRE_TITLE_FILE = 'genre_title.csv'
+GENRE_FILE = 'genre.csv'
+REVIEW_FILE = 'review.csv'
+TITLE_FILE = 'titles.csv'
+USER_FILE = 'users.csv'
+BATCH_SIZE = 5000
 
+# name - имя набора данных, он же ключ карты id;
+# key - поле естественного ключа: при конфликте строка не вставляется,
+# а ее id из файла сопоставляется с id уже существующей записи;
+# fields - поля, по которым для наборов без key строка узнается в базе:
+# запись с id строки и другими значениями полей - чужая;
+# mapped - нужна ли карта id (на модель ссылаются другие наборы);
+# depends - наборы, которые должны быть загружены раньше (ребра DAG).
+Dataset = namedtuple(
+    'Dataset',
+    ('name', 'file', 'model', 'build', 'key', 'fields', 'mapped', 'depends')
+)
 
-def import_to_user(row):
-    """Импорт информации из csv файла в модель User."""
+
+def map_id(id_map, value):
+    """id записи в базе по id из файла, None - если записи нет."""
+    return id_map.get(int(value)) if value else None
+
+
+def build_user(row, id_maps):
+    """Строка csv файла -> объект модели User."""
     id, username, email, role, bio, first_name, last_name = row
-    User.objects.get_or_create(
-        username=username, email=email, role=role, bio=bio,
+    return User(
+        id=id, username=username, email=email, role=role, bio=bio,
         first_name=first_name, last_name=last_name
     )
 
 
-def import_to_category(row):
-    """Импорт информации из csv файла в модель Category."""
+def build_category(row, id_maps):
+    """Строка csv файла -> объект модели Category."""
     id, name, slug = row
-    Category.objects.get_or_create(id=id, name=name, slug=slug)
+    return Category(id=id, name=name, slug=slug)
 
 
-def import_to_genre(row):
-    """Импорт информации из csv файла в модель Genre."""
+def build_genre(row, id_maps):
+    """Строка csv файла -> объект модели Genre."""
     id, name, slug = row
-    Genre.objects.get_or_create(id=id, name=name, slug=slug)
+    return Genre(id=id, name=name, slug=slug)
 
 
-def import_to_title(row):
-    """Импорт информации из csv файла в модель Title."""
+def build_title(row, id_maps):
+    """Строка csv файла -> объект модели Title."""
     id, name, year, category_id = row
-    category = Category.objects.get(id=category_id)
-    Title.objects.get_or_create(id=id, name=name, year=year, category=category)
+    return Title(
+        id=id, name=name, year=year,
+        category_id=map_id(id_maps['categories'], category_id)
+    )
 
 
-def import_to_genre_title(row):
-    """Импорт информации из csv файла в модель GenreTitle."""
+def build_genre_title(row, id_maps):
+    """Строка csv файла -> объект модели GenreTitle."""
     id, title_id, genre_id = row
-    GenreTitle.objects.get_or_create(
-        id=id, title_id=title_id, genre_id=genre_id)
+    title_id = map_id(id_maps['titles'], title_id)
+    genre_id = map_id(id_maps['genres'], genre_id)
+    if title_id is None or genre_id is None:
+        return None
+    return GenreTitle(id=id, title_id=title_id, genre_id=genre_id)
 
 
-def import_to_review(row):
-    """Импорт информации из csv файла в модель Review."""
+def build_review(row, id_maps):
+    """Строка csv файла -> объект модели Review."""
     id, title_id, text, author_id, score, pub_date = row
-    author = User.objects.get(id=author_id)
-    if not Review.objects.filter(
-        id=id, title_id=title_id, author=author
-    ).exists():
-        review = Review.objects.create(
-            id=id, title_id=title_id, text=text, author=author, score=score)
-        review.save()
-        review.pub_date = pub_date
-        review.save()
-
-
-def import_to_comment(row):
-    """Импорт информации из csv файла в модель Comment."""
+    title_id = map_id(id_maps['titles'], title_id)
+    author_id = map_id(id_maps['users'], author_id)
+    if title_id is None or author_id is None:
+        return None
+    return Review(
+        id=id, title_id=title_id, text=text, author_id=author_id,
+        score=score, pub_date=pub_date
+    )
+
+
+def build_comment(row, id_maps):
+    """Строка csv файла -> объект модели Comment."""
     id, review_id, text, author_id, pub_date = row
-    author = User.objects.get(id=author_id)
-    if not Comment.objects.filter(
-        id=id, review_id=review_id, text=text, author=author
-    ).exists():
-        comment = Comment.objects.create(
-            id=id, review_id=review_id, text=text, author=author)
-        comment.save()
-        comment.pub_date = pub_date
-        comment.save()
-
-
-def import_to_model(csv_file):
-    """Импорт информации из csv файла в модели."""
-    with open(csv_file, encoding='utf-8') as file:
+    review_id = map_id(id_maps['reviews'], review_id)
+    author_id = map_id(id_maps['users'], author_id)
+    if review_id is None or author_id is None:
+        return None
+    return Comment(
+        id=id, review_id=review_id, text=text, author_id=author_id,
+        pub_date=pub_date
+    )
+
+
+DATASETS = (
+    Dataset(
+        'users', USER_FILE, User, build_user, 'username', (), True, ()),
+    Dataset(
+        'categories', CATEGORY_FILE, Category, build_category, 'slug', (),
+        True, ()),
+    Dataset(
+        'genres', GENRE_FILE, Genre, build_genre, 'slug', (), True, ()),
+    Dataset(
+        'titles', TITLE_FILE, Title, build_title, None,
+        ('name', 'year', 'category'), True, ('categories',)),
+    Dataset(
+        'genre_title', GENRE_TITLE_FILE, GenreTitle, build_genre_title,
+        None, ('title', 'genre'), False, ('titles', 'genres')),
+    Dataset(
+        'reviews', REVIEW_FILE, Review, build_review, None,
+        ('title', 'author'), True, ('titles', 'users')),
+    Dataset(
+        'comments', COMMENT_FILE, Comment, build_comment, None,
+        ('review', 'author', 'text'), False, ('reviews', 'users')),
+)
+MODELS = tuple(dataset.model for dataset in DATASETS)
+# Таблицы, которые --truncate очищает целиком; пользователи удаляются
+# отдельно, чтобы сохранить суперпользователей.
+TRUNCATE_MODELS = (
+    Comment, Review, GenreTitle, SearchDocument, Title, Genre, Category)
+
+
+def read_rows(csv_file):
+    """Построчное чтение csv файла без заголовка."""
+    with open(csv_file, encoding='utf-8', newline='') as file:
         reader = csv.reader(file)
         # Пропускаем заголовки
-        next(reader)
+        next(reader, None)
         for row in reader:
-            print(IMPORT_MESSAGE.format(data=row))
-            if csv_file == USER_FILE:
-                import_to_user(row)
-            elif csv_file == CATEGORY_FILE:
-                import_to_category(row)
-            elif csv_file == GENRE_FILE:
-                import_to_genre(row)
-            elif csv_file == TITLE_FILE:
-                import_to_title(row)
-            elif csv_file == GENRE_TITLE_FILE:
-                import_to_genre_title(row)
-            elif csv_file == REVIEW_FILE:
-                import_to_review(row)
-            elif csv_file == COMMENT_FILE:
-                import_to_comment(row)
+            yield file.buffer.tell(), row
+
+
+def resolve_ids(dataset, objects):
+    """
+    Сверяет с базой пачку, вставленную с ignore_conflicts. Возвращает
+    карту id из файла -> id в базе и объекты, записанные в базу под
+    своими id. Строки, не попавшие в базу (id занят другой записью или
+    нарушено другое ограничение уникальности), в карту не добавляются.
+    """
+    model = dataset.model
+    id_map, inserted = {}, []
+    if dataset.key is not None:
+        keys = {getattr(obj, dataset.key): obj for obj in objects}
+        for key, pk in model.objects.filter(
+            **{f'{dataset.key}__in': keys}
+        ).values_list(dataset.key, 'pk'):
+            obj = keys[key]
+            id_map[int(obj.pk)] = pk
+            # С другим id - уже существовавшая запись с тем же ключом.
+            if pk == int(obj.pk):
+                inserted.append(obj)
+        return id_map, inserted
+    fields = [model._meta.get_field(name) for name in dataset.fields]
+    stored = {
+        row[0]: row[1:] for row in model.objects.filter(
+            pk__in=[int(obj.pk) for obj in objects]
+        ).values_list('pk', *(field.attname for field in fields))
+    }
+    for obj in objects:
+        values = tuple(
+            field.to_python(getattr(obj, field.attname)) for field in fields)
+        if stored.get(int(obj.pk)) == values:
+            id_map[int(obj.pk)] = int(obj.pk)
+            inserted.append(obj)
+    return id_map, inserted
+
+
+def insert_moved(dataset, objects):
+    """
+    Вставляет под новыми id строки, чей id из файла занят другой
+    записью базы. Возвращает карту id из файла -> новый id и
+    вставленные объекты.
+    """
+    file_ids = {}
+    first = next_id(dataset.model)
+    for offset, obj in enumerate(objects):
+        file_ids[first + offset] = int(obj.pk)
+        obj.pk = first + offset
+    dataset.model.objects.bulk_create(objects, ignore_conflicts=True)
+    id_map, inserted = resolve_ids(dataset, objects)
+    return {file_ids[new]: pk for new, pk in id_map.items()}, inserted
+
+
+def truncate_tables(batch_size):
+    """
+    Очищает таблицы импорта (TRUNCATE в PostgreSQL). Удаление строк
+    записывается в журнал изменений: TRUNCATE не отправляет сигналов.
+    """
+    tables = [model._meta.db_table for model in TRUNCATE_MODELS]
+    with transaction.atomic(), connection.cursor() as cursor:
+        record_tables([
+            model for model in TRUNCATE_MODELS
+            if model in CHANGE_KIND_BY_MODEL
+        ], batch_size, deleted=True)
+        for sql in connection.ops.sql_flush(no_style(), tables, ()):
+            cursor.execute(sql)
+        User.objects.filter(is_superuser=False).delete()
 
 
 class Command(BaseCommand):
@@ -114,18 +240,160 @@ class Command(BaseCommand):
 
     help = HELP_MESSAGE
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default=PATH_TO_CSV_FILES,
+            help='Каталог с csv файлами')
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Строк в одной транзакции')
+        parser.add_argument(
+            '--truncate', action='store_true',
+            help='Очистить таблицы перед импортом (кроме суперпользователей)')
+        parser.add_argument(
+            '--no-progress', action='store_true',
+            help='Не выводить индикатор выполнения')
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Сколько независимых наборов данных загружать параллельно')
+
     def handle(self, *args, **options):
-        print(START_MESSAGE)
+        self.stdout.write(START_MESSAGE)
+        self.path = options['path']
+        self.batch_size = options['batch_size']
+        workers = options['workers']
+        if workers > 1 and connection.vendor == 'sqlite':
+            self.stdout.write(SQLITE_WORKERS_MESSAGE)
+            workers = 1
+        # Строки прогресса параллельных наборов перемешались бы.
+        self.progress = not options['no_progress'] and workers == 1
+        started = time.monotonic()
         try:
-            import_to_model(USER_FILE)
-            import_to_model(CATEGORY_FILE)
-            import_to_model(GENRE_FILE)
-            import_to_model(TITLE_FILE)
-            import_to_model(GENRE_TITLE_FILE)
-            import_to_model(REVIEW_FILE)
-            import_to_model(COMMENT_FILE)
+            if options['truncate']:
+                truncate_tables(self.batch_size)
+                self.stdout.write(TRUNCATE_MESSAGE)
+            if workers == 1:
+                id_maps = {}
+                for dataset in DATASETS:
+                    id_maps[dataset.name] = self.import_dataset(
+                        dataset, id_maps)
+            else:
+                self.import_in_parallel(workers)
+            self.finish()
+            self.stdout.write(TOTAL_MESSAGE.format(
+                seconds=time.monotonic() - started, workers=workers))
         except Exception as error:
-            print(IMPORT_ERROR.format(error=error))
+            self.stderr.write(IMPORT_ERROR.format(error=error))
+        finally:
+            self.stdout.write(STOP_MESSAGE)
 
+    def import_in_parallel(self, workers):
+        """
+        Загрузка по графу зависимостей: набор запускается, как только
+        загружены все наборы из depends. Каждый поток работает
+        со своим соединением с базой.
+        """
+        id_maps = {}
+        pending = list(DATASETS)
+        running = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while pending or running:
+                for dataset in [
+                    dataset for dataset in pending
+                    if all(name in id_maps for name in dataset.depends)
+                ]:
+                    pending.remove(dataset)
+                    future = executor.submit(
+                        self.import_in_thread, dataset, dict(id_maps))
+                    running[future] = dataset
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    id_maps[running.pop(future).name] = future.result()
+        return id_maps
+
+    def import_in_thread(self, dataset, id_maps):
+        try:
+            return self.import_dataset(dataset, id_maps)
         finally:
-            print(STOP_MESSAGE)
+            connection.close()
+
+    def import_dataset(self, dataset, id_maps):
+        """
+        Потоковый импорт одного csv файла пачками bulk_create.
+        Возвращает карту id для наборов, на которые ссылаются другие.
+        """
+        csv_file = os.path.join(self.path, dataset.file)
+        size = os.path.getsize(csv_file) or 1
+        id_map = {}
+        rows = skipped = 0
+        started = time.monotonic()
+        for batch in batched(read_rows(csv_file), self.batch_size):
+            objects = []
+            for _, row in batch:
+                obj = dataset.build(row, id_maps)
+                if obj is None:
+                    skipped += 1
+                else:
+                    objects.append(obj)
+            ids = self.insert_batch(dataset, objects)
+            skipped += len(objects) - len(ids)
+            if dataset.mapped:
+                id_map.update(ids)
+            rows += len(batch)
+            if self.progress:
+                self.stdout.write(PROGRESS_MESSAGE.format(
+                    data=dataset.name,
+                    percent=100 * batch[-1][0] / size,
+                    rows=rows,
+                    rate=rows / (time.monotonic() - started)
+                ), ending='')
+        seconds = time.monotonic() - started
+        if self.progress:
+            self.stdout.write('')
+        self.stdout.write(IMPORT_MESSAGE.format(
+            data=dataset.name, rows=rows, seconds=seconds,
+            rate=rows / seconds if seconds else rows, skipped=skipped
+        ))
+        return id_map
+
+    def insert_batch(self, dataset, objects):
+        """
+        Вставляет пачку и записывает в журнал изменений в той же
+        транзакции только действительно вставленные строки. Строки,
+        чей id занят другой записью, вставляются под новыми id.
+        Возвращает карту id пачки.
+        """
+        with transaction.atomic():
+            dataset.model.objects.bulk_create(objects, ignore_conflicts=True)
+            ids, inserted = resolve_ids(dataset, objects)
+            lost = [obj for obj in objects if int(obj.pk) not in ids]
+            if lost:
+                moved, moved_inserted = insert_moved(dataset, lost)
+                ids.update(moved)
+                inserted += moved_inserted
+            record_objects(inserted)
+        return ids
+
+    def finish(self):
+        """
+        bulk_create не отправляет сигналы: пересчитываем рейтинги и
+        поисковый индекс, синхронизируем последовательности id.
+        """
+        with self.stage('ratings'), transaction.atomic():
+            rebuild_ratings()
+            # Рейтинг мог измениться у любого произведения.
+            record_tables((Title,), self.batch_size)
+        with self.stage('search'), transaction.atomic():
+            rebuild_search_index(self.batch_size)
+        with self.stage('sequences'):
+            reset_sequences(MODELS + (SearchDocument,))
+            analyze_tables(MODELS + (SearchDocument,))
+        bulk_data_changed.send(sender=self.__class__)
+        self.stdout.write(FINISH_MESSAGE)
+
+    @contextmanager
+    def stage(self, name):
+        started = time.monotonic()
+        yield
+        self.stdout.write(STAGE_MESSAGE.format(
+            stage=name, seconds=time.monotonic() - started))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from reviews.search import rebuild_search_index
+
+HELP_MESSAGE = (
+    'Пересоздание поисковых документов для произведений, отзывов '
+    'и комментариев (после массового импорта)'
+)
+REBUILD_MESSAGE = 'Проиндексировано документов: {count}.'
+
+
+class Command(BaseCommand):
+    """
+    Класс для работы managment комманды.
+    python api_yamdb/manage.py rebuild_search_index
+    """
+
+    help = HELP_MESSAGE
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = rebuild_search_index(options['batch_size'])
+        self.stdout.write(REBUILD_MESSAGE.format(count=count))
@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from reviews.changes import record_tables
+from reviews.models import Title
+from reviews.ratings import (find_rating_mismatches, rebuild_ratings,
+                             title_histogram)
+from reviews.signals import bulk_data_changed
+
+HELP_MESSAGE = (
+    'Пересчет денормализованного рейтинга произведений '
+    '(rating, review_count, score_sum) и гистограммы оценок '
+    '(score_<оценка>_count) по таблице отзывов'
+)
+CHECK_HELP = 'Только проверить рейтинги, ничего не изменяя'
+MISMATCH_MESSAGE = (
+    'Произведение {pk}: сохранено {count}/{total}/{rating}, '
+    'по отзывам {actual_count}/{actual_sum}/{actual_rating}; '
+    'гистограмма {histogram}, по отзывам {actual_histogram}'
+)
+CHECK_OK_MESSAGE = 'Рейтинги всех произведений совпадают с отзывами.'
+CHECK_ERROR_MESSAGE = 'Найдено расхождений: {count}.'
+REBUILD_MESSAGE = 'Пересчитан рейтинг произведений: {count}.'
+
+
+class Command(BaseCommand):
+    """
+    Класс для работы managment комманды.
+    python api_yamdb/manage.py rebuild_title_rating [--check]
+    """
+
+    help = HELP_MESSAGE
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help=CHECK_HELP)
+
+    def handle(self, *args, **options):
+        if options['check']:
+            self.check_ratings()
+        else:
+            with transaction.atomic():
+                count = rebuild_ratings()
+                record_tables((Title,), settings.BULK_BATCH_SIZE)
+            bulk_data_changed.send(sender=self.__class__)
+            self.stdout.write(REBUILD_MESSAGE.format(count=count))
+
+    def check_ratings(self):
+        mismatches = 0
+        for title in find_rating_mismatches().iterator():
+            mismatches += 1
+            self.stdout.write(MISMATCH_MESSAGE.format(
+                pk=title.pk,
+                count=title.review_count,
+                total=title.score_sum,
+                rating=title.rating,
+                actual_count=title.actual_count,
+                actual_sum=title.actual_sum,
+                actual_rating=(
+                    title.actual_rating if title.actual_rating >= 0 else None),
+                histogram=list(title_histogram(title).values()),
+                actual_histogram=list(
+                    title_histogram(title, prefix='actual_').values())
+            ))
+        if mismatches:
+            raise CommandError(CHECK_ERROR_MESSAGE.format(count=mismatches))
+        self.stdout.write(CHECK_OK_MESSAGE)
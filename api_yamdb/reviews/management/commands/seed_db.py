@@ -0,0 +1,183 @@
+import random
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from reviews.changes import record_objects
+from reviews.management.bulk import (analyze_tables, batched, next_id,
+                                     reset_sequences)
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, User)
+from reviews.ratings import rebuild_ratings
+from reviews.signals import bulk_data_changed
+
+HELP_MESSAGE = (
+    'Заполнение базы сгенерированными данными для замеров производительности'
+)
+SEED_MESSAGE = '{model}: добавлено {count} за {seconds:.1f} с.'
+STOP_MESSAGE = 'Готово.'
+WORDS = (
+    'alpha', 'bravo', 'charlie', 'delta', 'echo', 'foxtrot', 'golf',
+    'hotel', 'india', 'juliet', 'kilo', 'lima', 'mike', 'november',
+    'oscar', 'papa', 'quebec', 'romeo', 'sierra', 'tango', 'uniform',
+    'victor', 'whiskey', 'xray', 'yankee', 'zulu',
+)
+MIN_YEAR = 1900
+MAX_YEAR = 2022
+MAX_GENRES_PER_TITLE = 3
+# Строк на произведение при --scale: само произведение, ~2 жанра,
+# до --reviews отзывов и до --comments комментариев на отзыв
+# (в среднем половина максимума), пользователи - 1 на 10 произведений.
+USERS_PER_TITLE = 0.1
+
+
+def random_text(rnd, words):
+    return ' '.join(rnd.choice(WORDS) for _ in range(words))
+
+
+class Command(BaseCommand):
+    """
+    Класс для работы managment комманды.
+    python api_yamdb/manage.py seed_db --titles 100000 --reviews 10
+    python api_yamdb/manage.py seed_db --scale 1000000
+    """
+
+    help = HELP_MESSAGE
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=30)
+        parser.add_argument('--titles', type=int, default=10000)
+        parser.add_argument(
+            '--reviews', type=int, default=5,
+            help='Максимум отзывов на произведение')
+        parser.add_argument(
+            '--comments', type=int, default=2,
+            help='Максимум комментариев на отзыв')
+        parser.add_argument(
+            '--scale', type=int,
+            help='Примерное общее число строк (10000 - 10000000); '
+                 'задает --titles и --users')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options['scale']:
+            self.apply_scale(options)
+        self.rnd = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.prefix = f'seed{next_id(User)}'
+        user_ids = self.seed(User, self.generate_users(options['users']))
+        category_ids = self.seed(
+            Category, self.generate_slugs(Category, options['categories']))
+        genre_ids = self.seed(
+            Genre, self.generate_slugs(Genre, options['genres']))
+        title_ids = self.seed(
+            Title, self.generate_titles(options['titles'], category_ids))
+        self.seed(GenreTitle, self.generate_genre_titles(title_ids, genre_ids))
+        review_ids = self.seed(Review, self.generate_reviews(
+            title_ids, user_ids, options['reviews']))
+        self.seed(Comment, self.generate_comments(
+            review_ids, user_ids, options['comments']))
+        with transaction.atomic():
+            rebuild_ratings(Title.objects.filter(
+                pk__gte=title_ids.start, pk__lt=title_ids.stop))
+        models = (User, Category, Genre, Title, GenreTitle, Review, Comment)
+        reset_sequences(models)
+        analyze_tables(models)
+        bulk_data_changed.send(sender=self.__class__)
+        self.stdout.write(STOP_MESSAGE)
+
+    def apply_scale(self, options):
+        rows_per_title = (
+            1 + (1 + MAX_GENRES_PER_TITLE) / 2 + options['reviews'] / 2
+            * (1 + options['comments'] / 2) + USERS_PER_TITLE
+        )
+        options['titles'] = max(int(options['scale'] / rows_per_title), 1)
+        options['users'] = max(
+            int(options['titles'] * USERS_PER_TITLE), options['reviews'])
+
+    def seed(self, model, objects):
+        """
+        Вставляет объекты пачками. Возвращает диапазон id: генераторы
+        задают id подряд, список id на миллионы строк не хранится.
+        """
+        started = time.monotonic()
+        count = 0
+        ids = range(0)
+        for batch in batched(objects, self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(batch)
+                record_objects(batch)
+            count += len(batch)
+            if batch[0].pk is not None:
+                ids = range(ids.start or batch[0].pk, batch[-1].pk + 1)
+        self.stdout.write(SEED_MESSAGE.format(
+            model=model.__name__, count=count,
+            seconds=time.monotonic() - started
+        ))
+        return ids
+
+    def generate_users(self, count):
+        first_id = next_id(User)
+        for pk in range(first_id, first_id + count):
+            yield User(
+                pk=pk,
+                username=f'{self.prefix}_user{pk}',
+                email=f'{self.prefix}_user{pk}@example.com',
+            )
+
+    def generate_slugs(self, model, count):
+        first_id = next_id(model)
+        for pk in range(first_id, first_id + count):
+            yield model(
+                pk=pk,
+                name=random_text(self.rnd, 2),
+                slug=f'{self.prefix}-{model.__name__.lower()}{pk}'
+            )
+
+    def generate_titles(self, count, category_ids):
+        first_id = next_id(Title)
+        for pk in range(first_id, first_id + count):
+            yield Title(
+                pk=pk,
+                name=random_text(self.rnd, 3),
+                year=self.rnd.randint(MIN_YEAR, MAX_YEAR),
+                description=random_text(self.rnd, 20),
+                category_id=self.rnd.choice(category_ids)
+            )
+
+    def generate_genre_titles(self, title_ids, genre_ids):
+        for title_id in title_ids:
+            genres = self.rnd.sample(genre_ids, min(
+                len(genre_ids),
+                self.rnd.randint(1, MAX_GENRES_PER_TITLE)
+            ))
+            for genre_id in genres:
+                yield GenreTitle(title_id=title_id, genre_id=genre_id)
+
+    def generate_reviews(self, title_ids, user_ids, max_reviews):
+        pk = next_id(Review)
+        for title_id in title_ids:
+            count = self.rnd.randint(0, min(max_reviews, len(user_ids)))
+            for author_id in self.rnd.sample(user_ids, count):
+                yield Review(
+                    pk=pk,
+                    title_id=title_id,
+                    author_id=author_id,
+                    text=random_text(self.rnd, 30),
+                    score=self.rnd.randint(
+                        settings.MIN_SCORE, settings.MAX_SCORE)
+                )
+                pk += 1
+
+    def generate_comments(self, review_ids, user_ids, max_comments):
+        for review_id in review_ids:
+            for _ in range(self.rnd.randint(0, max_comments)):
+                yield Comment(
+                    review_id=review_id,
+                    author_id=self.rnd.choice(user_ids),
+                    text=random_text(self.rnd, 15)
+                )
@@ -0,0 +1,45 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from reviews.outbox import send_pending_emails
+
+HELP_MESSAGE = 'Отправка писем из очереди (подтверждение регистрации и др.)'
+SENT_MESSAGE = 'Отправлено писем: {sent}, не отправлено: {failed}.'
+STOP_MESSAGE = 'Отправка писем остановлена.'
+
+
+class Command(BaseCommand):
+    """
+    Класс для работы managment комманды.
+    python api_yamdb/manage.py send_emails
+    python api_yamdb/manage.py send_emails --once
+    """
+
+    help = HELP_MESSAGE
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.OUTBOX_BATCH_SIZE)
+        parser.add_argument(
+            '--interval', type=float, default=settings.OUTBOX_POLL_INTERVAL,
+            help='Пауза между опросами пустой очереди, с')
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Разобрать очередь и завершиться')
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                sent, failed = send_pending_emails(options['batch_size'])
+                if sent or failed:
+                    self.stdout.write(
+                        SENT_MESSAGE.format(sent=sent, failed=failed))
+                # Полная пачка - в очереди, вероятно, есть еще письма.
+                if sent + failed == options['batch_size']:
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write(STOP_MESSAGE)
@@ -0,0 +1,108 @@
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from api.views import signup
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory
+from reviews.management.bulk import next_id
+from reviews.models import OutgoingEmail, User
+
+HELP_MESSAGE = (
+    'Нагрузочный тест регистрации: параллельные повторные запросы '
+    'с одинаковыми username и email'
+)
+RESULT_MESSAGE = (
+    'Запросов: {requests} за {seconds:.2f} с ({rate:.0f} запросов/с), '
+    'потоков: {workers}.'
+)
+STATUS_MESSAGE = 'Ответов {status}: {count}.'
+USERS_MESSAGE = 'Создано пользователей: {created} из {expected}.'
+SQLITE_WORKERS_MESSAGE = (
+    'SQLite не поддерживает параллельную запись, тест в один поток.'
+)
+SIGNUP_URL = '/api/v1/auth/signup/'
+THROTTLE_SCOPES = ('signup_ip', 'signup_username')
+
+
+class Command(BaseCommand):
+    """
+    Класс для работы managment комманды.
+    python api_yamdb/manage.py signup_load_test --requests 2000 --workers 16
+    Созданные пользователи и письма удаляются после теста.
+    """
+
+    help = HELP_MESSAGE
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument(
+            '--users', type=int, default=10,
+            help='Разных пар username/email, остальные запросы - повторы')
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument(
+            '--keep', action='store_true',
+            help='Не удалять созданных пользователей')
+
+    def handle(self, *args, **options):
+        # Измеряется сама регистрация: лимиты запросов отключены.
+        with override_settings(REST_FRAMEWORK={
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': {
+                **settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'],
+                **dict.fromkeys(THROTTLE_SCOPES)
+            }
+        }):
+            self.run(options)
+
+    def run(self, options):
+        workers = options['workers']
+        if workers > 1 and connection.vendor == 'sqlite':
+            self.stdout.write(SQLITE_WORKERS_MESSAGE)
+            workers = 1
+        self.prefix = f'loadtest{next_id(User)}x'
+        self.users = options['users']
+        started = time.monotonic()
+        if workers == 1:
+            # Тот же поток - то же соединение (SQLite в памяти).
+            statuses = self.run_worker(range(options['requests']))
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                statuses = sum(executor.map(
+                    lambda worker: self.run_worker(
+                        range(worker, options['requests'], workers)),
+                    range(workers)
+                ), Counter())
+        seconds = time.monotonic() - started
+        self.stdout.write(RESULT_MESSAGE.format(
+            requests=options['requests'], seconds=seconds,
+            rate=options['requests'] / seconds, workers=workers))
+        for code, count in sorted(statuses.items()):
+            self.stdout.write(STATUS_MESSAGE.format(status=code, count=count))
+        users = User.objects.filter(username__startswith=self.prefix)
+        self.stdout.write(USERS_MESSAGE.format(
+            created=users.count(),
+            expected=min(self.users, options['requests'])))
+        if not options['keep']:
+            OutgoingEmail.objects.filter(
+                to__in=users.values('email')).delete()
+            users.delete()
+
+    def run_worker(self, numbers):
+        """Запросы одного потока, со своим соединением с базой."""
+        factory = APIRequestFactory()
+        try:
+            return Counter(
+                self.post_signup(factory, number) for number in numbers)
+        finally:
+            if connection.vendor != 'sqlite':
+                connection.close()
+
+    def post_signup(self, factory, number):
+        name = f'{self.prefix}{number % self.users}'
+        return signup(factory.post(
+            SIGNUP_URL, {'username': name, 'email': f'{name}@example.com'}
+        )).status_code
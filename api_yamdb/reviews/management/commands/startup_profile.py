@@ -0,0 +1,135 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+HELP_MESSAGE = (
+    'Холодный старт процесса Django: время запуска, память и модули, '
+    'импорт которых занимает больше всего времени (python -X importtime).'
+)
+CHILD_ERROR = 'Процесс с настройками {module} завершился с ошибкой:\n{error}'
+RESULT_MESSAGE = (
+    '{profile:<5} запуск {seconds:.3f} с (медиана {runs}), загрузка '
+    'приложения {setup:.3f} с, RSS {rss:.1f} МБ, модулей {modules}'
+)
+PACKAGE_MESSAGE = '      {package:<32} {ms:>8.1f} мс'
+COMPARE_MESSAGE = (
+    'api к full: запуск {seconds:+.0%}, загрузка {setup:+.0%}, '
+    'RSS {rss:+.0%}, модулей {modules:+.0%}'
+)
+SAVED_MESSAGE = 'Результаты сохранены в {path}.'
+PROFILES = {
+    'full': 'api_yamdb.settings',
+    'api': 'api_yamdb.settings_api',
+}
+# Процесс загружает приложение, как воркер gunicorn до первого запроса:
+# настройки, приложения, middleware и все модули из urls.
+CHILD = '''
+import json, resource, sys, time
+started = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(json.dumps({
+    'setup': time.perf_counter() - started,
+    'rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+    'modules': len(sys.modules),
+}))
+'''
+IMPORT_TIME_PREFIX = 'import time:'
+MB = 1024 * 1024
+MS = 1000
+
+
+def parse_import_time(output):
+    """
+    Время импорта по пакетам верхнего уровня, мс: сумма собственного
+    времени (self) всех модулей пакета.
+    """
+    packages = Counter()
+    for line in output.splitlines():
+        if not line.startswith(IMPORT_TIME_PREFIX):
+            continue
+        own, _, name = line[len(IMPORT_TIME_PREFIX):].split('|')
+        if own.strip().isdigit():
+            packages[name.strip().split('.')[0]] += int(own) / MS
+    return packages
+
+
+class Command(BaseCommand):
+    """
+    Класс для работы managment комманды.
+    python api_yamdb/manage.py startup_profile
+    python api_yamdb/manage.py startup_profile --profile api --top 30
+    """
+
+    help = HELP_MESSAGE
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--profile', action='append', choices=PROFILES,
+            help='Профиль настроек (можно несколько), по умолчанию оба')
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument(
+            '--top', type=int, default=15,
+            help='Сколько самых долгих пакетов показать')
+        parser.add_argument('--output', help='Файл для результатов (JSON)')
+
+    def handle(self, *args, **options):
+        self.options = options
+        results = {
+            profile: self.measure(PROFILES[profile])
+            for profile in options['profile'] or PROFILES
+        }
+        for profile, result in results.items():
+            self.stdout.write(RESULT_MESSAGE.format(
+                profile=profile, runs=options['runs'],
+                seconds=result['seconds'], setup=result['setup'],
+                rss=result['rss'] / MB, modules=result['modules']))
+            for package, ms in result['packages']:
+                self.stdout.write(PACKAGE_MESSAGE.format(
+                    package=package, ms=ms))
+        if len(results) == len(PROFILES):
+            self.stdout.write(COMPARE_MESSAGE.format(**{
+                key: results['api'][key] / results['full'][key] - 1
+                for key in ('seconds', 'setup', 'rss', 'modules')
+            }))
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(results, file, ensure_ascii=False, indent=2)
+            self.stdout.write(SAVED_MESSAGE.format(path=options['output']))
+
+    def run_child(self, module, *args):
+        started = time.perf_counter()
+        process = subprocess.run(
+            [sys.executable, *args, '-c', CHILD], cwd=settings.BASE_DIR,
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': module},
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            universal_newlines=True
+        )
+        seconds = time.perf_counter() - started
+        if process.returncode:
+            raise CommandError(
+                CHILD_ERROR.format(module=module, error=process.stderr))
+        return seconds, json.loads(process.stdout), process.stderr
+
+    def measure(self, module):
+        runs = [self.run_child(module) for _ in range(self.options['runs'])]
+        # Отдельный запуск: -X importtime сам замедляет импорт.
+        *_, import_time = self.run_child(module, '-X', 'importtime')
+        return {
+            'seconds': statistics.median(seconds for seconds, *_ in runs),
+            'setup': statistics.median(
+                result['setup'] for _, result, _ in runs),
+            'rss': statistics.median(result['rss'] for _, result, _ in runs),
+            'modules': runs[0][1]['modules'],
+            'packages': parse_import_time(import_time).most_common(
+                self.options['top']),
+        }
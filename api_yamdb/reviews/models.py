@@ -2,8 +2,10 @@ import datetime as dt
 
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 
 LENGTH_TEXT = 15
 MAX_LENGTH_TEXT = 256
@@ -11,11 +13,34 @@ MAX_LENGTH_SLUG = 50
 ADMIN = 'admin'
 USER = 'user'
 MODERATOR = 'moderator'
+# Партнерский сайт: выгрузка отзывов (api.export)
+PARTNER = 'partner'
 ROLE = [
     (USER, 'Пользователь'),
     (MODERATOR, 'Модератор'),
+    (PARTNER, 'Партнер'),
     (ADMIN, 'Администратор')
 ]
+# Поля пользователя, копируемые в claims JWT-токена (api.authentication)
+TOKEN_STATE_FIELDS = ('username', 'role', 'is_superuser', 'is_active')
+SEARCH_TITLE = 'title'
+SEARCH_REVIEW = 'review'
+SEARCH_COMMENT = 'comment'
+SEARCH_KINDS = [
+    (SEARCH_TITLE, 'Произведение'),
+    (SEARCH_REVIEW, 'Отзыв'),
+    (SEARCH_COMMENT, 'Комментарий')
+]
+# Оценки отзыва; у произведения на каждую - счетчик гистограммы оценок.
+SCORES = range(settings.MIN_SCORE, settings.MAX_SCORE + 1)
+# Типы объектов журнала изменений (reviews.changes): произведения, отзывы
+# и комментарии называются так же, как в поиске.
+CHANGE_CATEGORY = 'category'
+CHANGE_GENRE = 'genre'
+CHANGE_KINDS = SEARCH_KINDS + [
+    (CHANGE_CATEGORY, 'Категория'),
+    (CHANGE_GENRE, 'Жанр')
+]
 
 
 class User(AbstractUser):
@@ -39,6 +64,22 @@ class User(AbstractUser):
         blank=True,
         max_length=settings.CONFIRMATION_CODE_LENGTH
     )
+    token_version = models.PositiveIntegerField(
+        'Версия токенов',
+        default=0,
+        editable=False
+    )
+    # Автор отзывов партнерского сайта (api.bulk): создается пакетной
+    # загрузкой партнера, кода подтверждения и пароля у него нет.
+    partner = models.ForeignKey(
+        'self',
+        verbose_name='Партнер',
+        on_delete=models.CASCADE,
+        related_name='authors',
+        null=True,
+        blank=True,
+        editable=False
+    )
 
     @property
     def is_admin(self):
@@ -48,12 +89,64 @@ class User(AbstractUser):
     def is_moderator(self):
         return self.role == MODERATOR
 
+    @property
+    def is_partner(self):
+        return self.role == PARTNER
+
     @property
     def is_user(self):
         return self.role == USER
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_token_state()
+        return instance
 
-class CategoryGenreCummonModel(models.Model):
+    def get_token_state(self):
+        return tuple(
+            self.__dict__.get(field) for field in TOKEN_STATE_FIELDS
+        )
+
+    def remember_token_state(self):
+        """
+        Запоминает данные, которые попадают в claims токена,
+        чтобы при их изменении отозвать выданные токены.
+        """
+        self._token_state = self.get_token_state()
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self.remember_token_state()
+
+    def save(self, *args, **kwargs):
+        token_state = getattr(self, '_token_state', None)
+        if token_state is not None and token_state != self.get_token_state():
+            self.token_version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'token_version'}
+        super().save(*args, **kwargs)
+        self.remember_token_state()
+
+
+class AtomicSaveModel(models.Model):
+    """
+    Абстрактная модель.
+    Сохраняет объект в одной транзакции с обработчиками post_save
+    (журнал изменений, поиск, рейтинг). Удаление уже атомарно.
+    """
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        # Без savepoint: внутри внешней транзакции лишних запросов нет.
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+
+
+class CategoryGenreCummonModel(AtomicSaveModel):
     """
     Абстрактная модель.
     Добавляет общие атрибуты для категорий и жанров.
@@ -79,7 +172,7 @@ class CategoryGenreCummonModel(models.Model):
         return f'{self.slug[0:LENGTH_TEXT]} {self.name[0:LENGTH_TEXT]}'
 
 
-class ReviewCommentCummonModel(models.Model):
+class ReviewCommentCummonModel(AtomicSaveModel):
     """
     Абстрактная модель.
     Добавляет общие атрибуты для отзывов и комментариев.
@@ -91,9 +184,11 @@ class ReviewCommentCummonModel(models.Model):
         related_name='%(class)ss',
         verbose_name='Автор',
         help_text='Укажите автора')
+    # default вместо auto_now_add: импорт задает дату публикации из данных.
     pub_date = models.DateTimeField(
         'Дата публикации',
-        auto_now_add=True
+        default=timezone.now,
+        editable=False
     )
     text = models.TextField(
         'Текст',
@@ -128,7 +223,7 @@ class Genre(CategoryGenreCummonModel):
         verbose_name_plural = 'Жанры'
 
 
-class Title(models.Model):
+class Title(AtomicSaveModel):
     """Произведения, к которым пишут отзывы."""
 
     name = models.CharField(
@@ -172,11 +267,38 @@ class Title(models.Model):
         verbose_name='Жанр',
         help_text='Введите жанр, к которому будет относиться произведение'
     )
+    # Денормализованный рейтинг: поддерживается сигналами reviews.signals,
+    # пересчитывается командой rebuild_title_rating. Гистограмма оценок -
+    # поля score_<оценка>_count (add_score_counters).
+    rating = models.IntegerField(
+        'Рейтинг',
+        null=True,
+        blank=True,
+        editable=False
+    )
+    review_count = models.PositiveIntegerField(
+        'Количество отзывов',
+        default=0,
+        editable=False
+    )
+    score_sum = models.PositiveIntegerField(
+        'Сумма оценок',
+        default=0,
+        editable=False
+    )
 
     class Meta:
         verbose_name = 'произведение'
         verbose_name_plural = 'Произведения'
         ordering = ('name',)
+        # Список произведений сортируется по name (курсор - по name, id)
+        # и фильтруется по category и year.
+        indexes = [
+            models.Index(fields=['name', 'id'], name='title_name_id_idx'),
+            models.Index(
+                fields=['category', 'name'], name='title_category_name_idx'),
+            models.Index(fields=['year', 'name'], name='title_year_name_idx'),
+        ]
 
     def __str__(self):
         return (
@@ -186,6 +308,28 @@ class Title(models.Model):
         )
 
 
+def score_count_field(score):
+    """Поле произведения с количеством отзывов с оценкой score."""
+    return f'score_{score}_count'
+
+
+SCORE_COUNT_FIELDS = tuple(score_count_field(score) for score in SCORES)
+
+
+def add_score_counters(model):
+    """
+    Денормализованная гистограмма оценок: по полю на оценку от MIN_SCORE
+    до MAX_SCORE. Поддерживается вместе с рейтингом (reviews.ratings).
+    """
+    for score in SCORES:
+        field = models.PositiveIntegerField(
+            f'Отзывов с оценкой {score}', default=0, editable=False)
+        model.add_to_class(score_count_field(score), field)
+
+
+add_score_counters(Title)
+
+
 class GenreTitle(models.Model):
     """
     Одно произведение может быть привязано к нескольким жанрам.
@@ -209,6 +353,12 @@ class GenreTitle(models.Model):
         verbose_name = "произведению нужные жанры"
         verbose_name_plural = "Произведения и жанры"
         ordering = ('genre',)
+        indexes = [
+            models.Index(
+                fields=['title', 'genre'], name='genretitle_title_genre_idx'),
+            models.Index(
+                fields=['genre', 'title'], name='genretitle_genre_title_idx'),
+        ]
 
     def __str__(self):
         return f'{self.title} {self.genre}'
@@ -244,6 +394,33 @@ class Review(ReviewCommentCummonModel):
             models.UniqueConstraint(
                 fields=['author', 'title'], name='unique_review')
         ]
+        # Отзывы произведения выдаются от новых к старым.
+        indexes = [
+            models.Index(
+                fields=['title', '-pub_date', '-id'],
+                name='review_title_pub_date_idx'
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_rating_state()
+        return instance
+
+    def remember_rating_state(self):
+        """
+        Запоминает произведение и оценку, учтенные в рейтинге,
+        чтобы при сохранении применить к рейтингу только разницу.
+        """
+        self._rating_state = (
+            self.__dict__.get('title_id'), self.__dict__.get('score')
+        )
+
+    def save(self, *args, **kwargs):
+        # Рейтинг произведения обновляется в post_save в той же транзакции.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
 
 class Comment(ReviewCommentCummonModel):
@@ -261,3 +438,123 @@ class Comment(ReviewCommentCummonModel):
     class Meta:
         verbose_name = "комментарий"
         verbose_name_plural = "Комментарии к отзывам"
+        # Комментарии отзыва выдаются от новых к старым.
+        indexes = [
+            models.Index(
+                fields=['review', '-pub_date', '-id'],
+                name='comment_review_pub_date_idx'
+            ),
+        ]
+
+
+class SearchDocument(models.Model):
+    """
+    Поисковый документ: произведение, отзыв или комментарий.
+    Заполняется сигналами reviews.signals, индексируется полнотекстово
+    (PostgreSQL FTS или SQLite FTS5, см. reviews.search).
+    """
+
+    kind = models.CharField(
+        'Тип объекта',
+        choices=SEARCH_KINDS,
+        max_length=7
+    )
+    object_id = models.PositiveIntegerField('ID объекта')
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='search_documents',
+        verbose_name='Произведение'
+    )
+    review = models.ForeignKey(
+        Review,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='search_documents',
+        verbose_name='Отзыв'
+    )
+    heading = models.CharField('Заголовок', max_length=MAX_LENGTH_TEXT)
+    body = models.TextField('Текст', blank=True)
+    vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        verbose_name = 'поисковый документ'
+        verbose_name_plural = 'Поисковые документы'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['kind', 'object_id'], name='unique_search_document')
+        ]
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id} {self.heading[0:LENGTH_TEXT]}'
+
+
+class Change(models.Model):
+    """
+    Журнал изменений каталога: запись добавляется в транзакции,
+    изменившей объект (reviews.changes). Курсор /api/v1/changes/ -
+    пара (xid, id): на PostgreSQL записи выдаются в порядке транзакций
+    и только после завершения всех более ранних.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    kind = models.CharField(
+        'Тип объекта',
+        choices=CHANGE_KINDS,
+        max_length=8
+    )
+    object_id = models.PositiveIntegerField('ID объекта')
+    deleted = models.BooleanField('Удален', default=False)
+    created = models.DateTimeField(
+        'Дата изменения', default=timezone.now, editable=False
+    )
+    # txid_current() транзакции записи; пусто вне PostgreSQL.
+    xid = models.BigIntegerField('Транзакция', null=True, editable=False)
+
+    class Meta:
+        verbose_name = 'изменение'
+        verbose_name_plural = 'Журнал изменений'
+        ordering = ('id',)
+        indexes = [
+            models.Index(fields=['xid', 'id'], name='change_xid_id_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.id} {self.kind} {self.object_id}'
+
+
+class OutgoingEmail(models.Model):
+    """
+    Очередь исходящих писем.
+    Письмо добавляется в транзакции запроса и отправляется командой
+    send_emails (reviews.outbox).
+    """
+
+    subject = models.CharField('Тема', max_length=MAX_LENGTH_TEXT)
+    body = models.TextField('Текст')
+    from_email = models.CharField(
+        'Отправитель', blank=True, max_length=settings.MAX_LENGTH_EMAIL
+    )
+    to = models.EmailField('Получатель', max_length=settings.MAX_LENGTH_EMAIL)
+    created = models.DateTimeField(
+        'Дата создания', default=timezone.now, editable=False
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток отправки', default=0)
+    next_attempt_at = models.DateTimeField(
+        'Следующая попытка', default=timezone.now
+    )
+    sent_at = models.DateTimeField('Дата отправки', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    class Meta:
+        verbose_name = 'исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        ordering = ('next_attempt_at', 'id')
+        indexes = [
+            models.Index(
+                fields=['sent_at', 'next_attempt_at'],
+                name='outgoingemail_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.to} {self.subject[0:LENGTH_TEXT]}'
@@ -0,0 +1,102 @@
+import logging
+from datetime import timedelta
+from smtplib import SMTPException
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.utils import timezone
+from reviews.models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+SEND_EMAIL_ERROR = 'Не удалось отправить письмо на {email}: {error}.'
+GIVE_UP_MESSAGE = 'Письмо {id} на {email} не отправлено за {attempts} попыток.'
+
+
+def enqueue_email(subject, body, to, from_email=None):
+    """Добавляет письмо в очередь. Отправляется после коммита транзакции."""
+    return OutgoingEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.EMAIL_HOST_USER or '',
+        to=to
+    )
+
+
+def get_retry_delay(attempts):
+    """Экспоненциальная задержка перед следующей попыткой."""
+    return timedelta(seconds=min(
+        settings.OUTBOX_RETRY_DELAY * 2 ** (attempts - 1),
+        settings.OUTBOX_MAX_RETRY_DELAY
+    ))
+
+
+def get_pending_emails(batch_size):
+    emails = OutgoingEmail.objects.filter(
+        sent_at__isnull=True,
+        attempts__lt=settings.OUTBOX_MAX_ATTEMPTS,
+        next_attempt_at__lte=timezone.now()
+    ).order_by('next_attempt_at', 'id')
+    if connection.features.has_select_for_update_skip_locked:
+        # Несколько воркеров разбирают разные письма.
+        emails = emails.select_for_update(skip_locked=True)
+    return list(emails[:batch_size])
+
+
+def mark_failed(email, error):
+    email.attempts += 1
+    email.last_error = str(error)
+    email.next_attempt_at = timezone.now() + get_retry_delay(email.attempts)
+    logger.warning(SEND_EMAIL_ERROR.format(email=email.to, error=error))
+    if email.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        logger.error(GIVE_UP_MESSAGE.format(
+            id=email.id, email=email.to, attempts=email.attempts))
+
+
+def mark_sent(email):
+    email.attempts += 1
+    email.sent_at = timezone.now()
+    email.last_error = ''
+
+
+def send_emails(emails):
+    """Отправка писем через одно SMTP-соединение."""
+    if not emails:
+        return
+    mail_connection = get_connection(fail_silently=False)
+    try:
+        mail_connection.open()
+    except (SMTPException, OSError) as error:
+        for email in emails:
+            mark_failed(email, error)
+        return
+    try:
+        for email in emails:
+            try:
+                EmailMessage(
+                    email.subject, email.body, email.from_email or None,
+                    [email.to], connection=mail_connection
+                ).send()
+            except (SMTPException, OSError) as error:
+                mark_failed(email, error)
+            else:
+                mark_sent(email)
+    finally:
+        mail_connection.close()
+
+
+def send_pending_emails(batch_size=None):
+    """
+    Отправляет пачку писем из очереди.
+    Возвращает количество отправленных и неотправленных писем.
+    """
+    with transaction.atomic():
+        emails = get_pending_emails(
+            batch_size or settings.OUTBOX_BATCH_SIZE)
+        send_emails(emails)
+        OutgoingEmail.objects.bulk_update(
+            emails, ['attempts', 'next_attempt_at', 'sent_at', 'last_error']
+        )
+    sent = sum(email.sent_at is not None for email in emails)
+    return sent, len(emails) - sent
@@ -0,0 +1,180 @@
+from collections import Counter, defaultdict
+
+from django.db.models import (Case, Count, F, IntegerField, OuterRef, Subquery,
+                              Sum, Value, When)
+from django.db.models.functions import Coalesce
+from reviews.models import (SCORE_COUNT_FIELDS, SCORES, Review, Title,
+                            score_count_field)
+
+
+def rating_expression(count, total):
+    """Рейтинг произведения: целая часть среднего, NULL без отзывов."""
+    return Case(
+        When(**{count: 0}, then=Value(None)),
+        default=F(total) / F(count),
+        output_field=IntegerField()
+    )
+
+
+def rating_delta(scores):
+    """
+    Поля UPDATE, сдвигающие счетчики рейтинга и гистограммы оценок;
+    scores - {оценка: на сколько изменилось число отзывов с ней}.
+    В правой части UPDATE используются значения до изменения,
+    поэтому рейтинг считается по уже сдвинутым счетчикам.
+    """
+    count_delta = sum(scores.values())
+    count = F('review_count') + count_delta
+    total = F('score_sum') + sum(
+        score * delta for score, delta in scores.items())
+    fields = {
+        'review_count': count,
+        'score_sum': total,
+        'rating': Case(
+            When(review_count=-count_delta, then=Value(None)),
+            default=total / count,
+            output_field=IntegerField()
+        ),
+    }
+    for score, delta in scores.items():
+        if delta:
+            field = score_count_field(score)
+            fields[field] = F(field) + delta
+    return fields
+
+
+def apply_review_delta(title_id, scores):
+    """
+    Инкрементально обновляет рейтинг и гистограмму произведения
+    одним UPDATE.
+    """
+    if not any(scores.values()):
+        return
+    Title.objects.filter(pk=title_id).update(**rating_delta(scores))
+
+
+def apply_new_reviews(reviews):
+    """
+    Учитывает в рейтинге пачку новых отзывов. Произведения с одинаковым
+    сдвигом счетчиков обновляются одним UPDATE: у автора один отзыв
+    на произведение, поэтому UPDATE не больше, чем вариантов оценки.
+    Строки произведений блокируются заранее по возрастанию id, чтобы
+    параллельные пачки не ждали друг друга по кругу.
+    """
+    deltas = defaultdict(Counter)
+    for review in reviews:
+        deltas[review.title_id][int(review.score)] += 1
+    list(Title.objects.select_for_update().filter(
+        pk__in=deltas).order_by('pk').values_list('pk', flat=True))
+    groups = defaultdict(list)
+    for title_id, scores in deltas.items():
+        groups[tuple(sorted(scores.items()))].append(title_id)
+    for scores, title_ids in sorted(groups.items()):
+        Title.objects.filter(pk__in=title_ids).update(
+            **rating_delta(dict(scores)))
+
+
+def actual_rating_subqueries():
+    """Подзапросы с фактическими количеством и суммой оценок."""
+    reviews = Review.objects.filter(
+        title=OuterRef('pk')).order_by().values('title')
+    return (
+        Coalesce(
+            Subquery(reviews.annotate(value=Count('pk')).values('value')),
+            0
+        ),
+        Coalesce(
+            Subquery(reviews.annotate(value=Sum('score')).values('value')),
+            0
+        ),
+    )
+
+
+def actual_histogram_subqueries():
+    """Подзапросы с фактическим количеством отзывов с каждой оценкой."""
+    reviews = Review.objects.filter(
+        title=OuterRef('pk')).order_by().values('title')
+    return {
+        score_count_field(score): Coalesce(Subquery(
+            reviews.filter(score=score).annotate(
+                value=Count('pk')).values('value'),
+            output_field=IntegerField()
+        ), 0)
+        for score in SCORES
+    }
+
+
+def rebuild_ratings(titles=None):
+    """
+    Пересчитывает гистограмму оценок по таблице отзывов, по ней -
+    количество и сумму оценок, затем рейтинг.
+    Возвращает количество обновленных произведений.
+    """
+    if titles is None:
+        titles = Title.objects.all()
+    titles.update(**actual_histogram_subqueries())
+    titles.update(
+        review_count=sum(F(field) for field in SCORE_COUNT_FIELDS),
+        score_sum=sum(
+            score * F(score_count_field(score)) for score in SCORES)
+    )
+    return titles.update(
+        rating=rating_expression('review_count', 'score_sum'))
+
+
+def title_histogram(title, prefix=''):
+    """
+    Гистограмма оценок произведения: {оценка: количество отзывов}.
+    prefix - для счетчиков, аннотированных под другими именами.
+    """
+    return {
+        score: getattr(title, prefix + score_count_field(score))
+        for score in SCORES
+    }
+
+
+def histogram_median(histogram):
+    """
+    Медиана оценок по гистограмме, без чтения отзывов: при четном
+    числе отзывов - среднее двух средних оценок. None без отзывов.
+    """
+    count = sum(histogram.values())
+    if not count:
+        return None
+    # Номера средних оценок в отсортированном списке всех оценок.
+    positions = ((count - 1) // 2, count // 2)
+    middle = []
+    seen = 0
+    for score in sorted(histogram):
+        seen += histogram[score]
+        while len(middle) < 2 and positions[len(middle)] < seen:
+            middle.append(score)
+    median = sum(middle) / 2
+    return int(median) if median.is_integer() else median
+
+
+def find_rating_mismatches():
+    """
+    Произведения, у которых сохраненные рейтинг или гистограмма
+    расходятся с отзывами.
+    """
+    review_count, score_sum = actual_rating_subqueries()
+    histogram = {
+        f'actual_{field}': subquery
+        for field, subquery in actual_histogram_subqueries().items()
+    }
+    return Title.objects.annotate(
+        actual_count=review_count,
+        actual_sum=score_sum,
+        **histogram
+    ).annotate(
+        # NULL не равен NULL, поэтому сравниваем рейтинги через Coalesce.
+        stored_rating=Coalesce('rating', -1),
+        actual_rating=Coalesce(
+            rating_expression('actual_count', 'actual_sum'), -1)
+    ).exclude(
+        review_count=F('actual_count'),
+        score_sum=F('actual_sum'),
+        stored_rating=F('actual_rating'),
+        **{field: F(f'actual_{field}') for field in SCORE_COUNT_FIELDS}
+    )
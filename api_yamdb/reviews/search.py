@@ -0,0 +1,297 @@
+from django.conf import settings
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connection, connections
+from django.db.models import (Case, F, FloatField, Func, Q, TextField, Value,
+                              When)
+from django.db.models.expressions import RawSQL
+from reviews.management.bulk import batched, insert_objects
+from reviews.models import (SEARCH_COMMENT, SEARCH_REVIEW, SEARCH_TITLE,
+                            Comment, Review, SearchDocument, Title)
+
+HIGHLIGHT_START = '<b>'
+HIGHLIGHT_STOP = '</b>'
+POSTGRES_HEADLINE_OPTIONS = (
+    f'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, '
+    'MaxFragments=2, MaxWords=30, MinWords=10'
+)
+POSTGRES_VECTOR_INDEX = 'searchdocument_vector_idx'
+POSTGRES_VECTOR_INDEX_SQL = (
+    'CREATE INDEX IF NOT EXISTS {index} ON {table} USING gin ({column})'
+)
+SQLITE_FTS_TABLE = 'reviews_searchdocument_fts'
+# Внешнее содержимое (content=) - FTS5 хранит только индекс, а триггеры
+# поддерживают его в соответствии с таблицей поисковых документов.
+SQLITE_FTS_SQL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+    "heading, body, content='{table}', content_rowid='id', "
+    "tokenize='unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+    "INSERT INTO {fts}(rowid, heading, body) "
+    "VALUES (new.id, new.heading, new.body); END",
+    "CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+    "INSERT INTO {fts}({fts}, rowid, heading, body) "
+    "VALUES ('delete', old.id, old.heading, old.body); END",
+    "CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} BEGIN "
+    "INSERT INTO {fts}({fts}, rowid, heading, body) "
+    "VALUES ('delete', old.id, old.heading, old.body); "
+    "INSERT INTO {fts}(rowid, heading, body) "
+    "VALUES (new.id, new.heading, new.body); END",
+)
+SQLITE_REBUILD_SQL = "INSERT INTO {fts}({fts}) VALUES ('rebuild')"
+# Заголовок весит больше текста, как веса A и B в PostgreSQL.
+SQLITE_RANK_SQL = (
+    'SELECT -bm25({fts}, 10.0, 1.0) FROM {fts} '
+    'WHERE {fts} MATCH %s AND {fts}.rowid = {table}.id'
+)
+SQLITE_HEADLINE_SQL = (
+    "SELECT snippet({fts}, 1, '{start}', '{stop}', '...', 30) FROM {fts} "
+    'WHERE {fts} MATCH %s AND {fts}.rowid = {table}.id'
+)
+SQLITE_MATCH_SQL = (
+    '{table}.id IN (SELECT rowid FROM {fts} WHERE {fts} MATCH %s)'
+)
+
+
+class Headline(Func):
+    """ts_headline: фрагменты текста с подсвеченными совпадениями."""
+
+    function = 'ts_headline'
+    output_field = TextField()
+
+
+SEARCH_KIND_BY_MODEL = {
+    Title: SEARCH_TITLE,
+    Review: SEARCH_REVIEW,
+    Comment: SEARCH_COMMENT,
+}
+
+
+def document_for(instance):
+    """Поля поискового документа для произведения, отзыва или комментария."""
+    if isinstance(instance, Title):
+        return SEARCH_TITLE, {
+            'title_id': instance.pk,
+            'review_id': None,
+            'heading': instance.name,
+            'body': instance.description or '',
+        }
+    if isinstance(instance, Review):
+        return SEARCH_REVIEW, {
+            'title_id': instance.title_id,
+            'review_id': instance.pk,
+            'heading': '',
+            'body': instance.text,
+        }
+    return SEARCH_COMMENT, {
+        'title_id': instance.review.title_id,
+        'review_id': instance.review_id,
+        'heading': '',
+        'body': instance.text,
+    }
+
+
+class PostgresSearchBackend:
+    """Полнотекстовый поиск PostgreSQL по хранимому tsvector."""
+
+    def get_vector(self, heading='heading', body='body'):
+        return (
+            SearchVector(heading, weight='A', config=settings.SEARCH_CONFIG)
+            + SearchVector(body, weight='B', config=settings.SEARCH_CONFIG)
+        )
+
+    def get_document_fields(self, fields):
+        """Вектор вычисляется в том же запросе, что и запись документа."""
+        return {**fields, 'vector': self.get_vector(
+            Value(fields['heading'], output_field=TextField()),
+            Value(fields['body'], output_field=TextField())
+        )}
+
+    def create_index(self, using):
+        connection = connections[using]
+        quote_name = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(POSTGRES_VECTOR_INDEX_SQL.format(
+                index=quote_name(POSTGRES_VECTOR_INDEX),
+                table=quote_name(SearchDocument._meta.db_table),
+                column=quote_name('vector')
+            ))
+
+    def rebuild_index(self):
+        SearchDocument.objects.update(vector=self.get_vector())
+
+    def index_documents(self, documents):
+        SearchDocument.objects.filter(
+            pk__in=[document.pk for document in documents]
+        ).update(vector=self.get_vector())
+
+    def search(self, documents, text):
+        query = SearchQuery(text, config=settings.SEARCH_CONFIG)
+        return documents.filter(vector=query).annotate(
+            rank=SearchRank(F('vector'), query),
+            headline=Headline(
+                Value(settings.SEARCH_CONFIG), F('body'), query,
+                Value(POSTGRES_HEADLINE_OPTIONS)
+            )
+        )
+
+
+class SqliteSearchBackend:
+    """Полнотекстовый поиск SQLite FTS5 (для тестов и разработки)."""
+
+    def format_sql(self, sql):
+        return sql.format(
+            fts=SQLITE_FTS_TABLE,
+            table=SearchDocument._meta.db_table,
+            start=HIGHLIGHT_START,
+            stop=HIGHLIGHT_STOP
+        )
+
+    def get_document_fields(self, fields):
+        """Индекс FTS5 поддерживают триггеры."""
+        return fields
+
+    def create_index(self, using):
+        with connections[using].cursor() as cursor:
+            for sql in SQLITE_FTS_SQL:
+                cursor.execute(self.format_sql(sql))
+
+    def rebuild_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute(self.format_sql(SQLITE_REBUILD_SQL))
+
+    def index_documents(self, documents):
+        """Новые документы индексирует триггер вставки."""
+
+    def get_match_query(self, text):
+        """Каждое слово - отдельная фраза FTS5, все слова обязательны."""
+        return ' '.join(
+            '"{}"'.format(word.replace('"', '""')) for word in text.split())
+
+    def search(self, documents, text):
+        match = self.get_match_query(text)
+        # RawSQL в pk__in оборачивается в лишние скобки, и SQLite
+        # сравнивает id только с первой строкой подзапроса.
+        return documents.extra(
+            where=[self.format_sql(SQLITE_MATCH_SQL)], params=[match]
+        ).annotate(
+            rank=RawSQL(
+                self.format_sql(SQLITE_RANK_SQL), (match,),
+                output_field=FloatField()
+            ),
+            headline=RawSQL(
+                self.format_sql(SQLITE_HEADLINE_SQL), (match,),
+                output_field=TextField()
+            )
+        )
+
+
+class BasicSearchBackend:
+    """
+    Поиск без полнотекстового индекса для остальных СУБД: все слова
+    запроса (icontains) в заголовке или тексте, совпадение в заголовке
+    выше. Медленнее и без морфологии, но API поиска работает.
+    """
+
+    def get_document_fields(self, fields):
+        return fields
+
+    def create_index(self, using):
+        """Индекса нет."""
+
+    def rebuild_index(self):
+        """Индекса нет."""
+
+    def index_documents(self, documents):
+        """Индекса нет."""
+
+    def search(self, documents, text):
+        heading = Q()
+        for word in text.split():
+            documents = documents.filter(
+                Q(heading__icontains=word) | Q(body__icontains=word))
+            heading &= Q(heading__icontains=word)
+        return documents.annotate(
+            rank=Case(
+                When(heading, then=Value(1.0)), default=Value(0.5),
+                output_field=FloatField()
+            ),
+            headline=F('body')
+        )
+
+
+BACKENDS = {
+    'postgresql': PostgresSearchBackend,
+    'sqlite': SqliteSearchBackend,
+}
+
+
+def get_backend(using='default'):
+    """Поиск для СУБД соединения; без FTS - BasicSearchBackend."""
+    return BACKENDS.get(connections[using].vendor, BasicSearchBackend)()
+
+
+def index_object(instance):
+    """Создает или обновляет поисковый документ объекта."""
+    backend = get_backend()
+    kind, fields = document_for(instance)
+    SearchDocument.objects.update_or_create(
+        kind=kind, object_id=instance.pk,
+        defaults=backend.get_document_fields(fields)
+    )
+
+
+def index_new_objects(instances, batch_size=None):
+    """
+    Поисковые документы новых объектов одной вставкой пачками
+    (bulk_create не отправляет post_save).
+    """
+    backend = get_backend()
+    documents = []
+    for instance in instances:
+        kind, fields = document_for(instance)
+        documents.append(
+            SearchDocument(kind=kind, object_id=instance.pk, **fields))
+    insert_objects(documents, batch_size)
+    backend.index_documents(documents)
+
+
+def unindex_object(instance):
+    SearchDocument.objects.filter(
+        kind=SEARCH_KIND_BY_MODEL[type(instance)], object_id=instance.pk
+    ).delete()
+
+
+def iter_documents():
+    """Поисковые документы для всех объектов, без загрузки таблиц в память."""
+    for title in Title.objects.only(
+            'pk', 'name', 'description').iterator():
+        kind, fields = document_for(title)
+        yield SearchDocument(kind=kind, object_id=title.pk, **fields)
+    for review in Review.objects.only('pk', 'title_id', 'text').iterator():
+        kind, fields = document_for(review)
+        yield SearchDocument(kind=kind, object_id=review.pk, **fields)
+    for comment in Comment.objects.select_related('review').only(
+            'pk', 'text', 'review__title_id').iterator():
+        kind, fields = document_for(comment)
+        yield SearchDocument(kind=kind, object_id=comment.pk, **fields)
+
+
+def rebuild_search_index(batch_size):
+    """Пересоздает все поисковые документы, возвращает их количество."""
+    backend = get_backend()
+    SearchDocument.objects.all().delete()
+    count = 0
+    for batch in batched(iter_documents(), batch_size):
+        SearchDocument.objects.bulk_create(batch)
+        count += len(batch)
+    backend.rebuild_index()
+    return count
+
+
+def search(text, kind=None):
+    """Документы, найденные по тексту, от более релевантных к менее."""
+    documents = SearchDocument.objects.all()
+    if kind:
+        documents = documents.filter(kind=kind)
+    return get_backend().search(documents, text).order_by('-rank', 'pk')
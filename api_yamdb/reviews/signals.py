@@ -0,0 +1,111 @@
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import Signal, receiver
+from reviews.changes import object_changes, record_changes, title_changes
+from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.ratings import apply_review_delta, rebuild_ratings
+from reviews.search import index_object, unindex_object
+
+# Данные изменены в обход save()/delete() моделей (bulk_create, update):
+# импорт, генерация данных, пересчет рейтингов.
+bulk_data_changed = Signal()
+
+
+def get_rating_state(review):
+    """Произведение и оценка отзыва, которые сейчас учтены в рейтинге."""
+    return getattr(review, '_rating_state', (None, None))
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_review_save(sender, instance, created, raw, **kwargs):
+    """Учитывает в рейтинге новый отзыв или изменение оценки."""
+    if raw:
+        return
+    score = int(instance.score)
+    old_title_id, old_score = get_rating_state(instance)
+    if created:
+        apply_review_delta(instance.title_id, {score: 1})
+    elif old_title_id is None or old_score is None:
+        # Исходное состояние отзыва неизвестно (например, оценка была
+        # отложена через only/defer) - пересчитываем рейтинг целиком.
+        rebuild_ratings(Title.objects.filter(
+            pk__in={old_title_id, instance.title_id} - {None}))
+    elif old_title_id != instance.title_id:
+        apply_review_delta(old_title_id, {int(old_score): -1})
+        apply_review_delta(instance.title_id, {score: 1})
+    elif score != int(old_score):
+        apply_review_delta(
+            instance.title_id, {int(old_score): -1, score: 1})
+    instance.remember_rating_state()
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_review_delete(sender, instance, **kwargs):
+    """Убирает из рейтинга удаленный отзыв."""
+    old_title_id, old_score = get_rating_state(instance)
+    if old_title_id is None or old_score is None:
+        old_title_id, old_score = instance.title_id, instance.score
+    apply_review_delta(old_title_id, {int(old_score): -1})
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_save, sender=Review)
+@receiver(post_save, sender=Comment)
+def update_search_document(sender, instance, raw, **kwargs):
+    """Поисковый документ обновляется вместе с объектом."""
+    if not raw:
+        index_object(instance)
+
+
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Review)
+@receiver(post_delete, sender=Comment)
+def delete_search_document(sender, instance, **kwargs):
+    unindex_object(instance)
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_save, sender=Review)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Genre)
+def record_save(sender, instance, raw, **kwargs):
+    """Запись в журнал изменений в транзакции сохранения объекта."""
+    if not raw:
+        record_changes(object_changes(instance))
+
+
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Review)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Genre)
+def record_delete(sender, instance, **kwargs):
+    record_changes(object_changes(instance, deleted=True))
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Genre)
+def record_titles_of_deleted(sender, instance, **kwargs):
+    """
+    Произведения удаляемой категории или жанра меняются UPDATE
+    и DELETE связей без сигналов: записываем их до удаления.
+    """
+    record_changes(title_changes(
+        instance.titles.values_list('pk', flat=True)
+        if sender is Category
+        else instance.genres.values_list('pk', flat=True)))
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def record_genres_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Жанры произведения (add/remove/set/clear) - изменение произведения."""
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        record_changes(title_changes([instance.pk]))
+    elif action == 'pre_clear':
+        record_changes(title_changes(
+            instance.genres.values_list('pk', flat=True)))
+    else:
+        record_changes(title_changes(pk_set))
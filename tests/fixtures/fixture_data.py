@@ -0,0 +1,30 @@
+import pytest
+
+
+@pytest.fixture
+def category():
+    from reviews.models import Category
+    return Category.objects.create(name='Фильм', slug='film')
+
+
+@pytest.fixture
+def genres():
+    from reviews.models import Genre
+    return [
+        Genre.objects.create(name=f'Жанр {index}', slug=f'genre-{index}')
+        for index in range(3)
+    ]
+
+
+@pytest.fixture
+def titles(category, genres):
+    from reviews.models import Title
+    titles = []
+    for index in range(10):
+        title = Title.objects.create(
+            name=f'Произведение {index}', year=2000 + index,
+            category=category
+        )
+        title.genre.set(genres)
+        titles.append(title)
+    return titles
@@ -0,0 +1,41 @@
+import asyncore
+import smtpd
+import threading
+
+import pytest
+
+
+class LocalSMTPServer(smtpd.SMTPServer):
+    """SMTP-сервер для тестов: запоминает письма и подключения."""
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), None)
+        self.messages = []
+        self.connections = 0
+
+    @property
+    def port(self):
+        return self.socket.getsockname()[1]
+
+    def handle_accepted(self, conn, addr):
+        self.connections += 1
+        super().handle_accepted(conn, addr)
+
+    def process_message(self, peer, mailfrom, rcpttos, data, **kwargs):
+        self.messages.append((mailfrom, rcpttos, data))
+
+
+@pytest.fixture
+def smtp_server(settings):
+    server = LocalSMTPServer()
+    thread = threading.Thread(
+        target=asyncore.loop, kwargs={'timeout': 0.05}, daemon=True
+    )
+    thread.start()
+    settings.EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+    settings.EMAIL_HOST = '127.0.0.1'
+    settings.EMAIL_PORT = server.port
+    settings.EMAIL_USE_TLS = False
+    yield server
+    server.close()
+    thread.join()
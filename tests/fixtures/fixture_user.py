@@ -0,0 +1,39 @@
+import pytest
+
+
+@pytest.fixture
+def client_for():
+    """Фабрика клиентов API с access-токеном пользователя."""
+    from api.authentication import get_tokens_for_user
+    from rest_framework.test import APIClient
+
+    def make_client(user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=(
+            f'Bearer {get_tokens_for_user(user).access_token}'))
+        return client
+
+    return make_client
+
+
+@pytest.fixture
+def user():
+    from reviews.models import User
+    return User.objects.create(username='user', email='user@ya.ru')
+
+
+@pytest.fixture
+def admin():
+    from reviews.models import User
+    return User.objects.create(
+        username='admin', email='admin@ya.ru', role='admin')
+
+
+@pytest.fixture
+def user_client(client_for, user):
+    return client_for(user)
+
+
+@pytest.fixture
+def admin_client(client_for, admin):
+    return client_for(admin)
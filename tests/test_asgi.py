@@ -0,0 +1,67 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.signals import request_finished
+
+from api_yamdb.asgi import application
+
+
+GET_SCOPE = {
+    'type': 'http', 'method': 'GET', 'path': '/api/v1/categories/',
+    'query_string': b'', 'headers': [(b'host', b'localhost')],
+    'http_version': '1.1', 'scheme': 'http', 'server': ('localhost', 80),
+}
+
+
+async def call(scope, messages):
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    await application(scope, receive, send)
+    return sent
+
+
+@pytest.mark.django_db(transaction=True)
+class TestASGI:
+
+    def test_get_list(self):
+        sent = async_to_sync(call)(
+            GET_SCOPE, [{'type': 'http.request', 'body': b''}])
+        assert sent[0]['status'] == 200, (
+            'Проверьте, что ASGI-приложение отвечает на GET-запрос списка'
+        )
+        body = b''.join(message.get('body', b'') for message in sent[1:])
+        assert json.loads(body)['results'] == [], (
+            'Проверьте, что ASGI-приложение возвращает ответ представления'
+        )
+
+    def test_request_finished(self):
+        finished = []
+
+        def receiver(**kwargs):
+            finished.append(True)
+
+        request_finished.connect(receiver)
+        try:
+            async_to_sync(call)(
+                GET_SCOPE, [{'type': 'http.request', 'body': b''}])
+        finally:
+            request_finished.disconnect(receiver)
+        assert finished == [True], (
+            'Проверьте, что после ответа через ASGI отправляется '
+            'request_finished (close() ответа Django)'
+        )
+
+    def test_lifespan(self):
+        sent = async_to_sync(call)({'type': 'lifespan'}, [
+            {'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}
+        ])
+        assert [message['type'] for message in sent] == [
+            'lifespan.startup.complete', 'lifespan.shutdown.complete'
+        ], 'Проверьте, что ASGI-приложение поддерживает протокол lifespan'
@@ -0,0 +1,86 @@
+import pytest
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.authentication import TOKEN_REVOKED, USER_INACTIVE
+from reviews.models import Review
+
+ME_URL = '/api/v1/users/me/'
+
+
+def reviews_url(title):
+    return f'/api/v1/titles/{title.id}/reviews/'
+
+
+@pytest.mark.django_db
+class TestStatelessJWTAuthentication:
+
+    def test_token_revoked_when_user_changes(self, user, client_for):
+        client = client_for(user)
+        assert client.get(ME_URL).status_code == 200, (
+            'Проверьте, что токен с claims принимается'
+        )
+        user.role = 'moderator'
+        user.save()
+        response = client.get(ME_URL)
+        assert response.status_code == 401, (
+            'Проверьте, что после смены роли старый токен отозван'
+        )
+        assert response.json()['detail'] == TOKEN_REVOKED
+        assert client_for(user).get(ME_URL).status_code == 200, (
+            'Проверьте, что новый токен с новой версией принимается'
+        )
+
+    def test_inactive_user_rejected(self, titles, user, client_for):
+        client = client_for(user)
+        user.is_active = False
+        user.save()
+        assert client.post(
+            reviews_url(titles[0]), {'text': 'Отзыв', 'score': 5}
+        ).status_code == 401, (
+            'Проверьте, что деактивация отзывает выданные токены'
+        )
+        response = client_for(user).post(
+            reviews_url(titles[0]), {'text': 'Отзыв', 'score': 5})
+        assert response.status_code == 401, (
+            'Проверьте, что токен неактивного пользователя отклоняется'
+        )
+        assert response.json()['detail'] == USER_INACTIVE
+        assert not Review.objects.exists(), (
+            'Проверьте, что неактивный пользователь не может писать отзывы'
+        )
+
+    def test_token_without_claims(self, user):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        response = client.get(ME_URL)
+        assert (response.status_code, response.json()['username']) == (
+            200, user.username
+        ), 'Проверьте, что токен без claims обрабатывается штатно'
+        user.is_active = False
+        user.save()
+        assert client.get(ME_URL).status_code == 401, (
+            'Проверьте, что токен без claims неактивного пользователя '
+            'отклоняется'
+        )
+
+    def test_me_patch_uses_full_user(self, user, client_for):
+        user.first_name = 'Имя'
+        user.save()
+        client = client_for(user)
+        response = client.patch(ME_URL, {'bio': 'Биография'})
+        assert response.status_code == 200, (
+            'Проверьте, что пользователь может изменить свои данные'
+        )
+        user.refresh_from_db()
+        assert (user.bio, user.first_name, user.email) == (
+            'Биография', 'Имя', 'user@ya.ru'
+        ), (
+            'Проверьте, что PATCH users/me сохраняет полную запись '
+            'пользователя, а не собранную из claims токена'
+        )
+        assert response.json()['email'] == 'user@ya.ru'
+        assert client.get(ME_URL).status_code == 200, (
+            'Проверьте, что изменение данных вне claims не отзывает токен'
+        )
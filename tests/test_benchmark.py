@@ -0,0 +1,90 @@
+import json
+import random
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from reviews.management.benchmark import Scenario
+from reviews.models import Review, Title
+
+SCENARIO_KEYS = ('requests', 'errors', 'rps', 'p50', 'p95', 'p99')
+
+
+@pytest.mark.django_db
+class TestBenchmark:
+
+    def test_seed_and_benchmark(self, tmp_path):
+        call_command(
+            'seed_db', '--users', '10', '--categories', '2', '--genres', '3',
+            '--titles', '20'
+        )
+        assert Title.objects.count() == 20 and Review.objects.exists(), (
+            'Проверьте, что seed_db заполняет произведения и отзывы'
+        )
+        reviews = Review.objects.count()
+        output = tmp_path / 'bench.json'
+        call_command(
+            'benchmark', '--requests', '3', '--warmup', '1',
+            '--output', str(output)
+        )
+        result = json.loads(output.read_text(encoding='utf-8'))
+        assert set(result['scenarios']) == {
+            'titles-browse', 'reviews-paging', 'review-post', 'review-bulk',
+            'signup', 'token'
+        }, 'Проверьте, что benchmark выполняет все сценарии'
+        for name, stats in result['scenarios'].items():
+            assert all(key in stats for key in SCENARIO_KEYS), (
+                f'Проверьте, что для {name} сохранены задержки и запросы/с'
+            )
+            assert stats['errors'] == 0, (
+                f'Проверьте, что сценарий {name} выполняется без ошибок'
+            )
+        assert Review.objects.count() == reviews, (
+            'Проверьте, что изменения сценариев откатываются'
+        )
+        call_command(
+            'benchmark', '--requests', '3', '--warmup', '0',
+            '--scenario', 'token', '--baseline', str(output)
+        )
+
+
+# Потоки замера работают со своими соединениями и должны видеть
+# данные seed_db, поэтому тест не оборачивается в общую транзакцию.
+@pytest.mark.django_db(transaction=True)
+class TestBenchmarkWorkers:
+
+    def test_writing_workers_do_not_block(self, tmp_path, monkeypatch):
+        if connection.vendor != 'postgresql':
+            pytest.skip('SQLite замеряется в один поток')
+        call_command(
+            'seed_db', '--users', '10', '--categories', '2', '--genres', '3',
+            '--titles', '20'
+        )
+        parts = [
+            set(Scenario(random.Random(), worker, 3).own_titles(
+            ).values_list('pk', flat=True))
+            for worker in range(3)
+        ]
+        assert set.union(*parts) == set(
+            Title.objects.values_list('pk', flat=True)
+        ) and sum(map(len, parts)) == Title.objects.count(), (
+            'Проверьте, что потоки делят произведения без пересечений'
+        )
+        # Ожидание блокировки другого потока - ошибка запроса, а не
+        # замер времени ожидания.
+        monkeypatch.setitem(
+            connection.settings_dict['OPTIONS'], 'options',
+            '-c lock_timeout=1000')
+        output = tmp_path / 'bench.json'
+        call_command(
+            'benchmark', '--requests', '5', '--warmup', '1',
+            '--workers', '3', '--scenario', 'review-post',
+            '--scenario', 'review-bulk', '--output', str(output)
+        )
+        result = json.loads(output.read_text(encoding='utf-8'))
+        for name, stats in result['scenarios'].items():
+            assert stats['errors'] == 0, (
+                f'Проверьте, что потоки сценария {name} не ждут '
+                'блокировок друг друга'
+            )
@@ -0,0 +1,197 @@
+import json
+
+import pytest
+from rest_framework.test import APIClient
+
+from api.bulk import AUTHOR_UNAVAILABLE, BULK_TOO_MANY, ReviewIngest
+from reviews.models import Comment, Review, SearchDocument, Title, User
+
+REVIEWS_URL = '/api/v1/bulk/reviews/'
+COMMENTS_URL = '/api/v1/bulk/comments/'
+
+
+@pytest.fixture
+def client(client_for):
+    return client_for(User.objects.create(
+        username='partner', email='partner@ya.ru', role='partner'))
+
+
+@pytest.mark.django_db
+class TestBulk:
+
+    def test_reviews_partial_failure(self, titles, client):
+        Review.objects.create(
+            title=titles[2], author=User.objects.get(username='partner'),
+            text='Старый отзыв', score=1
+        )
+        response = client.post(REVIEWS_URL, [
+            {'title': titles[0].id, 'text': 'Отлично', 'score': 9},
+            {'title': titles[0].id, 'text': 'Повтор', 'score': 1},
+            {'title': titles[1].id, 'text': 'Хорошо', 'score': 7},
+            {'title': titles[2].id, 'text': 'Уже есть', 'score': 5},
+            {'title': 0, 'text': 'Нет id', 'score': 5},
+            {'title': 10 ** 6, 'text': 'Нет такого', 'score': 5},
+            {'title': titles[3].id, 'text': 'Оценка', 'score': 100},
+        ], format='json')
+        assert response.status_code == 207, (
+            'Проверьте, что при ошибках в части объектов ответ - 207'
+        )
+        statuses = [result['status'] for result in response.json()['results']]
+        assert statuses == [201, 400, 201, 400, 400, 404, 400], (
+            'Проверьте, что результат возвращается по каждому объекту'
+        )
+        assert response.json()['created'] == 2, (
+            'Проверьте, что корректные объекты загружаются несмотря на ошибки'
+        )
+        title = Title.objects.get(pk=titles[0].id)
+        assert (title.review_count, title.score_sum, title.rating) == (
+            1, 9, 9
+        ), 'Проверьте, что загрузка обновляет рейтинг произведения'
+        review_id = response.json()['results'][0]['id']
+        assert SearchDocument.objects.filter(
+            kind='review', object_id=review_id).exists(), (
+            'Проверьте, что для загруженных отзывов создаются '
+            'поисковые документы'
+        )
+
+    def test_comments_ndjson(self, titles, client):
+        review = Review.objects.create(
+            title=titles[0], author=User.objects.get(username='partner'),
+            text='Отзыв', score=5
+        )
+        lines = [
+            {'review': review.id, 'text': 'Первый'},
+            {'review': 10 ** 6, 'text': 'Нет отзыва'},
+            {'review': review.id, 'text': 'Второй'},
+        ]
+        response = client.post(
+            COMMENTS_URL, '\n'.join(json.dumps(line) for line in lines),
+            content_type='application/x-ndjson'
+        )
+        assert response.status_code == 207, (
+            'Проверьте, что эндпоинт принимает NDJSON'
+        )
+        assert Comment.objects.filter(review=review).count() == 2, (
+            'Проверьте, что комментарии к существующему отзыву загружены'
+        )
+
+    def test_all_created(self, titles, client):
+        response = client.post(REVIEWS_URL, [
+            {'title': title.id, 'text': 'Отзыв', 'score': 5}
+            for title in titles
+        ], format='json')
+        assert response.status_code == 201, (
+            'Проверьте, что без ошибок ответ - 201'
+        )
+        assert Review.objects.count() == len(titles), (
+            'Проверьте, что загружены все отзывы'
+        )
+
+    def test_rejected_requests(self, titles, client, user_client, settings):
+        settings.BULK_MAX_ITEMS = 2
+        item = {'title': titles[0].id, 'text': 'Отзыв', 'score': 5}
+        for data in ([item] * 3, [], {'title': titles[0].id}):
+            response = client.post(REVIEWS_URL, data, format='json')
+            assert response.status_code == 400, (
+                f'Проверьте, что запрос {data} отклоняется целиком'
+            )
+        response = client.post(
+            COMMENTS_URL, '{"review": 1}\n{',
+            content_type='application/x-ndjson'
+        )
+        assert response.status_code == 400, (
+            'Проверьте, что некорректный NDJSON отклоняется'
+        )
+        lines = '\n'.join(['{"review": 1}'] * 3 + ['{'])
+        response = client.post(
+            COMMENTS_URL, lines, content_type='application/x-ndjson')
+        assert response.json() == [BULK_TOO_MANY.format(limit=2)], (
+            'Проверьте, что NDJSON читается только до первого объекта '
+            'сверх BULK_MAX_ITEMS'
+        )
+        assert APIClient().post(
+            REVIEWS_URL, [item], format='json'
+        ).status_code == 401, 'Проверьте, что загрузка требует токена'
+        for url in (REVIEWS_URL, COMMENTS_URL):
+            assert user_client.post(
+                url, [item], format='json'
+            ).status_code == 403, (
+                'Проверьте, что загрузка доступна только партнерам '
+                'и администраторам'
+            )
+        assert not Review.objects.exists(), (
+            'Проверьте, что отклоненные запросы ничего не загружают'
+        )
+
+    def test_repeated_conflict(self, titles, client, monkeypatch):
+        partner = User.objects.get(username='partner')
+        Review.objects.create(
+            title=titles[1], author=partner, text='Параллельный', score=1)
+        get_parents = ReviewIngest.get_parents
+
+        def stale_parents(self, ids, authors):
+            # Отзыв записан после проверки и не виден ни одной попытке.
+            parents = get_parents(self, ids, authors)
+            self.reviewed = set()
+            return parents
+
+        monkeypatch.setattr(ReviewIngest, 'get_parents', stale_parents)
+        response = client.post(REVIEWS_URL, [
+            {'title': title.id, 'text': 'Отзыв', 'score': 5}
+            for title in titles[:3]
+        ], format='json')
+        assert response.status_code == 207, (
+            'Проверьте, что повторный конфликт не приводит к ошибке 500'
+        )
+        assert [
+            result['status'] for result in response.json()['results']
+        ] == [201, 409, 201], (
+            'Проверьте, что конфликтующий объект получает 409, '
+            'а остальные загружаются'
+        )
+        assert Review.objects.filter(author=partner).count() == 3
+        assert {
+            result['id'] for result in response.json()['results']
+            if result['status'] == 201
+        } == set(Review.objects.filter(text='Отзыв').values_list(
+            'id', flat=True)), (
+            'Проверьте, что id в ответе - id записанных отзывов'
+        )
+
+    def test_partner_authors(self, titles, client):
+        User.objects.create(username='partner.taken', email='t@ya.ru')
+        title_id = titles[0].id
+        response = client.post(REVIEWS_URL, [
+            {'title': title_id, 'author': 'alice', 'text': 'А', 'score': 9},
+            {'title': title_id, 'author': 'bob', 'text': 'Б', 'score': 5},
+            {'title': title_id, 'author': 'alice', 'text': 'А', 'score': 1},
+            {'title': title_id, 'text': 'Партнер', 'score': 7},
+            {'title': title_id, 'author': 'taken', 'text': 'Т', 'score': 1},
+            {'title': title_id, 'author': 'a/b', 'text': 'Имя', 'score': 1},
+        ], format='json')
+        results = response.json()['results']
+        assert [result['status'] for result in results] == [
+            201, 201, 400, 201, 400, 400
+        ], (
+            'Проверьте, что на одно произведение загружаются отзывы '
+            'разных авторов партнера, но не два отзыва одного автора'
+        )
+        assert results[4]['errors'] == {
+            'author': [AUTHOR_UNAVAILABLE.format(name='taken')]
+        }, 'Проверьте, что чужой пользователь не становится автором'
+        partner = User.objects.get(username='partner')
+        assert set(Review.objects.filter(title_id=title_id).values_list(
+            'author__username', 'author__partner'
+        )) == {
+            ('partner.alice', partner.id), ('partner.bob', partner.id),
+            ('partner', None)
+        }, 'Проверьте, что авторы - пользователи партнера'
+        assert Title.objects.get(pk=title_id).review_count == 3
+        review = Review.objects.get(author__username='partner.alice')
+        response = client.post(COMMENTS_URL, [
+            {'review': review.id, 'author': 'alice', 'text': 'Ответ'},
+        ], format='json')
+        assert response.status_code == 201
+        assert review.comments.get().author == review.author, (
+            'Проверьте, что повторная загрузка находит того же автора'
+        )
@@ -0,0 +1,148 @@
+import pytest
+from django.core.management import call_command
+from django.test import Client
+from rest_framework.test import APIClient
+
+from reviews.models import Category, User
+
+CATEGORIES_URL = '/api/v1/categories/'
+GENRES_URL = '/api/v1/genres/'
+TITLES_URL = '/api/v1/titles/'
+CSV_FILES = {
+    'users.csv': 'id,username,email,role,bio,first_name,last_name\n',
+    'category.csv': 'id,name,slug\n1,Импорт,import\n',
+    'genre.csv': 'id,name,slug\n1,Импорт,import\n',
+    'titles.csv': 'id,name,year,category\n1,Импорт,2000,1\n',
+    'genre_title.csv': 'id,title_id,genre_id\n1,1,1\n',
+    'review.csv': 'id,title_id,text,author,score,pub_date\n',
+    'comments.csv': 'id,review_id,text,author,pub_date\n',
+}
+
+
+def names(url, **params):
+    return {
+        item['name']
+        for item in APIClient().get(url, params).json()['results']
+    }
+
+
+def warm(*urls):
+    """Кладет ответы в кэш, чтобы проверить их сброс."""
+    for url in urls:
+        APIClient().get(url)
+
+
+def title_detail(title):
+    return APIClient().get(f'{TITLES_URL}{title.id}/').json()
+
+
+@pytest.fixture
+def staff_client():
+    """Клиент админки Django (сессия суперпользователя)."""
+    client = Client()
+    client.force_login(User.objects.create(
+        username='staff', email='staff@ya.ru',
+        is_staff=True, is_superuser=True))
+    return client
+
+
+@pytest.mark.django_db
+class TestResponseCache:
+
+    def test_repeated_get_is_served_from_cache(
+        self, titles, django_assert_num_queries
+    ):
+        url = f'{TITLES_URL}{titles[0].id}/'
+        for cached_url in (CATEGORIES_URL, GENRES_URL, TITLES_URL, url):
+            first = APIClient().get(cached_url)
+            with django_assert_num_queries(0):
+                second = APIClient().get(cached_url)
+            assert second.json() == first.json(), (
+                f'Проверьте, что повторный GET {cached_url} отдается '
+                'из кэша без запросов к базе'
+            )
+        assert APIClient().get(TITLES_URL, {'year': 2001}).json()[
+            'count'] == 1, 'Проверьте, что параметры запроса входят в ключ'
+
+    def test_if_none_match(self, titles):
+        etag = APIClient().get(TITLES_URL)['ETag']
+        response = APIClient().get(TITLES_URL, HTTP_IF_NONE_MATCH=etag)
+        assert (response.status_code, response.content) == (304, b''), (
+            'Проверьте, что совпавший If-None-Match получает 304 без тела'
+        )
+        assert APIClient().get(
+            TITLES_URL, HTTP_IF_NONE_MATCH='"other"').status_code == 200, (
+            'Проверьте, что другой ETag получает полный ответ'
+        )
+
+    def test_viewset_writes_invalidate(
+        self, titles, genres, admin_client, user_client
+    ):
+        title = titles[0]
+        warm(
+            CATEGORIES_URL, GENRES_URL, TITLES_URL,
+            f'{TITLES_URL}{title.id}/')
+        admin_client.post(CATEGORIES_URL, {'name': 'Книга', 'slug': 'book'})
+        admin_client.delete(f'{GENRES_URL}{genres[2].slug}/')
+        admin_client.patch(f'{TITLES_URL}{title.id}/', {
+            'name': 'Новое имя', 'year': title.year,
+            'category': title.category.slug})
+        assert 'Книга' in names(CATEGORIES_URL), (
+            'Проверьте, что POST категории сбрасывает кэш категорий'
+        )
+        assert genres[2].name not in names(GENRES_URL), (
+            'Проверьте, что удаление жанра сбрасывает кэш жанров'
+        )
+        assert 'Новое имя' in names(TITLES_URL), (
+            'Проверьте, что PATCH произведения сбрасывает кэш списка'
+        )
+        assert len(title_detail(title)['genre']) == 2, (
+            'Проверьте, что удаление жанра сбрасывает кэш произведений'
+        )
+        user_client.post(
+            f'{TITLES_URL}{title.id}/reviews/', {'text': 'Отзыв', 'score': 7})
+        assert title_detail(title)['rating'] == 7, (
+            'Проверьте, что новый отзыв сбрасывает кэш произведения'
+        )
+
+    def test_admin_writes_invalidate(self, titles, category, staff_client):
+        title = titles[0]
+        warm(CATEGORIES_URL, TITLES_URL, f'{TITLES_URL}{title.id}/')
+        staff_client.post(
+            f'/admin/reviews/category/{category.id}/change/',
+            {'name': 'Кино', 'slug': category.slug})
+        assert names(CATEGORIES_URL) == {'Кино'}, (
+            'Проверьте, что изменение категории в админке сбрасывает кэш'
+        )
+        assert title_detail(title)['category']['name'] == 'Кино', (
+            'Проверьте, что изменение категории в админке сбрасывает '
+            'кэш произведений'
+        )
+        staff_client.post(
+            f'/admin/reviews/title/{title.id}/change/',
+            {'name': 'Из админки', 'year': title.year,
+             'category': category.id})
+        assert 'Из админки' in names(TITLES_URL), (
+            'Проверьте, что изменение произведения в админке сбрасывает кэш'
+        )
+        empty = Category.objects.create(name='Пустая', slug='empty')
+        assert 'Пустая' in names(CATEGORIES_URL)
+        staff_client.post(
+            f'/admin/reviews/category/{empty.id}/delete/', {'post': 'yes'})
+        assert names(CATEGORIES_URL) == {'Кино'}, (
+            'Проверьте, что удаление в админке сбрасывает кэш'
+        )
+
+    def test_import_invalidates(self, titles, tmp_path):
+        warm(CATEGORIES_URL, GENRES_URL, TITLES_URL)
+        for name, content in CSV_FILES.items():
+            (tmp_path / name).write_text(content, encoding='utf-8')
+        call_command(
+            'import_into_db', path=str(tmp_path), no_progress=True)
+        assert Category.objects.filter(slug='import').exists(), (
+            'Проверьте, что импорт загрузил данные'
+        )
+        for url in (CATEGORIES_URL, GENRES_URL, TITLES_URL):
+            assert 'Импорт' in names(url), (
+                f'Проверьте, что импорт сбрасывает кэш {url}'
+            )
@@ -0,0 +1,41 @@
+import pytest
+from django.conf import settings
+from rest_framework.test import APIClient
+
+LIST_URLS = (
+    '/api/v1/categories/', '/api/v1/genres/', '/api/v1/titles/',
+)
+
+
+@pytest.mark.django_db
+class TestCacheHeaders:
+
+    def test_anonymous_lists_are_public(self, titles):
+        urls = LIST_URLS + (f'/api/v1/titles/{titles[0].id}/reviews/',)
+        for url in urls:
+            response = APIClient().get(url)
+            assert response.status_code == 200, (
+                f'Проверьте, что {url} доступен без токена'
+            )
+            assert response['Cache-Control'] == (
+                f'public, max-age={settings.API_PUBLIC_CACHE_MAX_AGE}'
+            ), f'Проверьте, что анонимный ответ {url} можно кэшировать'
+            assert 'Authorization' in response['Vary'], (
+                f'Проверьте, что ответ {url} зависит от заголовка '
+                'Authorization'
+            )
+
+    def test_authorized_responses_are_private(self, titles, user_client):
+        for url in LIST_URLS:
+            assert user_client.get(url)['Cache-Control'] == (
+                'private, max-age=0'
+            ), f'Проверьте, что ответ {url} с токеном не кэшируется прокси'
+
+    def test_errors_are_not_cached(self):
+        response = APIClient().get('/api/v1/titles/0/')
+        assert response.status_code == 404, (
+            'Проверьте, что несуществующее произведение не найдено'
+        )
+        assert 'public' not in response.get('Cache-Control', ''), (
+            'Проверьте, что ошибки не кэшируются прокси'
+        )
@@ -0,0 +1,143 @@
+import threading
+
+import pytest
+from django.db import connection, transaction
+from rest_framework.test import APIClient
+
+from api.bulk import ReviewIngest
+from reviews.changes import FIRST_CURSOR
+from reviews.models import Category, Change, Comment, Genre, Review, User
+
+URL = '/api/v1/changes/'
+
+
+def read_all(client, cursor=FIRST_CURSOR, limit=None):
+    """Журнал целиком, пачка за пачкой, как это делает клиент."""
+    changed, deleted = {}, {}
+    params = {'limit': limit} if limit else {}
+    while True:
+        data = client.get(URL, {'cursor': cursor, **params}).json()
+        for kind, ids in data['changed'].items():
+            changed.setdefault(kind, set()).update(ids)
+        for kind, ids in data['deleted'].items():
+            deleted.setdefault(kind, set()).update(ids)
+        cursor = data['cursor']
+        if not data['more']:
+            return changed, deleted, cursor
+
+
+def write_in_background(started, finish):
+    """
+    Транзакция в отдельном соединении: создает жанр и ждет finish,
+    как долгий запрос, взявший id журнала раньше других.
+    """
+    try:
+        with transaction.atomic():
+            Genre.objects.create(name='Долгий', slug='long')
+            started.set()
+            finish.wait(10)
+    finally:
+        connection.close()
+
+
+# Записи журнала на PostgreSQL видны после завершения транзакций,
+# поэтому тесты не оборачиваются в общую транзакцию.
+@pytest.mark.django_db(transaction=True)
+class TestChanges:
+
+    def test_model_writes_are_recorded(self, titles, genres, category):
+        _, _, cursor = read_all(APIClient())
+        author = User.objects.create(username='author', email='a@ya.ru')
+        review = Review.objects.create(
+            title=titles[0], author=author, text='Отзыв', score=5)
+        comment = Comment.objects.create(
+            review=review, author=author, text='Да')
+        comment_id, title_id = comment.id, titles[2].id
+        comment.delete()
+        titles[1].genre.remove(genres[0])
+        titles[2].delete()
+        changed, deleted, _ = read_all(APIClient(), cursor)
+        assert changed == {
+            'review': {review.id},
+            'title': {titles[0].id, titles[1].id},
+        }, (
+            'Проверьте, что сохранение отзыва и жанры произведения '
+            'попадают в журнал вместе с произведением'
+        )
+        assert deleted == {
+            'comment': {comment_id}, 'title': {title_id}
+        }, 'Проверьте, что удаления попадают в журнал'
+        category_id = category.id
+        category.delete()
+        changed, deleted, _ = read_all(APIClient(), cursor)
+        assert set(titles[i].id for i in (0, 1, 3)) <= changed['title'], (
+            'Проверьте, что удаление категории меняет ее произведения'
+        )
+        assert deleted['category'] == {category_id}, (
+            'Проверьте, что удаление категории попадает в журнал'
+        )
+
+    def test_batches_and_cursor(self, titles, django_assert_num_queries):
+        client = APIClient()
+        with django_assert_num_queries(1):
+            data = client.get(URL, {'limit': 3}).json()
+        assert data['more'] and data['cursor'] != FIRST_CURSOR, (
+            'Проверьте, что журнал отдается пачками с курсором'
+        )
+        changed, deleted, cursor = read_all(client, limit=3)
+        assert changed == {
+            'category': {titles[0].category_id},
+            'genre': {genre.id for genre in titles[0].genre.all()},
+            'title': {title.id for title in titles},
+        } and not deleted, 'Проверьте, что пачки покрывают весь журнал'
+        assert cursor.endswith(f'-{Change.objects.latest("id").id}'), (
+            'Проверьте, что курсор указывает на последнюю выданную запись'
+        )
+        assert client.get(URL, {'cursor': cursor}).json() == {
+            'cursor': cursor, 'more': False, 'changed': {}, 'deleted': {}
+        }, 'Проверьте, что после последней записи журнал пуст'
+        for params in ({'cursor': '-1'}, {'limit': 0}, {'cursor': 'x'}):
+            assert client.get(URL, params).status_code == 400, (
+                f'Проверьте, что параметры {params} отклоняются'
+            )
+
+    def test_open_transaction_holds_back_later_commits(self):
+        if connection.vendor != 'postgresql':
+            pytest.skip('SQLite выполняет пишущие транзакции по одной')
+        _, _, cursor = read_all(APIClient())
+        started, finish = threading.Event(), threading.Event()
+        writer = threading.Thread(
+            target=write_in_background, args=(started, finish))
+        writer.start()
+        try:
+            assert started.wait(10)
+            category = Category.objects.create(name='Новая', slug='new')
+            data = APIClient().get(URL, {'cursor': cursor}).json()
+            assert (data['cursor'], data['changed']) == (cursor, {}), (
+                'Проверьте, что закоммиченные записи не выдаются, пока '
+                'не завершена более ранняя транзакция, и курсор стоит'
+            )
+        finally:
+            finish.set()
+            writer.join()
+        changed, _, _ = read_all(APIClient(), cursor)
+        assert changed == {
+            'category': {category.id},
+            'genre': set(Genre.objects.values_list('id', flat=True)),
+        }, (
+            'Проверьте, что после коммита долгой транзакции выдаются '
+            'и ее записи, и задержанные'
+        )
+
+    def test_bulk_ingest_is_recorded(self, titles):
+        author = User.objects.create(username='author', email='a@ya.ru')
+        _, _, cursor = read_all(APIClient())
+        ReviewIngest(author, [
+            {'title': title.id, 'text': 'Отзыв', 'score': 5}
+            for title in titles[:3]
+        ]).run()
+        changed, _, _ = read_all(APIClient(), cursor)
+        assert changed == {
+            'review': set(Review.objects.values_list('id', flat=True)),
+            'title': {title.id for title in titles[:3]},
+        }, 'Проверьте, что пакетная загрузка попадает в журнал'
@@ -0,0 +1,63 @@
+import time
+
+import pytest
+from django.core.signals import request_started
+from django.db import connection, connections
+
+from reviews.models import User
+
+INTERVAL = 30
+
+
+def break_connection():
+    """Разрывает соединение со стороны сервера, как PgBouncer по таймауту."""
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_backend_pid()')
+        pid = cursor.fetchone()[0]
+    default = connections['default']
+    other = type(default)(default.settings_dict, alias='other')
+    try:
+        with other.cursor() as cursor:
+            cursor.execute('SELECT pg_terminate_backend(%s)', [pid])
+    finally:
+        other.close()
+
+
+# Соединения внутри транзакции не проверяются, поэтому тесты
+# не оборачиваются в общую транзакцию.
+@pytest.mark.django_db(transaction=True)
+class TestConnectionHealthCheck:
+
+    @pytest.fixture(autouse=True)
+    def interval(self, settings):
+        settings.DB_HEALTH_CHECK_INTERVAL = INTERVAL
+
+    def test_stale_connection_is_reopened(self):
+        if connection.vendor != 'postgresql':
+            pytest.skip('Соединение с SQLite в памяти не закрывается')
+        connection.ensure_connection()
+        stale = connection.connection
+        connection.last_used_at = time.monotonic() - INTERVAL
+        break_connection()
+        request_started.send(sender=None)
+        assert connection.connection is None, (
+            'Проверьте, что разорванное соединение, простоявшее дольше '
+            'DB_HEALTH_CHECK_INTERVAL, закрывается перед запросом'
+        )
+        assert User.objects.count() == 0
+        assert connection.connection not in (None, stale), (
+            'Проверьте, что запрос открывает новое соединение'
+        )
+
+    def test_recent_connection_is_not_checked(self, monkeypatch):
+        connection.ensure_connection()
+        connection.last_used_at = time.monotonic()
+
+        def is_usable():
+            raise AssertionError(
+                'Проверьте, что недавно использованное соединение '
+                'не проверяется запросом к базе')
+
+        monkeypatch.setattr(connection, 'is_usable', is_usable)
+        request_started.send(sender=None)
+        assert connection.connection is not None
@@ -0,0 +1,112 @@
+import json
+
+import pytest
+from rest_framework.test import APIClient
+
+from reviews.models import Comment, Review, User
+
+# Произведение и по запросу на каждую порцию отзывов: 5 отзывов
+# порциями по 2.
+EXPORT_QUERIES = 1 + 3
+# То же с комментариями, по 3 на отзыв порциями по 2: на порцию из двух
+# отзывов 6 комментариев - 4 запроса (последний пустой), на последний
+# отзыв - 2.
+EXPORT_COMMENTS_QUERIES = EXPORT_QUERIES + 4 + 4 + 2
+
+
+def read_lines(response):
+    return [
+        json.loads(line) for line in
+        b''.join(response.streaming_content).decode().splitlines()
+    ]
+
+
+@pytest.mark.django_db
+class TestExport:
+
+    @pytest.fixture
+    def reviews(self, titles):
+        reviews = []
+        for index in range(5):
+            author = User.objects.create(
+                username=f'author{index}', email=f'author{index}@ya.ru')
+            review = Review.objects.create(
+                title=titles[0], author=author, text=f'Отзыв {index}',
+                score=5
+            )
+            Comment.objects.create(review=review, author=author, text='Да')
+            reviews.append(review)
+        return reviews
+
+    @pytest.fixture
+    def partner(self, client_for):
+        return client_for(User.objects.create(
+            username='partner', email='partner@ya.ru', role='partner'))
+
+    def test_export_streams_all_reviews(
+        self, reviews, partner, settings, django_assert_num_queries
+    ):
+        settings.EXPORT_CHUNK_SIZE = 2
+        url = f'/api/v1/titles/{reviews[0].title_id}/reviews/export/'
+        with django_assert_num_queries(EXPORT_QUERIES):
+            response = partner.get(url)
+            lines = read_lines(response)
+        assert response.status_code == 200, (
+            'Проверьте, что партнер может выгрузить отзывы'
+        )
+        assert response['Content-Type'] == 'application/x-ndjson', (
+            'Проверьте, что выгрузка отдается в NDJSON'
+        )
+        assert [line['id'] for line in lines] == [
+            review.id for review in reviews
+        ], 'Проверьте, что выгружаются все отзывы по дате публикации'
+        assert 'comments' not in lines[0], (
+            'Проверьте, что комментарии выгружаются только по запросу'
+        )
+        lines = read_lines(partner.get(url, {'comments': 'true'}))
+        assert [comment['text'] for comment in lines[0]['comments']] == [
+            'Да'
+        ], 'Проверьте, что ?comments=true добавляет комментарии отзыва'
+
+    def test_export_comments_in_chunks(
+        self, reviews, partner, settings, django_assert_num_queries
+    ):
+        settings.EXPORT_CHUNK_SIZE = 2
+        for review in reviews:
+            for text in ('Нет', 'Может быть'):
+                Comment.objects.create(
+                    review=review, author=review.author, text=text)
+        url = f'/api/v1/titles/{reviews[0].title_id}/reviews/export/'
+        with django_assert_num_queries(EXPORT_COMMENTS_QUERIES):
+            lines = read_lines(partner.get(url, {'comments': 'true'}))
+        assert [
+            [comment['text'] for comment in line['comments']]
+            for line in lines
+        ] == [['Да', 'Нет', 'Может быть']] * len(reviews), (
+            'Проверьте, что комментарии читаются порциями '
+            'по EXPORT_CHUNK_SIZE и все попадают к своим отзывам'
+        )
+
+    def test_export_since(self, reviews, partner):
+        since = reviews[3].pub_date.isoformat()
+        response = partner.get(
+            f'/api/v1/titles/{reviews[0].title_id}/reviews/export/',
+            {'since': since}
+        )
+        assert [line['id'] for line in read_lines(response)] == [
+            reviews[3].id, reviews[4].id
+        ], 'Проверьте, что ?since= выгружает отзывы с этой даты'
+
+    def test_export_access(self, reviews, titles, client_for, admin_client):
+        url = f'/api/v1/titles/{titles[0].id}/reviews/export/'
+        assert APIClient().get(url).status_code == 401, (
+            'Проверьте, что выгрузка недоступна без токена'
+        )
+        user = User.objects.get(username='author0')
+        assert client_for(user).get(url).status_code == 403, (
+            'Проверьте, что выгрузка недоступна обычному пользователю'
+        )
+        assert admin_client.get(
+            '/api/v1/titles/0/reviews/export/').status_code == 404, (
+            'Проверьте, что выгрузка несуществующего произведения - 404'
+        )
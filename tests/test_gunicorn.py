@@ -0,0 +1,66 @@
+import os
+import runpy
+from unittest import mock
+
+from django.conf import settings
+
+CONFIG_PATH = os.path.join(settings.BASE_DIR, 'gunicorn.conf.py')
+
+
+def load_config(**env):
+    with mock.patch.dict(os.environ, env):
+        return runpy.run_path(CONFIG_PATH)
+
+
+class TestGunicornConfig:
+
+    def test_env_overrides(self):
+        config = load_config(
+            GUNICORN_WORKERS='3', GUNICORN_THREADS='1',
+            GUNICORN_MAX_REQUESTS='500', GUNICORN_PRELOAD='False')
+        assert config['workers'] == 3, (
+            'Проверьте, что число воркеров задается GUNICORN_WORKERS'
+        )
+        assert config['worker_class'] == 'sync', (
+            'Проверьте, что без потоков используются воркеры sync'
+        )
+        assert config['max_requests'] == 500, (
+            'Проверьте, что max_requests задается GUNICORN_MAX_REQUESTS'
+        )
+        assert config['max_requests_jitter'] == 50, (
+            'Проверьте, что перезапуск воркеров разнесен на jitter'
+        )
+        assert config['preload_app'] is False, (
+            'Проверьте, что preload отключается GUNICORN_PRELOAD=False'
+        )
+
+    def test_defaults_from_cpu_count(self):
+        config = load_config(SERVER_MODE='wsgi')
+        assert config['workers'] == min(
+            2 * config['CPU_COUNT'] + 1, config['DB_MAX_CONNECTIONS'] // 4
+        ), 'Проверьте, что число воркеров считается от числа ядер'
+        assert config['worker_class'] == 'gthread', (
+            'Проверьте, что по умолчанию воркеры WSGI с потоками'
+        )
+        assert config['preload_app'] is True, (
+            'Проверьте, что приложение по умолчанию загружается в мастере'
+        )
+
+    def test_workers_fit_connection_budget(self):
+        with mock.patch('os.sched_getaffinity', return_value=range(8)):
+            config = load_config(GUNICORN_THREADS='8')
+            assert config['workers'] * config['threads'] <= 80, (
+                'Проверьте, что воркеры x потоки по умолчанию не больше '
+                'DB_MAX_CONNECTIONS'
+            )
+            config = load_config(
+                GUNICORN_THREADS='8', DB_MAX_CONNECTIONS='4')
+        assert config['workers'] == 1, (
+            'Проверьте, что хотя бы один воркер запускается всегда'
+        )
+
+    def test_asgi_mode(self):
+        config = load_config(SERVER_MODE='asgi', GUNICORN_THREADS='6')
+        assert config['worker_class'] == 'uvicorn.workers.UvicornWorker', (
+            'Проверьте, что в режиме asgi используются воркеры uvicorn'
+        )
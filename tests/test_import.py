@@ -0,0 +1,212 @@
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+
+from reviews.management.commands.import_into_db import IMPORT_ERROR
+from reviews.models import (CHANGE_CATEGORY, Category, Change, Comment,
+                            Genre, GenreTitle, Review, Title, User)
+from reviews.ratings import title_histogram
+
+
+# id из файла совпадают с id записей, уже лежащих в базе.
+CSV_FILES = {
+    'users.csv': (
+        'id,username,email,role,bio,first_name,last_name\n'
+        '1,imported,imported@ya.ru,user,,,\n'),
+    'category.csv': 'id,name,slug\n1,Импорт,import\n',
+    'genre.csv': 'id,name,slug\n1,Импорт,import\n',
+    'titles.csv': 'id,name,year,category\n1,Импорт,2000,1\n',
+    'genre_title.csv': 'id,title_id,genre_id\n1,1,1\n',
+    'review.csv': (
+        'id,title_id,text,author,score,pub_date\n'
+        '1,1,Отзыв,1,7,2020-01-01T00:00:00Z\n'),
+    'comments.csv': (
+        'id,review_id,text,author,pub_date\n'
+        '1,1,Да,1,2020-01-01T00:00:00Z\n'),
+}
+
+
+def snapshot():
+    """Данные, которые должны пережить выгрузку и загрузку."""
+    return {
+        'titles': {
+            (title.id, title.name, title.year, title.category.slug,
+             title.rating, title.review_count,
+             tuple(title_histogram(title).items()),
+             tuple(title.genre.order_by('slug').values_list(
+                 'slug', flat=True)))
+            for title in Title.objects.select_related('category')
+        },
+        'reviews': set(Review.objects.values_list(
+            'id', 'title_id', 'author__username', 'text', 'score',
+            'pub_date')),
+        'comments': set(Comment.objects.values_list(
+            'id', 'review_id', 'author__username', 'text', 'pub_date')),
+        'users': set(User.objects.values_list('username', 'email', 'role')),
+    }
+
+
+def add_reviews(titles):
+    """Отзывы трех авторов на четыре произведения, по комментарию к каждому."""
+    authors = [
+        User.objects.create(
+            username=f'author{index}', email=f'{index}@ya.ru',
+            role='moderator' if index else 'user')
+        for index in range(3)
+    ]
+    for index, author in enumerate(authors):
+        for title in titles[:4]:
+            review = Review.objects.create(
+                title=title, author=author, text=f'Отзыв "{index}",\n',
+                score=index + 1 + title.year % 5)
+            Comment.objects.create(
+                review=review, author=authors[0], text='Да')
+
+
+def write_files(path, files):
+    for name, content in files.items():
+        (path / name).write_text(content, encoding='utf-8')
+
+
+def run(command, *args, **options):
+    stdout, stderr = StringIO(), StringIO()
+    call_command(command, *args, stdout=stdout, stderr=stderr, **options)
+    return stderr.getvalue()
+
+
+# export_from_db читает базу в своей транзакции REPEATABLE READ, поэтому
+# тесты не оборачиваются в общую транзакцию.
+@pytest.mark.django_db(transaction=True)
+class TestExportImport:
+
+    def test_round_trip(self, titles, tmp_path):
+        add_reviews(titles)
+        before = snapshot()
+        run('export_from_db', path=str(tmp_path))
+        errors = run(
+            'import_into_db', path=str(tmp_path), truncate=True,
+            no_progress=True)
+        assert errors == '', (
+            'Проверьте, что выгрузка загружается import_into_db без ошибок'
+        )
+        assert snapshot() == before, (
+            'Проверьте, что export_from_db -> import_into_db --truncate '
+            'сохраняет произведения, отзывы, комментарии и пользователей'
+        )
+        run('rebuild_title_rating', check=True)
+
+    def test_malformed_row(self, category, tmp_path):
+        run('export_from_db', path=str(tmp_path))
+        (tmp_path / 'titles.csv').write_text(
+            'id,name,year,category\n'
+            f'1,Целое,2000,{category.id}\n'
+            '2,Без года и категории\n',
+            encoding='utf-8')
+        errors = run('import_into_db', path=str(tmp_path), no_progress=True)
+        assert errors.strip() == IMPORT_ERROR.format(
+            error='not enough values to unpack (expected 4, got 2)'
+        ), 'Проверьте, что ошибочная строка прерывает импорт с сообщением'
+        assert not Title.objects.exists(), (
+            'Проверьте, что пачка с ошибочной строкой не загружается'
+        )
+        assert Category.objects.get() == category
+
+    def test_export_requires_path(self):
+        with pytest.raises(CommandError):
+            call_command('export_from_db')
+
+    def test_ids_taken_by_existing_rows(self, tmp_path):
+        category = Category.objects.create(id=1, name='Фильм', slug='film')
+        author = User.objects.create(id=1, username='author', email='a@ya.ru')
+        title = Title.objects.create(
+            id=1, name='Старое', year=1990, category=category)
+        Review.objects.create(
+            id=1, title=title, author=author, text='Старый', score=3)
+        Change.objects.all().delete()
+        write_files(tmp_path, CSV_FILES)
+        errors = run('import_into_db', path=str(tmp_path), no_progress=True)
+        assert errors == ''
+        imported = Title.objects.get(name='Импорт')
+        assert (imported.category.slug, list(
+            imported.genre.values_list('slug', flat=True)
+        )) == ('import', ['import']), (
+            'Проверьте, что строки с занятыми id вставляются под новыми id, '
+            'а ссылки на них следуют за новыми id'
+        )
+        assert not title.genre.exists(), (
+            'Проверьте, что жанр из файла не привязан к чужому произведению'
+        )
+        review = Review.objects.get(title=imported)
+        assert (review.author.username, review.text, review.score) == (
+            'imported', 'Отзыв', 7
+        ), 'Проверьте, что отзыв из файла привязан к импортированным записям'
+        assert review.comments.get().author == review.author
+        assert Review.objects.get(pk=1).text == 'Старый'
+        assert not Change.objects.filter(
+            kind=CHANGE_CATEGORY, object_id=category.id
+        ).exists(), (
+            'Проверьте, что журнал изменений не получает записей '
+            'о невставленных строках'
+        )
+
+    def test_repeated_import_is_idempotent(self, tmp_path):
+        write_files(tmp_path, CSV_FILES)
+        run('import_into_db', path=str(tmp_path), no_progress=True)
+        counts = [
+            model.objects.count()
+            for model in (User, Category, Genre, Title, Review, Comment)
+        ]
+        run('import_into_db', path=str(tmp_path), no_progress=True)
+        assert [
+            model.objects.count()
+            for model in (User, Category, Genre, Title, Review, Comment)
+        ] == counts == [1] * 6, (
+            'Проверьте, что повторный импорт тех же файлов '
+            'не создает копий записей'
+        )
+
+
+# Параллельный импорт: у каждого потока свое соединение, SQLite
+# загружается в один поток.
+@pytest.mark.django_db(transaction=True)
+class TestParallelImport:
+
+    @pytest.fixture(autouse=True)
+    def postgresql_only(self):
+        if connection.vendor != 'postgresql':
+            pytest.skip('SQLite импортируется в один поток')
+
+    def test_round_trip(self, titles, tmp_path):
+        add_reviews(titles)
+        before = snapshot()
+        run('export_from_db', path=str(tmp_path))
+        errors = run(
+            'import_into_db', path=str(tmp_path), truncate=True,
+            no_progress=True, workers=4, batch_size=3)
+        assert errors == '' and snapshot() == before, (
+            'Проверьте, что import_into_db --workers загружает наборы '
+            'по графу зависимостей'
+        )
+
+    def test_failure_aborts_dependents(self, tmp_path):
+        write_files(tmp_path, {
+            **CSV_FILES,
+            'titles.csv': 'id,name,year,category\n1,Без года\n',
+        })
+        errors = run(
+            'import_into_db', path=str(tmp_path), no_progress=True,
+            workers=4)
+        assert errors.strip() == IMPORT_ERROR.format(
+            error='not enough values to unpack (expected 4, got 2)'
+        ), 'Проверьте, что ошибка в потоке прерывает импорт с сообщением'
+        assert Category.objects.filter(slug='import').exists(), (
+            'Проверьте, что независимые наборы загружаются параллельно'
+        )
+        assert not any(
+            model.objects.exists()
+            for model in (Title, GenreTitle, Review, Comment)
+        ), (
+            'Проверьте, что наборы, зависящие от упавшего, не загружаются'
+        )
@@ -0,0 +1,51 @@
+import os
+
+import pytest
+from rest_framework.test import APIClient
+
+METRICS_URL = '/api/v1/metrics/'
+
+
+@pytest.mark.django_db
+class TestMetrics:
+
+    def test_metrics_admin_only(self, user_client):
+        assert APIClient().get(METRICS_URL).status_code == 401, (
+            'Проверьте, что метрики недоступны без токена'
+        )
+        assert user_client.get(METRICS_URL).status_code == 403, (
+            'Проверьте, что метрики недоступны пользователю'
+        )
+
+    def test_metrics_by_route(self, titles, admin_client):
+        APIClient().get('/api/v1/titles/')
+        response = admin_client.get(METRICS_URL)
+        assert response.status_code == 200, (
+            'Проверьте, что метрики доступны администратору'
+        )
+        assert response['Content-Type'].startswith('text/plain'), (
+            'Проверьте, что метрики отдаются в текстовом формате Prometheus'
+        )
+        content = response.content.decode()
+        for name in (
+            'yamdb_request_duration_seconds_bucket',
+            'yamdb_request_db_queries_bucket',
+            'yamdb_request_db_seconds_sum',
+            'yamdb_request_serializer_seconds_count',
+        ):
+            assert f'{name}{{route="titles-list",method="GET"' in content, (
+                f'Проверьте, что в метриках есть {name} для titles-list'
+            )
+
+    def test_worker_metrics(self, admin_client):
+        content = admin_client.get(METRICS_URL).content.decode()
+        pid = os.getpid()
+        for name in (
+            'yamdb_worker_requests_total',
+            'yamdb_worker_resident_memory_bytes',
+            'yamdb_worker_max_resident_memory_bytes',
+            'yamdb_worker_start_time_seconds',
+        ):
+            assert f'{name}{{pid="{pid}"}}' in content, (
+                f'Проверьте, что в метриках есть {name} для воркера'
+            )
@@ -0,0 +1,65 @@
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from reviews.models import OutgoingEmail, User
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+
+
+@pytest.mark.django_db(transaction=True)
+class TestOutbox:
+
+    def signup(self, count):
+        client = APIClient()
+        for number in range(count):
+            response = client.post(SIGNUP_URL, {
+                'username': f'user{number}', 'email': f'user{number}@ya.ru'
+            })
+            assert response.status_code == 200, (
+                'Проверьте, что регистрация возвращает 200'
+            )
+
+    def test_signup_enqueues_email(self, smtp_server):
+        self.signup(1)
+        assert User.objects.filter(username='user0').exists(), (
+            'Проверьте, что регистрация создает пользователя'
+        )
+        assert OutgoingEmail.objects.filter(to='user0@ya.ru').count() == 1, (
+            'Проверьте, что регистрация ставит письмо в очередь'
+        )
+        assert not smtp_server.messages, (
+            'Проверьте, что письмо не отправляется во время запроса'
+        )
+
+    def test_worker_sends_batch_over_one_connection(self, smtp_server):
+        self.signup(3)
+        call_command('send_emails', '--once')
+        assert len(smtp_server.messages) == 3, (
+            'Проверьте, что команда send_emails отправляет письма из очереди'
+        )
+        assert smtp_server.connections == 1, (
+            'Проверьте, что пачка писем отправляется через одно соединение'
+        )
+        assert not OutgoingEmail.objects.filter(
+            sent_at__isnull=True).exists(), (
+            'Проверьте, что отправленные письма отмечаются в очереди'
+        )
+
+    def test_worker_retries_with_backoff(self, smtp_server, settings):
+        self.signup(1)
+        port = settings.EMAIL_PORT
+        smtp_server.close()
+        call_command('send_emails', '--once')
+        email = OutgoingEmail.objects.get()
+        assert email.sent_at is None and email.attempts == 1, (
+            'Проверьте, что при ошибке SMTP письмо остается в очереди'
+        )
+        assert email.next_attempt_at > email.created, (
+            'Проверьте, что повтор отправки откладывается'
+        )
+        settings.EMAIL_PORT = port
+        call_command('send_emails', '--once')
+        assert OutgoingEmail.objects.get().attempts == 1, (
+            'Проверьте, что письмо не отправляется до наступления повтора'
+        )
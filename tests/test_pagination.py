@@ -0,0 +1,106 @@
+import pytest
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from reviews.models import Comment, Review, Title, User
+
+TITLES_URL = '/api/v1/titles/'
+CURSOR = {'pagination': 'cursor'}
+
+
+def read_pages(url, params):
+    """id всех объектов, страница за страницей по ссылкам next."""
+    client = APIClient()
+    response = client.get(url, params)
+    ids, pages = [], 0
+    while True:
+        data = response.json()
+        assert 'count' not in data, (
+            'Проверьте, что курсорный режим не считает объекты'
+        )
+        ids += [item['id'] for item in data['results']]
+        pages += 1
+        if not data['next']:
+            return ids, pages
+        response = client.get(data['next'])
+
+
+@pytest.fixture
+def twins(category):
+    """Произведения с одинаковым ключом сортировки name."""
+    return Title.objects.bulk_create(
+        Title(name='Одинаковое', year=2000 + index % 2, category=category)
+        for index in range(25)
+    )
+
+
+@pytest.fixture
+def authors():
+    return [
+        User.objects.create(username=f'author{index}', email=f'{index}@ya.ru')
+        for index in range(25)
+    ]
+
+
+@pytest.mark.django_db
+class TestCursorPagination:
+
+    def test_titles_with_equal_names(self, twins):
+        ids, pages = read_pages(TITLES_URL, {**CURSOR, 'page_size': 10})
+        assert pages == 3 and len(ids) == len(set(ids)) == 25, (
+            'Проверьте, что страницы курсора не теряют и не повторяют '
+            'произведения с одинаковым названием'
+        )
+        assert ids == sorted(ids), (
+            'Проверьте, что при равных названиях порядок задает id'
+        )
+
+    def test_reviews_and_comments_with_equal_dates(self, titles, authors):
+        now = timezone.now()
+        title = titles[0]
+        reviews = [
+            Review.objects.create(
+                title=title, author=author, text='Отзыв', score=5,
+                pub_date=now)
+            for author in authors
+        ]
+        for _ in range(25):
+            Comment.objects.create(
+                review=reviews[0], author=authors[0], text='Да',
+                pub_date=now)
+        url = f'{TITLES_URL}{title.id}/reviews/'
+        ids, _ = read_pages(url, {**CURSOR, 'page_size': 7})
+        assert ids == sorted(
+            (review.id for review in reviews), reverse=True
+        ), (
+            'Проверьте, что отзывы с одинаковой датой выдаются '
+            'по убыванию id без пропусков и повторов'
+        )
+        ids, _ = read_pages(
+            f'{url}{reviews[0].id}/comments/', {**CURSOR, 'page_size': 7})
+        assert ids == sorted(
+            Comment.objects.values_list('id', flat=True), reverse=True
+        ), 'Проверьте курсорные страницы комментариев'
+
+    def test_page_size_is_clamped(self, twins, settings):
+        settings.CURSOR_PAGINATION_MAX_PAGE_SIZE = {
+            **settings.CURSOR_PAGINATION_MAX_PAGE_SIZE, 'titles': 4}
+        data = APIClient().get(
+            TITLES_URL, {**CURSOR, 'page_size': 1000}).json()
+        assert len(data['results']) == 4 and data['next'], (
+            'Проверьте, что page_size ограничен '
+            'CURSOR_PAGINATION_MAX_PAGE_SIZE'
+        )
+
+    def test_filters_with_cursor(self, twins):
+        ids, pages = read_pages(
+            TITLES_URL, {**CURSOR, 'page_size': 5, 'year': 2001})
+        assert (pages, set(ids)) == (3, {
+            title.id for title in Title.objects.filter(year=2001)
+        }), 'Проверьте, что фильтры сохраняются в ссылках курсора'
+
+    def test_page_number_mode_by_default(self, twins):
+        data = APIClient().get(TITLES_URL).json()
+        assert data['count'] == 25, (
+            'Проверьте, что без ?pagination=cursor пагинация постраничная'
+        )
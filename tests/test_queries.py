@@ -0,0 +1,144 @@
+import pytest
+from rest_framework.test import APIClient
+
+from reviews.models import Review, User
+
+# COUNT(*) для пагинации, страница произведений с категориями
+# и один prefetch жанров - независимо от размера страницы.
+TITLES_LIST_QUERIES = 3
+# Произведение с категорией и prefetch жанров.
+TITLES_DETAIL_QUERIES = 2
+# Тест идет в транзакции, поэтому atomic() дает SAVEPOINT и RELEASE.
+# Произведение, вставка отзыва с обновлением рейтинга в savepoint
+# поисковый документ (поиск, savepoint вставки) и запись в журнал
+# изменений отзыва и произведения.
+REVIEW_CREATE_QUERIES = 12
+# Произведение, неудачная вставка с откатом savepoint и проверка, что
+# ее отклонило ограничение unique_review.
+REVIEW_DUPLICATE_QUERIES = 6
+# Отзыв по (pk, title_id) с автором, сохранение с рейтингом в savepoint,
+# поисковый документ и журнал изменений.
+REVIEW_UPDATE_QUERIES = 10
+# Отзыв, комментарии (каскад), удаление, рейтинг, поисковые документы
+# и журнал изменений.
+REVIEW_DELETE_QUERIES = 7
+# Отзыв по (review_id, title_id), вставка, поисковый документ
+# и журнал изменений.
+COMMENT_CREATE_QUERIES = 9
+# Комментарий с отзывом и автором одним запросом, сохранение,
+# поисковый документ и журнал изменений.
+COMMENT_UPDATE_QUERIES = 7
+COMMENT_DELETE_QUERIES = 4
+
+
+@pytest.mark.django_db
+class TestTitleQueries:
+
+    def test_titles_list_queries(
+        self, titles, settings, django_assert_num_queries
+    ):
+        with django_assert_num_queries(TITLES_LIST_QUERIES):
+            response = APIClient().get('/api/v1/titles/')
+        assert response.status_code == 200, (
+            'Проверьте, что список произведений доступен без токена'
+        )
+        assert len(response.json()['results']) == min(
+            len(titles), settings.REST_FRAMEWORK['PAGE_SIZE']
+        ), 'Проверьте, что страница произведений заполнена полностью'
+
+    def test_titles_detail_queries(self, titles, django_assert_num_queries):
+        with django_assert_num_queries(TITLES_DETAIL_QUERIES):
+            response = APIClient().get(f'/api/v1/titles/{titles[0].id}/')
+        assert response.status_code == 200, (
+            'Проверьте, что произведение доступно без токена'
+        )
+        assert len(response.json()['genre']) == 3, (
+            'Проверьте, что в ответе есть все жанры произведения'
+        )
+
+
+@pytest.mark.django_db
+class TestReviewCommentQueries:
+
+    @pytest.fixture
+    def clients(self, client_for):
+        clients = []
+        for name in ('author', 'reader'):
+            client = client_for(
+                User.objects.create(username=name, email=f'{name}@ya.ru'))
+            # Версия токена кэшируется после первого запроса.
+            client.get('/api/v1/categories/')
+            clients.append(client)
+        return clients
+
+    def test_review_write_queries(
+        self, titles, clients, django_assert_num_queries
+    ):
+        author, _ = clients
+        url = f'/api/v1/titles/{titles[0].id}/reviews/'
+        data = {'text': 'Отзыв', 'score': 5}
+        with django_assert_num_queries(REVIEW_CREATE_QUERIES):
+            response = author.post(url, data, format='json')
+        assert response.status_code == 201, (
+            'Проверьте, что автор может оставить отзыв'
+        )
+        review_url = f'{url}{response.json()["id"]}/'
+        with django_assert_num_queries(REVIEW_DUPLICATE_QUERIES):
+            response = author.post(url, data, format='json')
+        assert response.status_code == 400, (
+            'Проверьте, что второй отзыв автора на произведение отклоняется'
+        )
+        with django_assert_num_queries(REVIEW_UPDATE_QUERIES):
+            response = author.patch(review_url, {'score': 7}, format='json')
+        assert response.json()['score'] == 7, (
+            'Проверьте, что автор может изменить оценку'
+        )
+        with django_assert_num_queries(REVIEW_DELETE_QUERIES):
+            response = author.delete(review_url)
+        assert response.status_code == 204, (
+            'Проверьте, что автор может удалить отзыв'
+        )
+
+    def test_comment_write_queries(
+        self, titles, clients, django_assert_num_queries
+    ):
+        author, reader = clients
+        review = Review.objects.create(
+            title=titles[0], author=User.objects.get(username='author'),
+            text='Отзыв', score=5
+        )
+        url = f'/api/v1/titles/{titles[0].id}/reviews/{review.id}/comments/'
+        with django_assert_num_queries(COMMENT_CREATE_QUERIES):
+            response = reader.post(url, {'text': 'Да'}, format='json')
+        assert response.status_code == 201, (
+            'Проверьте, что пользователь может прокомментировать отзыв'
+        )
+        comment_url = f'{url}{response.json()["id"]}/'
+        with django_assert_num_queries(COMMENT_UPDATE_QUERIES):
+            response = reader.patch(comment_url, {'text': 'Нет'}, format='json')
+        assert response.json()['text'] == 'Нет', (
+            'Проверьте, что автор может изменить комментарий'
+        )
+        with django_assert_num_queries(COMMENT_DELETE_QUERIES):
+            response = reader.delete(comment_url)
+        assert response.status_code == 204, (
+            'Проверьте, что автор может удалить комментарий'
+        )
+
+    def test_parent_not_found(self, titles, clients):
+        author, _ = clients
+        review = Review.objects.create(
+            title=titles[0], author=User.objects.get(username='author'),
+            text='Отзыв', score=5
+        )
+        assert author.get('/api/v1/titles/0/reviews/').status_code == 404, (
+            'Проверьте, что отзывы несуществующего произведения - 404'
+        )
+        response = author.post(
+            f'/api/v1/titles/{titles[1].id}/reviews/{review.id}/comments/',
+            {'text': 'Да'}, format='json'
+        )
+        assert response.status_code == 404, (
+            'Проверьте, что отзыв другого произведения нельзя '
+            'прокомментировать'
+        )
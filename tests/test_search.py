@@ -0,0 +1,105 @@
+import pytest
+from django.db import connection
+from rest_framework.test import APIClient
+
+from reviews.models import Comment, Review, SearchDocument, User
+from reviews.search import BasicSearchBackend, get_backend
+
+URL = '/api/v1/search/'
+
+
+def found(q, **params):
+    response = APIClient().get(URL, {'q': q, **params})
+    assert response.status_code == 200, (
+        'Проверьте, что поиск доступен без токена'
+    )
+    return [
+        (result['type'], result['id'])
+        for result in response.json()['results']
+    ]
+
+
+@pytest.fixture
+def review(titles):
+    titles[0].name = 'Зеленый дракон'
+    titles[0].save()
+    author = User.objects.create(username='author', email='a@ya.ru')
+    return Review.objects.create(
+        title=titles[1], author=author, score=5,
+        text='Книга про дракон и рыцаря, дракон побеждает')
+
+
+@pytest.fixture
+def comment(review):
+    return Comment.objects.create(
+        review=review, author=review.author, text='Согласен про рыцаря')
+
+
+@pytest.mark.django_db
+class TestSearch:
+
+    def test_ranking_and_type(self, titles, review, comment):
+        assert found('дракон') == [
+            ('title', titles[0].id), ('review', review.id)
+        ], (
+            'Проверьте, что совпадение в названии выше совпадения '
+            'в тексте, а документы без слов запроса не находятся'
+        )
+        assert found('рыцаря', type='comment') == [
+            ('comment', comment.id)
+        ], 'Проверьте фильтр по типу документа'
+        assert APIClient().get(URL).status_code == 400, (
+            'Проверьте, что запрос без q отклоняется'
+        )
+
+    def test_headline(self, review):
+        result = APIClient().get(
+            URL, {'q': 'побеждает', 'type': 'review'}).json()['results'][0]
+        assert (result['title_id'], result['review_id']) == (
+            review.title_id, review.id
+        ), 'Проверьте ссылки найденного отзыва'
+        assert '<b>побеждает</b>' in result['headline'], (
+            'Проверьте, что совпадения в фрагменте выделены'
+        )
+
+    def test_documents_follow_writes(self, titles, review, comment):
+        titles[0].name = 'Синий кит'
+        titles[0].save()
+        assert found('дракон', type='title') == [], (
+            'Проверьте, что изменение названия обновляет документ'
+        )
+        assert found('кит') == [('title', titles[0].id)]
+        review.text = 'Книга про рыцаря, он побеждает'
+        review.save()
+        assert found('дракон') == [], (
+            'Проверьте, что изменение отзыва обновляет документ'
+        )
+        comment.text = 'Не согласен'
+        comment.save()
+        assert found('рыцаря', type='comment') == [], (
+            'Проверьте, что изменение комментария обновляет документ'
+        )
+        comment.delete()
+        review.delete()
+        assert found('согласен') == [] and found('побеждает') == [], (
+            'Проверьте, что удаленные отзыв и комментарий не находятся'
+        )
+        titles[0].delete()
+        assert found('кит') == [], (
+            'Проверьте, что удаленное произведение не находится'
+        )
+
+    def test_other_databases_fall_back(self, titles, review, monkeypatch):
+        monkeypatch.setattr(connection, 'vendor', 'mysql')
+        assert isinstance(get_backend(), BasicSearchBackend), (
+            'Проверьте, что для СУБД без полнотекстового поиска '
+            'используется поиск по подстроке'
+        )
+        assert [
+            (document.kind, document.object_id)
+            for document in get_backend().search(
+                SearchDocument.objects.all(), 'дракон'
+            ).order_by('-rank', 'pk')
+        ] == [('title', titles[0].id), ('review', review.id)], (
+            'Проверьте поиск по подстроке'
+        )
@@ -0,0 +1,72 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from rest_framework.test import APIClient
+
+from reviews.models import OutgoingEmail, User
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+# Поиск по username или email, создание пользователя и письма в очереди
+# плюс SAVEPOINT/RELEASE вокруг создания пользователя и вокруг всей
+# регистрации (внутри транзакции теста).
+SIGNUP_MAX_QUERIES = 7
+
+
+@pytest.mark.django_db
+class TestSignup:
+
+    def test_signup_user_lookup_is_single_query(
+        self, django_assert_max_num_queries
+    ):
+        data = {'username': 'new_user', 'email': 'new_user@ya.ru'}
+        with django_assert_max_num_queries(SIGNUP_MAX_QUERIES) as queries:
+            response = APIClient().post(SIGNUP_URL, data)
+        assert response.status_code == 200, (
+            'Проверьте, что регистрация нового пользователя возвращает 200'
+        )
+        selects = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'reviews_user' in query['sql']
+        ]
+        assert len(selects) == 1, (
+            'Проверьте, что при регистрации пользователь ищется одним запросом'
+        )
+
+    def test_signup_conflicts(self):
+        User.objects.create(username='taken', email='taken@ya.ru')
+        client = APIClient()
+        response = client.post(
+            SIGNUP_URL, {'username': 'taken', 'email': 'other@ya.ru'})
+        assert response.status_code == 400 and 'taken' in (
+            response.json()['status']
+        ), 'Проверьте, что занятый username возвращает 400'
+        response = client.post(
+            SIGNUP_URL, {'username': 'other', 'email': 'taken@ya.ru'})
+        assert response.status_code == 400 and 'taken@ya.ru' in (
+            response.json()['status']
+        ), 'Проверьте, что занятый email возвращает 400'
+        response = client.post(
+            SIGNUP_URL, {'username': 'taken', 'email': 'taken@ya.ru'})
+        assert response.status_code == 200, (
+            'Проверьте, что повторная регистрация возвращает 200'
+        )
+        assert User.objects.get(username='taken').confirmation_code, (
+            'Проверьте, что пользователю без кода выдается новый код'
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_duplicate_signups():
+    if connection.vendor == 'sqlite':
+        pytest.skip('SQLite не поддерживает параллельную запись')
+    call_command(
+        'signup_load_test', '--requests', '200', '--users', '2',
+        '--workers', '8', '--keep'
+    )
+    assert User.objects.filter(username__startswith='loadtest').count() == 2, (
+        'Проверьте, что повторные регистрации не создают дубликатов'
+    )
+    assert OutgoingEmail.objects.count() == 200, (
+        'Проверьте, что на каждую регистрацию ставится письмо'
+    )
@@ -0,0 +1,36 @@
+import json
+
+from django.core.management import call_command
+
+from reviews.management.commands.startup_profile import parse_import_time
+
+IMPORT_TIME = '''import time: self [us] | cumulative | imported package
+import time:       300 |        300 |     django.utils.version
+import time:      1200 |       1500 |   django
+import time:       500 |        500 | rest_framework
+'''
+
+
+class TestStartupProfile:
+
+    def test_parse_import_time(self):
+        assert parse_import_time(IMPORT_TIME) == {
+            'django': 1.5, 'rest_framework': 0.5
+        }, 'Проверьте, что время импорта суммируется по пакетам'
+
+    def test_profiles(self, tmp_path):
+        output = tmp_path / 'startup.json'
+        call_command(
+            'startup_profile', '--runs', '1', '--top', '3',
+            '--output', str(output)
+        )
+        result = json.loads(output.read_text(encoding='utf-8'))
+        assert set(result) == {'full', 'api'}, (
+            'Проверьте, что замеряются оба профиля настроек'
+        )
+        assert result['api']['modules'] < result['full']['modules'], (
+            'Проверьте, что профиль api загружает меньше модулей'
+        )
+        assert len(result['full']['packages']) == 3, (
+            'Проверьте, что --top ограничивает список пакетов'
+        )
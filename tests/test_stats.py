@@ -0,0 +1,151 @@
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from rest_framework.test import APIClient
+
+from api.bulk import ReviewIngest
+from reviews.models import Review, Title, User
+from reviews.ratings import histogram_median, title_histogram
+
+# Одно произведение по первичному ключу, без отзывов.
+STATS_QUERIES = 1
+
+
+def histogram(**counts):
+    """Гистограмма с нулями для не указанных оценок: histogram(s7=2)."""
+    result = dict.fromkeys(range(1, 11), 0)
+    for name, count in counts.items():
+        result[int(name[1:])] = count
+    return result
+
+
+@pytest.fixture
+def authors():
+    return [
+        User.objects.create(
+            username=f'author{index}', email=f'{index}@ya.ru')
+        for index in range(4)
+    ]
+
+
+@pytest.mark.django_db
+class TestTitleStats:
+
+    def test_histogram_follows_review_writes(self, titles, authors):
+        title = titles[0]
+        reviews = [
+            Review.objects.create(
+                title=title, author=author, text='Отзыв', score=score)
+            for author, score in zip(authors, (2, 7, 7, 9))
+        ]
+        reviews[0].score = 9
+        reviews[0].save()
+        reviews[1].delete()
+        title.refresh_from_db()
+        assert title_histogram(title) == histogram(s7=1, s9=2), (
+            'Проверьте, что гистограмма обновляется при создании, '
+            'изменении и удалении отзыва'
+        )
+        ReviewIngest(User.objects.create(
+            username='bulk', email='bulk@ya.ru'
+        ), [{'title': title.id, 'text': 'Отзыв', 'score': 1}]).run()
+        title.refresh_from_db()
+        assert title_histogram(title) == histogram(s1=1, s7=1, s9=2), (
+            'Проверьте, что пакетная загрузка обновляет гистограмму'
+        )
+
+    def test_rating_follows_api_writes(self, titles, authors, client_for):
+        title = titles[0]
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        clients = [client_for(author) for author in authors[:3]]
+        ids = [
+            client.post(url, {'text': 'Отзыв', 'score': score}).json()['id']
+            for client, score in zip(clients, (2, 7, 9))
+        ]
+
+        def stored():
+            title.refresh_from_db()
+            return (
+                title.review_count, title.score_sum, title.rating,
+                title_histogram(title))
+
+        response = clients[0].patch(f'{url}{ids[0]}/', {'score': 8})
+        assert response.status_code == 200
+        assert stored() == (3, 24, 8, histogram(s7=1, s8=1, s9=1)), (
+            'Проверьте, что PATCH оценки отзыва сдвигает число отзывов, '
+            'сумму оценок, рейтинг и гистограмму'
+        )
+        response = clients[1].patch(f'{url}{ids[1]}/', {'text': 'Правка'})
+        assert response.status_code == 200
+        assert stored() == (3, 24, 8, histogram(s7=1, s8=1, s9=1)), (
+            'Проверьте, что PATCH без оценки не меняет рейтинг'
+        )
+        assert clients[2].delete(f'{url}{ids[2]}/').status_code == 204
+        assert stored() == (2, 15, 7, histogram(s7=1, s8=1)), (
+            'Проверьте, что DELETE отзыва вычитает его оценку из рейтинга'
+        )
+        for client, pk in zip(clients, ids[:2]):
+            client.delete(f'{url}{pk}/')
+        assert stored() == (0, 0, None, histogram()), (
+            'Проверьте, что без отзывов рейтинга нет'
+        )
+        call_command('rebuild_title_rating', check=True)
+
+    def test_stats_endpoint(
+        self, titles, authors, django_assert_num_queries
+    ):
+        for author, score in zip(authors, (3, 8, 8, 10)):
+            Review.objects.create(
+                title=titles[0], author=author, text='Отзыв', score=score)
+        url = f'/api/v1/titles/{titles[0].id}/stats/'
+        with django_assert_num_queries(STATS_QUERIES):
+            response = APIClient().get(url)
+        assert response.status_code == 200, (
+            'Проверьте, что статистика доступна без токена'
+        )
+        stats = response.json()
+        assert {key: stats[key] for key in (
+            'review_count', 'rating', 'average', 'median'
+        )} == {
+            'review_count': 4, 'rating': 7, 'average': 7.25, 'median': 8
+        }, 'Проверьте количество отзывов, рейтинг, среднюю и медиану'
+        assert stats['histogram'] == {
+            str(score): count
+            for score, count in histogram(s3=1, s8=2, s10=1).items()
+        }, 'Проверьте, что гистограмма отдается по всем оценкам'
+        assert APIClient().get(
+            '/api/v1/titles/0/stats/').status_code == 404, (
+            'Проверьте, что статистика несуществующего произведения - 404'
+        )
+
+    def test_stats_embedded_on_request(self, titles):
+        title = APIClient().get(f'/api/v1/titles/{titles[0].id}/').json()
+        assert 'stats' not in title and 'score_1_count' not in title, (
+            'Проверьте, что статистика не выводится без ?fields=stats'
+        )
+        response = APIClient().get('/api/v1/titles/', {'fields': 'stats'})
+        stats = response.json()['results'][0]['stats']
+        assert (stats['review_count'], stats['median']) == (0, None), (
+            'Проверьте, что ?fields=stats добавляет статистику в список'
+        )
+
+    def test_rebuild_command(self, titles, authors):
+        Review.objects.create(
+            title=titles[0], author=authors[0], text='Отзыв', score=4)
+        Title.objects.update(score_4_count=0, score_5_count=3)
+        with pytest.raises(CommandError):
+            call_command('rebuild_title_rating', check=True)
+        call_command('rebuild_title_rating')
+        title = Title.objects.get(pk=titles[0].pk)
+        assert title_histogram(title) == histogram(s4=1), (
+            'Проверьте, что rebuild_title_rating пересчитывает гистограмму'
+        )
+        call_command('rebuild_title_rating', check=True)
+
+
+def test_histogram_median():
+    assert histogram_median(histogram()) is None
+    assert histogram_median(histogram(s5=1)) == 5
+    assert histogram_median(histogram(s2=1, s9=1)) == 5.5
+    assert histogram_median(histogram(s1=2, s6=1, s10=2)) == 6
+    assert histogram_median(histogram(s3=3, s4=1)) == 3
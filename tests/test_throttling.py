@@ -0,0 +1,98 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from api.throttling import TokenUsernameThrottle, get_rejected_counts
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+TOKEN_URL = '/api/v1/auth/token/'
+
+
+@pytest.mark.django_db
+class TestAuthThrottling:
+
+    def test_token_username_bucket(self, django_assert_num_queries):
+        client = APIClient()
+        data = {'username': 'victim', 'confirmation_code': 'guess'}
+        for _ in range(5):
+            assert client.post(TOKEN_URL, data).status_code == 404, (
+                'Проверьте, что запросы в пределах лимита обрабатываются'
+            )
+        rejected = get_rejected_counts().get('token_username', 0)
+        with django_assert_num_queries(0):
+            response = client.post(
+                TOKEN_URL, data, REMOTE_ADDR='10.0.0.2')
+        assert response.status_code == 429, (
+            'Проверьте, что подбор кода для одного username ограничен '
+            'независимо от адреса'
+        )
+        assert get_rejected_counts()['token_username'] == rejected + 1, (
+            'Проверьте, что отклоненные запросы подсчитываются'
+        )
+
+    def test_signup_ip_bucket(self):
+        client = APIClient()
+        statuses = [
+            client.post(SIGNUP_URL, {
+                'username': f'user{number}', 'email': f'user{number}@ya.ru'
+            }).status_code
+            for number in range(11)
+        ]
+        assert statuses[:10] == [200] * 10 and statuses[10] == 429, (
+            'Проверьте, что регистрации с одного адреса ограничены'
+        )
+        response = client.post(
+            SIGNUP_URL, {'username': 'other', 'email': 'other@ya.ru'},
+            REMOTE_ADDR='10.0.0.3')
+        assert response.status_code == 200, (
+            'Проверьте, что лимит по адресу не затрагивает другие адреса'
+        )
+
+    def test_tokens_refill_evenly(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(TokenUsernameThrottle, 'timer', lambda self: now[0])
+
+        def allow():
+            request = Request(APIRequestFactory().post(
+                TOKEN_URL, {'username': 'victim'}, format='json'),
+                parsers=[JSONParser()])
+            throttle = TokenUsernameThrottle()
+            return throttle.allow_request(request, None), throttle
+
+        assert [allow()[0] for _ in range(6)] == [True] * 5 + [False]
+        assert allow()[1].wait() == pytest.approx(12), (
+            'Проверьте, что токен лимита 5/min возвращается за 12 с'
+        )
+        now[0] += 12
+        assert [allow()[0] for _ in range(2)] == [True, False], (
+            'Проверьте, что токены возвращаются равномерно за период'
+        )
+        now[0] += 600
+        assert [allow()[0] for _ in range(6)] == [True] * 5 + [False], (
+            'Проверьте, что в корзине не больше N токенов'
+        )
+
+    def test_limit_is_shared_by_concurrent_requests(self):
+        def allow(_):
+            request = Request(APIRequestFactory().post(
+                TOKEN_URL, {'username': 'victim'}, format='json'),
+                parsers=[JSONParser()])
+            return TokenUsernameThrottle().allow_request(request, None)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            allowed = list(executor.map(allow, range(40)))
+        assert allowed.count(True) == 5, (
+            'Проверьте, что одновременные запросы не превышают лимит'
+        )
+        assert get_rejected_counts() == {'token_username': 35}, (
+            'Проверьте, что отклоненные запросы считаются все'
+        )
+        caches[settings.THROTTLE_CACHE_ALIAS].clear()
+        assert get_rejected_counts() == {}, (
+            'Проверьте, что счетчик отказов хранится в общем кэше лимитов'
+        )